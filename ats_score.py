@@ -0,0 +1,186 @@
+import argparse
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from latex_parser import parse_nodes, to_text
+from prompt_budget import keywords
+
+DEFAULT_METHOD = "bm25"
+BM25_K1 = 1.5
+BM25_B = 0.75
+DEFAULT_TOP_KEYWORDS = 15
+# BM25's average resume length, in keywords, when fit() is given no reference
+# resumes: roughly a one-to-two page resume
+DEFAULT_AVERAGE_LENGTH = 350
+
+
+@dataclass
+class MatchResult:
+    resume: int
+    job: int
+    score: float
+    matched: list = field(default_factory=list)
+    missing: list = field(default_factory=list)
+
+
+def latex_plain_text(content):
+    """Plain text of a generated LaTeX resume body, for scoring optimized output."""
+    begin = content.find("\\begin{document}")
+    return to_text(parse_nodes(content[begin:] if begin != -1 else content))
+
+
+class ATSScorer:
+    """Keyword match scores between resumes and a corpus of job descriptions.
+
+    fit() turns the job descriptions into one weight matrix over their shared
+    vocabulary. score() then rates any number of resumes against every job in a
+    single matrix product, so thousands of pairs cost one BLAS call.
+
+    With method="bm25" a score is roughly the fraction of a job's IDF-weighted
+    keywords the resume covers, with repeated mentions saturating as in BM25. method="tfidf" is
+    the cosine between TF-IDF vectors. Both fall in [0, 1].
+
+    Term rarity comes from the job corpus: a word every posting uses says little
+    about fit for any one of them. BM25's average resume length is also fixed at
+    fit(), so a pair scores the same whichever other resumes it is scored with.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, k1=BM25_K1, b=BM25_B):
+        if method not in ("bm25", "tfidf"):
+            raise ValueError(f"Unknown scoring method: {method}")
+        self.method = method
+        self.k1 = k1
+        self.b = b
+        self.vocabulary = {}
+        self.terms = []
+        self.idf = None
+        self.job_weights = None
+        self.average_length = DEFAULT_AVERAGE_LENGTH
+
+    def fit(self, job_descriptions, reference_resumes=None):
+        """Build the job weights. reference_resumes, if given, set BM25's average resume length."""
+        job_counts = [Counter(keywords(text)) for text in job_descriptions]
+        document_frequency = Counter(term for counts in job_counts for term in counts)
+        self.terms = sorted(document_frequency)
+        self.vocabulary = {term: index for index, term in enumerate(self.terms)}
+
+        n_jobs = len(job_counts)
+        df = np.array([document_frequency[term] for term in self.terms], dtype=np.float32)
+        if self.method == "bm25":
+            self.idf = np.log1p((n_jobs - df + 0.5) / (df + 0.5))
+        else:
+            self.idf = np.log((1 + n_jobs) / (1 + df)) + 1
+
+        counts = self._count_matrix(job_counts)
+        # Damp repetition so a keyword stuffed ten times in a posting does not dominate
+        weights = np.log1p(counts, where=counts > 0, out=np.zeros_like(counts)) * self.idf
+        if self.method == "tfidf":
+            weights = self._normalize(weights)
+        self.job_weights = weights
+
+        if reference_resumes:
+            lengths = [len(keywords(text)) for text in reference_resumes]
+            self.average_length = max(1.0, sum(lengths) / len(lengths))
+        else:
+            self.average_length = DEFAULT_AVERAGE_LENGTH
+        return self
+
+    def _count_matrix(self, term_counts):
+        matrix = np.zeros((len(term_counts), len(self.terms)), dtype=np.float32)
+        for row, counts in enumerate(term_counts):
+            for term, count in counts.items():
+                column = self.vocabulary.get(term)
+                if column is not None:
+                    matrix[row, column] = count
+        return matrix
+
+    @staticmethod
+    def _normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+    def resume_matrix(self, resume_texts):
+        """Per-resume term counts over the job vocabulary, plus total keyword counts."""
+        resume_counts = [Counter(keywords(text)) for text in resume_texts]
+        lengths = np.array([sum(counts.values()) for counts in resume_counts], dtype=np.float32)
+        return self._count_matrix(resume_counts), lengths
+
+    def score(self, resume_texts, counts=None, lengths=None):
+        """Return a (resumes x jobs) array of match scores in [0, 1]."""
+        if self.job_weights is None:
+            raise RuntimeError("ATSScorer.fit must be called before score")
+        if counts is None:
+            counts, lengths = self.resume_matrix(resume_texts)
+        if self.method == "bm25":
+            norm = self.k1 * (1 - self.b + self.b * lengths / self.average_length)
+            saturated = counts * (self.k1 + 1) / (counts + norm[:, None])
+            # A keyword mentioned once in an average-length resume scores exactly 1, so
+            # full coverage of a job's keywords is 1; extra mentions can only top it up
+            ceiling = self.job_weights.sum(axis=1)
+            scores = saturated @ self.job_weights.T
+            scores = np.divide(scores, ceiling, out=np.zeros_like(scores), where=ceiling > 0)
+            return np.minimum(scores, 1.0)
+        tfidf = self._normalize(np.log1p(counts, where=counts > 0, out=np.zeros_like(counts)) * self.idf)
+        return tfidf @ self.job_weights.T
+
+    def keyword_report(self, resume_counts, job_index, top=DEFAULT_TOP_KEYWORDS):
+        """Matched and missing job keywords, heaviest first, for one resume row of counts."""
+        weights = self.job_weights[job_index]
+        columns = np.flatnonzero(weights)
+        columns = columns[np.argsort(-weights[columns], kind="stable")]
+        present = resume_counts[columns] > 0
+        matched = [self.terms[c] for c in columns[present][:top]]
+        missing = [self.terms[c] for c in columns[~present][:top]]
+        return matched, missing
+
+    def rank(self, resume_texts, threshold=0.0, top_keywords=DEFAULT_TOP_KEYWORDS):
+        """Score every resume x job pair and return MatchResults at or above threshold, best first."""
+        counts, lengths = self.resume_matrix(resume_texts)
+        scores = self.score(resume_texts, counts, lengths)
+        resume_rows, job_columns = np.nonzero(scores >= threshold)
+        order = np.argsort(-scores[resume_rows, job_columns], kind="stable")
+        results = []
+        for i in order:
+            r, j = int(resume_rows[i]), int(job_columns[i])
+            matched, missing = self.keyword_report(counts[r], j, top_keywords)
+            results.append(MatchResult(r, j, round(float(scores[r, j]), 4), matched, missing))
+        return results
+
+
+def keyword_coverage(resume_text, job_description, method=DEFAULT_METHOD, top_keywords=DEFAULT_TOP_KEYWORDS):
+    """Score one resume (plain text or generated LaTeX) against one job description."""
+    if "\\begin{document}" in resume_text:
+        resume_text = latex_plain_text(resume_text)
+    return ATSScorer(method).fit([job_description]).rank([resume_text], top_keywords=top_keywords)[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank job descriptions by keyword match against resumes.")
+    parser.add_argument("resumes", nargs="+", help="resume PDFs, or .txt/.tex files")
+    parser.add_argument("--jobs", default="jobs", help="folder of job description .txt files")
+    parser.add_argument("--method", choices=("bm25", "tfidf"), default=DEFAULT_METHOD)
+    parser.add_argument("--threshold", type=float, default=0.0)
+    parser.add_argument("--top", type=int, default=20, help="pairs to print")
+    args = parser.parse_args()
+
+    def load(path):
+        path = Path(path)
+        if path.suffix.lower() == ".pdf":
+            from main import extract_from_pdf
+            return extract_from_pdf(path)[0] or ""
+        text = path.read_text(encoding="utf-8")
+        return latex_plain_text(text) if path.suffix.lower() == ".tex" else text
+
+    job_paths = sorted(Path(args.jobs).glob("*.txt"))
+    scorer = ATSScorer(args.method).fit([p.read_text(encoding="utf-8") for p in job_paths])
+    results = scorer.rank([load(p) for p in args.resumes], threshold=args.threshold)
+    for result in results[:args.top]:
+        print(f"{result.score:6.3f}  {Path(args.resumes[result.resume]).name}  {job_paths[result.job].name}")
+        print(f"        matched: {', '.join(result.matched)}")
+        print(f"        missing: {', '.join(result.missing)}")
+    below = len(args.resumes) * len(job_paths) - len(results)
+    if below:
+        print(f"{below} pairs scored below {args.threshold}.")
@@ -0,0 +1,289 @@
+import argparse
+import json
+import logging
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from ats_score import ATSScorer, latex_plain_text
+from jd_index import JobDescriptionIndex, cluster_job_descriptions
+from latex_compile import LatexCompileQueue
+from main import (
+    extract_from_pdf,
+    load_candidate_profile,
+    optimize_resume_with_gemini,
+    read_additional_details,
+    render_preview_pdf,
+    write_tex_file,
+)
+from pdf_pages import process_pool
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "batch_manifest.json"
+
+
+def pair_output_name(resume_path, job_desc_path):
+    """Build a filesystem-safe output name for a resume x job description pair."""
+    name = f"{Path(resume_path).stem}__{Path(job_desc_path).stem}"
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+
+
+def copy_outputs(output_folder, source_name, name):
+    """Copy the .tex, .json and PDFs written under source_name to name. Returns the copied paths."""
+    output_folder = Path(output_folder)
+    copied = []
+    for suffix in (".tex", ".json", ".pdf", ".preview.pdf"):
+        source = output_folder / f"{source_name}{suffix}"
+        if source.exists():
+            copied.append(Path(shutil.copyfile(source, output_folder / f"{name}{suffix}")))
+    return copied
+
+
+def run_batch(resume_folder, job_folder, output_folder, additional_details_path=None,
+              gemini_concurrency=4, pdf_workers=None, latex_workers=2, compile_pdf=True,
+              use_cache=True, token_budget=None, min_match=None, match_method="bm25", dedup_threshold=None):
+    """Tailor every resume in resume_folder to every job description in job_folder.
+
+    PDF extraction runs in a process pool, Gemini calls run on a thread pool capped at
+    gemini_concurrency, and pdflatex runs on its own pool so slow compiles never hold
+    up model calls. A manifest with per-pair status and timings is written to
+    output_folder and also returned.
+
+    Every pair is first given a local keyword match score against its job
+    description; with min_match set, pairs scoring below it are skipped without a
+    model call. Generated resumes are scored again to report keyword coverage.
+
+    Each resume's candidate profile is built (or loaded) once and shared by all of
+    its pairs, so per-job prompts carry the condensed profile, not the raw text.
+
+    With dedup_threshold set, job descriptions whose estimated Jaccard similarity
+    to an earlier one reaches it (reposts with trivial edits) are not generated:
+    their pairs get a copy of the earlier description's output (see jd_index.py).
+    """
+    resume_folder = Path(resume_folder)
+    job_folder = Path(job_folder)
+    output_folder = Path(output_folder)
+    output_folder.mkdir(parents=True, exist_ok=True)
+
+    resume_paths = sorted(resume_folder.glob("*.pdf"))
+    job_paths = sorted(job_folder.glob("*.txt"))
+    if not resume_paths:
+        logger.error("No resume PDFs found in '%s'.", resume_folder)
+        return None
+    if not job_paths:
+        logger.error("No job descriptions (*.txt) found in '%s'.", job_folder)
+        return None
+
+    logger.info("Batch: %d resumes x %d job descriptions = %d pairs",
+                len(resume_paths), len(job_paths), len(resume_paths) * len(job_paths))
+
+    additional_details = read_additional_details(additional_details_path)
+    job_descriptions = {}
+    for job_path in job_paths:
+        with open(job_path, "r", encoding="utf-8") as file:
+            job_descriptions[job_path] = file.read()
+
+    job_index = {job_path: i for i, job_path in enumerate(job_paths)}
+    scorer = ATSScorer(match_method).fit([job_descriptions[job_path] for job_path in job_paths])
+
+    duplicate_of = {}
+    if dedup_threshold is not None:
+        index = JobDescriptionIndex(threshold=dedup_threshold)
+        clusters = cluster_job_descriptions({str(p): job_descriptions[p] for p in job_paths}, index)
+        duplicate_of = {job_path: Path(clusters[str(job_path)]) for job_path in job_paths
+                        if clusters[str(job_path)] != str(job_path)}
+        logger.info("Dedup: %d of %d job descriptions are near-duplicates of another",
+                    len(duplicate_of), len(job_paths))
+
+    batch_start = time.perf_counter()
+    records = {}
+    records_lock = threading.Lock()
+    compile_futures = []
+
+    def new_record(resume_path, job_path):
+        record = {
+            "resume": str(resume_path),
+            "job_description": str(job_path),
+            "output_name": pair_output_name(resume_path, job_path),
+            "status": "pending",
+            "timings": {},
+        }
+        with records_lock:
+            records[(resume_path, job_path)] = record
+        return record
+
+    def use_preview_as_pdf(record):
+        record["pdf_path"] = None
+        if record.get("preview_path"):
+            pdf_path = output_folder / f"{record['output_name']}.pdf"
+            record["pdf_path"] = str(shutil.copyfile(record["preview_path"], pdf_path))
+
+    def generate_pair(record, profile, job_path):
+        resume_text, resume_structure, details = profile.prompt_inputs()
+        start = time.perf_counter()
+        optimized_resume = optimize_resume_with_gemini(
+            resume_text, resume_structure, job_descriptions[job_path], details,
+            use_cache=use_cache, token_budget=token_budget, contact=profile.contact_fields())
+        record["timings"]["generate"] = round(time.perf_counter() - start, 4)
+        if not optimized_resume:
+            record["status"] = "failed"
+            record["error"] = "generation failed"
+            return
+
+        name = record["output_name"]
+        tex_path = write_tex_file(optimized_resume, output_folder / f"{name}.tex")
+        record["tex_path"] = str(tex_path)
+
+        # Same files as process_resume: the preview has its own PDF, and stands in
+        # for {name}.pdf only when pdflatex does not produce one
+        start = time.perf_counter()
+        preview_path = output_folder / f"{name}.preview.pdf"
+        try:
+            render_preview_pdf(optimized_resume, preview_path)
+            record["preview_path"] = str(preview_path)
+        except Exception as e:
+            logger.error("Error creating PDF preview for %s: %s", name, e)
+        record["timings"]["preview"] = round(time.perf_counter() - start, 4)
+        record["status"] = "ok"
+        coverage = scorer.score([latex_plain_text(optimized_resume)])[0, job_index[job_path]]
+        record["match_score_after"] = round(float(coverage), 4)
+
+        if compile_pdf:
+            compile_futures.append((record, compile_queue.submit(tex_path, output_folder)))
+        else:
+            use_preview_as_pdf(record)
+
+    with process_pool(pdf_workers) as pdf_pool, \
+            ThreadPoolExecutor(max_workers=gemini_concurrency) as gemini_pool, \
+            LatexCompileQueue(max_workers=latex_workers) as compile_queue:
+
+        extract_futures = {}
+        for resume_path in resume_paths:
+            # Resumes are already spread across the pool, so each one extracts serially
+            future = pdf_pool.submit(extract_from_pdf, resume_path, use_cache, workers=1)
+            extract_futures[future] = (resume_path, time.perf_counter())
+
+        # Fan each resume out to every job description as soon as its text is ready
+        generate_futures = []
+        for future in as_completed(extract_futures):
+            resume_path, extract_start = extract_futures[future]
+            extract_time = round(time.perf_counter() - extract_start, 4)
+            try:
+                resume_text, resume_structure = future.result()
+            except Exception as e:
+                resume_text, resume_structure = None, None
+                logger.error("Error extracting %s: %s", resume_path, e)
+            if resume_text:
+                # One matrix product scores this resume against every job description
+                counts, lengths = scorer.resume_matrix([resume_text])
+                scores = scorer.score(None, counts, lengths)[0]
+                profile = load_candidate_profile(resume_text, resume_structure, additional_details,
+                                                 use_cache=use_cache)
+            for job_path in job_paths:
+                record = new_record(resume_path, job_path)
+                record["timings"]["extract"] = extract_time
+                if not resume_text:
+                    record["status"] = "failed"
+                    record["error"] = "text extraction failed"
+                    continue
+                j = job_index[job_path]
+                matched, missing = scorer.keyword_report(counts[0], j)
+                record.update(match_score=round(float(scores[j]), 4), matched_keywords=matched,
+                              missing_keywords=missing)
+                if min_match is not None and scores[j] < min_match:
+                    record["status"] = "skipped"
+                    continue
+                source = duplicate_of.get(job_path)
+                # Its canonical pair comes earlier in job_paths, so its status is already known
+                if source is not None and records[(resume_path, source)]["status"] != "skipped":
+                    record["duplicate_of"] = records[(resume_path, source)]["output_name"]
+                    continue
+                generate_futures.append(gemini_pool.submit(generate_pair, record, profile, job_path))
+
+        # Compile jobs are queued from inside generate_pair, so they are all known here
+        for future in as_completed(generate_futures):
+            if future.exception():
+                logger.error("Batch worker error: %s", future.exception())
+        for record, future in compile_futures:
+            result = future.result()
+            record["timings"]["compile"] = result.seconds
+            record["compiled"] = result.ok
+            record["compiled_with_format"] = result.used_format
+            if result.ok:
+                record["pdf_path"] = result.pdf_path
+            else:
+                record["compile_error"] = result.error
+                use_preview_as_pdf(record)
+
+    # Compiles have finished, so the canonical pairs' final PDFs are in place
+    for (resume_path, job_path), record in records.items():
+        if "duplicate_of" not in record:
+            continue
+        source = records[(resume_path, duplicate_of[job_path])]
+        if source["status"] != "ok":
+            record["status"] = "failed"
+            record["error"] = f"duplicate of {source['output_name']}, which failed"
+            continue
+        copied = copy_outputs(output_folder, source["output_name"], record["output_name"])
+        for path in copied:
+            kind = "preview" if path.name.endswith(".preview.pdf") else path.suffix[1:]
+            record[f"{kind}_path"] = str(path)
+        for key in ("compiled", "compiled_with_format", "compile_error"):
+            if key in source:
+                record[key] = source[key]
+        with open(output_folder / f"{record['output_name']}.tex", "r", encoding="utf-8") as file:
+            coverage = scorer.score([latex_plain_text(file.read())])[0, job_index[job_path]]
+        record["match_score_after"] = round(float(coverage), 4)
+        record["status"] = "ok"
+
+    ordered = [records[key] for key in sorted(records, key=lambda k: (str(k[0]), str(k[1])))]
+    manifest = {
+        "resumes": len(resume_paths),
+        "job_descriptions": len(job_paths),
+        "succeeded": sum(1 for r in ordered if r["status"] == "ok"),
+        "skipped": sum(1 for r in ordered if r["status"] == "skipped"),
+        "deduplicated": sum(1 for r in ordered if "duplicate_of" in r and r["status"] == "ok"),
+        "failed": sum(1 for r in ordered if r["status"] not in ("ok", "skipped")),
+        "wall_time": round(time.perf_counter() - batch_start, 4),
+        "compile_summary": compile_queue.summary(),
+        "pairs": ordered,
+    }
+    manifest_path = output_folder / MANIFEST_NAME
+    with open(manifest_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    logger.info("Batch complete: %d succeeded (%d reused from a near-duplicate), %d skipped below match "
+                "threshold, %d failed. Manifest written to %s", manifest['succeeded'], manifest['deduplicated'],
+                manifest['skipped'], manifest['failed'], manifest_path)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tailor a folder of resumes to a folder of job descriptions.")
+    parser.add_argument("--resumes", default="resume", help="folder of resume PDFs")
+    parser.add_argument("--jobs", default="jobs", help="folder of job description .txt files")
+    parser.add_argument("--output", default="newresume", help="output folder")
+    parser.add_argument("--additional-details", default="additional_details.txt")
+    parser.add_argument("--gemini-concurrency", type=int, default=4)
+    parser.add_argument("--pdf-workers", type=int, default=None)
+    parser.add_argument("--latex-workers", type=int, default=2)
+    parser.add_argument("--no-compile", action="store_true", help="skip the pdflatex step")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the extraction and response caches")
+    parser.add_argument("--token-budget", type=int, default=None,
+                        help="pack resume and additional details into this many input tokens")
+    parser.add_argument("--min-match", type=float, default=None,
+                        help="skip pairs whose local keyword match score (0-1) is below this")
+    parser.add_argument("--match-method", choices=("bm25", "tfidf"), default="bm25")
+    parser.add_argument("--dedup-threshold", type=float, default=None,
+                        help="reuse one generation for job descriptions at least this similar (0-1), e.g. 0.8")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    run_batch(args.resumes, args.jobs, args.output, args.additional_details,
+              gemini_concurrency=args.gemini_concurrency, pdf_workers=args.pdf_workers,
+              latex_workers=args.latex_workers, compile_pdf=not args.no_compile,
+              use_cache=not args.no_cache, token_budget=args.token_budget,
+              min_match=args.min_match, match_method=args.match_method, dedup_threshold=args.dedup_threshold)
@@ -0,0 +1,114 @@
+"""Cold-start benchmark: interpreter startup plus imports for each main.py entry point.
+
+Usage: python benchmarks/bench_import_time.py [--runs 10] [--max-ms 400] [--json results.json]
+
+Each target runs in a fresh interpreter. The report shows the median wall time per
+target and the slowest imports under `python -X importtime`. The run fails when a
+heavy dependency is loaded by a path that should not need it, or when a target's
+median exceeds --max-ms.
+"""
+import argparse
+import json
+import platform
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_pipeline import git_revision, percentiles  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Label -> interpreter arguments, run from the repository root
+TARGETS = {
+    "python": ["-c", "pass"],
+    "import main": ["-c", "import main"],
+    "main.py --help": ["main.py", "--help"],
+    "main.py render": ["main.py", "render", "--help"],
+    "import batch": ["-c", "import batch"],
+    "import server": ["-c", "import server"],
+}
+# Dependencies only the named stages need; importing main must load none of them
+HEAVY_MODULES = ("google.generativeai", "PyPDF2", "fpdf", "numpy", "flask", "urllib.request")
+# Entry modules whose own imports are what the report should break down
+ENTRY_MODULES = {"main", "batch", "server"}
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_target(arguments, importtime=False):
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []), *arguments]
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(arguments)} failed:\n{result.stderr}")
+    return elapsed, result.stderr
+
+
+def slowest_imports(stderr, top):
+    """Slowest imports by cumulative microseconds, from -X importtime output.
+
+    Lists top-level imports, plus the direct imports of an entry module instead of
+    the entry module itself. Interpreter startup (site) is left out.
+    """
+    imports = []
+    for match in IMPORTTIME_LINE.finditer(stderr):
+        _, cumulative, indent, name = match.groups()
+        # One leading space at the top level, two more per nesting level
+        if len(indent) == 1 and name not in ENTRY_MODULES | {"site"} or len(indent) == 3:
+            imports.append((name, int(cumulative)))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:top]
+
+
+def loaded_heavy_modules(module):
+    code = (f"import json, sys\nimport {module}\n"
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per target")
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to list per target")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail when a target's median exceeds this")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = {"revision": git_revision(), "python": platform.python_version(), "runs": args.runs, "targets": {}}
+    failures = []
+    for label, arguments in TARGETS.items():
+        samples = [run_target(arguments)[0] for _ in range(args.runs)]
+        _, stderr = run_target(arguments, importtime=True)
+        stats = percentiles(samples)
+        results["targets"][label] = {"seconds": stats, "slowest_imports_us": slowest_imports(stderr, args.top)}
+        if args.max_ms is not None and label != "python" and stats["p50"] * 1000 > args.max_ms:
+            failures.append(f"{label}: median {stats['p50'] * 1000:.1f} ms exceeds {args.max_ms} ms")
+
+    heavy = loaded_heavy_modules("main")
+    results["main_heavy_imports"] = heavy
+    if heavy:
+        failures.append(f"import main loaded {', '.join(heavy)}")
+
+    baseline = results["targets"]["python"]["seconds"]["p50"]
+    print(f"{'target':>16} {'p50 ms':>10} {'max ms':>10} {'over python':>12}")
+    for label, target in results["targets"].items():
+        stats = target["seconds"]
+        print(f"{label:>16} {stats['p50'] * 1000:10.1f} {stats['max'] * 1000:10.1f} "
+              f"{(stats['p50'] - baseline) * 1000:12.1f}")
+    for label, target in results["targets"].items():
+        if label != "python":
+            print(f"{label}: " + ", ".join(f"{name} {us / 1000:.1f}ms" for name, us in target["slowest_imports_us"]))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Compare the single-pass LaTeX parser against the old per-section regex passes.
+
+Usage: python benchmarks/bench_latex_parser.py [--sections 40] [--entries 50] [--repeat 5]
+"""
+import argparse
+import json
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from latex_parser import Item, parse_resume  # noqa: E402
+from latex_template import RESUME_PREAMBLE  # noqa: E402
+
+
+def expected_items(entry):
+    """(LaTeX, plain text) of the bullets generate_document writes under entry."""
+    return [(f"Reduced latency by \\textbf{{{entry}\\%}} using \\emph{{Rust}}",
+             f"Reduced latency by {entry}% using Rust"),
+            (f"Shipped feature {entry} to production", f"Shipped feature {entry} to production")]
+
+
+def generate_document(sections, entries):
+    """Template-conformant resume with nested braces inside bullets, as models emit them."""
+    parts = [RESUME_PREAMBLE, "\\begin{document}", "\\begin{center}",
+             "    \\textbf{\\Huge \\scshape Jane Doe} \\\\ \\vspace{1pt}",
+             "    \\small EMAIL $|$ \\href{mailto:jane@example.com}{\\underline{jane@example.com}}",
+             "\\end{center}"]
+    for s in range(sections):
+        parts.append(f"\\section{{Experience {s}}}")
+        parts.append("  \\resumeSubHeadingListStart")
+        for e in range(entries):
+            parts.append(f"    \\resumeSubheading{{Engineer {e}}}{{2020 -- 2022}}{{Company {e}}}{{Remote}}")
+            parts.append("      \\resumeItemListStart")
+            for latex, _ in expected_items(e):
+                parts.append(f"        \\resumeItem{{{latex}}}")
+            parts.append("      \\resumeItemListEnd")
+        parts.append("  \\resumeSubHeadingListEnd")
+    parts.append("\\end{document}")
+    return "\n".join(parts)
+
+
+def legacy_regex_parse(content):
+    """The extraction passes create_pdf_resume used before the single-pass parser."""
+    items = []
+    for match in re.finditer(r'\\section{([^}]+)}(.*?)(?=\\section{|\\end{document})', content, re.DOTALL):
+        section_content = match.group(2)
+        for m in re.finditer(r'\\resumeSubheading\s*{([^}]*)}{([^}]*)}{([^}]*)}{([^}]*)}', section_content):
+            items.append(("subheading", m.groups()))
+        for m in re.finditer(r'\\resumeProjectHeading\s*{([^}]*)}{([^}]*)}', section_content):
+            items.append(("project", m.groups()))
+        for m in re.finditer(r'\\resumeItem{([^}]*)}', section_content):
+            items.append(("item", m.group(1)))
+        for m in re.finditer(r'\\textbf{([^}]*)}{{: ([^}\\]*)}}', section_content):
+            items.append(("skill", m.groups()))
+    return items
+
+
+def measure(function, content, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(content)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    function(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=40)
+    parser.add_argument("--entries", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    content = generate_document(args.sections, args.entries)
+    expected = [pair for _ in range(args.sections) for e in range(args.entries) for pair in expected_items(e)]
+
+    legacy, legacy_time, legacy_peak = measure(legacy_regex_parse, content, args.repeat)
+    document, parser_time, parser_peak = measure(parse_resume, content, args.repeat)
+
+    # An item is intact when it matches the bullet written at its position; the
+    # legacy [^}]* stops at the first nested brace, cutting \textbf bullets short
+    legacy_items = [value for kind, value in legacy if kind == "item"]
+    legacy_complete = sum(1 for value, (latex, _) in zip(legacy_items, expected) if value == latex)
+    parser_items = [entry.text for section in document.sections for entry in section.entries
+                    if isinstance(entry, Item)]
+    parser_complete = sum(1 for text, (_, plain) in zip(parser_items, expected) if text == plain)
+
+    results = {
+        "document_chars": len(content),
+        "expected_items": len(expected),
+        "legacy_regex": {"seconds": round(legacy_time, 6), "peak_bytes": legacy_peak,
+                         "items_found": len(legacy_items), "items_intact": legacy_complete},
+        "single_pass": {"seconds": round(parser_time, 6), "peak_bytes": parser_peak,
+                        "items_found": len(parser_items), "items_intact": parser_complete},
+        # What the correct parse costs over the regex: >1 means single_pass is slower
+        "cost_vs_legacy": {"time": round(parser_time / legacy_time, 2),
+                           "peak_memory": round(parser_peak / legacy_peak, 2)},
+    }
+    print(f"Document: {len(content):,} chars, {len(expected):,} bullet items")
+    for label in ("legacy_regex", "single_pass"):
+        r = results[label]
+        print(f"{label:>13}: {r['seconds'] * 1000:9.2f} ms  peak {r['peak_bytes'] / 1024:9.1f} KiB  "
+              f"items intact {r['items_intact']:,}/{len(expected):,}")
+    cost = results["cost_vs_legacy"]
+    print(f"  single_pass costs {cost['time']:.1f}x the time and {cost['peak_memory']:.1f}x the peak memory "
+          f"of legacy_regex")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
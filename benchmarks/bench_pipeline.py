@@ -0,0 +1,266 @@
+"""End-to-end pipeline benchmark on synthetic resumes against a fake Gemini backend.
+
+Usage: python benchmarks/bench_pipeline.py [--resumes 5] [--pages 2] [--jobs 3] [--latency 0.5]
+                                           [--concurrency 1] [--compile] [--json results.json]
+
+Every stage runs with caches disabled, so repeated runs measure the same work.
+Compare the JSON written by two commits to spot regressions.
+"""
+import argparse
+import contextlib
+import json
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fpdf import FPDF  # noqa: E402
+
+from gemini_client import AsyncGeminiClient, FakeTransport, set_default_client  # noqa: E402
+from latex_template import RESUME_PREAMBLE  # noqa: E402
+from main import (  # noqa: E402
+    GEMINI_MODEL_NAME,
+    GENERATION_CONFIG,
+    SAFETY_SETTINGS,
+    compile_latex,
+    create_pdf_resume,
+    extract_from_pdf,
+    optimize_resume_with_gemini,
+    write_tex_file,
+)
+
+STAGES = ("extract", "generate", "write_tex", "preview", "compile")
+SKILLS = ["Python", "C++", "Rust", "SQL", "Kubernetes", "Terraform", "PyTorch", "Spark", "Kafka", "React",
+          "Verilog", "MATLAB", "LabVIEW", "Six Sigma", "FMEA", "SPC", "DOE", "Yield analysis"]
+VERBS = ["Led", "Built", "Reduced", "Designed", "Automated", "Shipped", "Scaled", "Migrated", "Characterized"]
+
+
+def generate_resume_pdf(path, pages, rng):
+    """Write a resume-like PDF of roughly `pages` pages with the usual section headers."""
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, f"Candidate {rng.randint(1000, 9999)}", ln=True)
+    pdf.set_font("Arial", "", 10)
+    pdf.cell(0, 6, "candidate@example.com | linkedin.com/in/candidate | github.com/candidate", ln=True)
+    pdf.ln(4)
+
+    def heading(title):
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(0, 8, title, ln=True)
+        pdf.set_font("Arial", "", 10)
+
+    heading("SUMMARY")
+    pdf.multi_cell(0, 5, "Engineer with a track record in " + ", ".join(rng.sample(SKILLS, 4)) + ".")
+    heading("EXPERIENCE")
+    # Each role is about a sixth of a page
+    for role in range(pages * 6):
+        pdf.set_font("Arial", "B", 10)
+        pdf.cell(0, 6, f"Engineer {role} - Company {rng.randint(1, 500)}    2018 - 2022", ln=True)
+        pdf.set_font("Arial", "", 10)
+        for _ in range(3):
+            pdf.multi_cell(0, 5, f"- {rng.choice(VERBS)} {rng.choice(SKILLS)} pipeline, improving throughput by "
+                                 f"{rng.randint(5, 80)}% across {rng.randint(2, 40)} teams")
+    heading("EDUCATION")
+    pdf.multi_cell(0, 5, "B.S. Electrical Engineering, State University, 2016")
+    heading("SKILLS")
+    pdf.multi_cell(0, 5, ", ".join(SKILLS))
+    pdf.output(str(path))
+
+
+def generate_job_description(rng):
+    wanted = rng.sample(SKILLS, 6)
+    return "\n".join([
+        f"Senior Engineer #{rng.randint(1, 999)}",
+        "Responsibilities:",
+        *(f"- Own {skill} systems end to end" for skill in wanted[:3]),
+        "Requirements:",
+        *(f"- {rng.randint(2, 8)}+ years of {skill}" for skill in wanted[3:]),
+    ])
+
+
+def fake_resume_latex(prompt):
+    """Template-conformant LaTeX whose size tracks the prompt, deterministic per prompt."""
+    rng = random.Random(prompt)
+    entries = max(2, min(12, len(prompt) // 2000))
+    body = ["\\begin{document}", "\\begin{center}",
+            "    \\textbf{\\Huge \\scshape Candidate} \\\\ \\vspace{1pt}",
+            "    \\small \\href{mailto:candidate@example.com}{\\underline{candidate@example.com}}",
+            "\\end{center}", "\\section{Experience}", "  \\resumeSubHeadingListStart"]
+    for e in range(entries):
+        body.append(f"    \\resumeSubheading{{Engineer {e}}}{{2018 -- 2022}}{{Company {e}}}{{Remote}}")
+        body.append("      \\resumeItemListStart")
+        for _ in range(3):
+            body.append(f"        \\resumeItem{{{rng.choice(VERBS)} \\textbf{{{rng.choice(SKILLS)}}} "
+                        f"work, improving throughput by {rng.randint(5, 80)}\\%}}")
+        body.append("      \\resumeItemListEnd")
+    body += ["  \\resumeSubHeadingListEnd", "\\section{Technical Skills}",
+             " \\begin{itemize}[leftmargin=0.15in, label={}]",
+             f"    \\small{{\\item{{\\textbf{{Languages}}{{: {', '.join(SKILLS[:6])}}}}}}}",
+             " \\end{itemize}", "\\section{Projects}", "  \\resumeSubHeadingListStart",
+             f"    \\resumeProjectHeading{{\\textbf{{{rng.choice(SKILLS)} toolkit}}}}{{2021}}",
+             "  \\resumeSubHeadingListEnd", "\\section{Education}", "  \\resumeSubHeadingListStart",
+             "    \\resumeSubheading{State University}{Remote}{B.S. Electrical Engineering}{2016}",
+             "  \\resumeSubHeadingListEnd", "\\end{document}"]
+    return RESUME_PREAMBLE + "\n" + "\n".join(body)
+
+
+def percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+    return {"count": len(ordered), "mean": round(statistics.fmean(ordered), 6), "p50": round(pick(0.5), 6),
+            "p90": round(pick(0.9), 6), "p99": round(pick(0.99), 6), "max": round(ordered[-1], 6)}
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process and of waited-for children (pdflatex)."""
+    if resource is None:
+        return None, None
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.samples[stage].append(elapsed)
+
+
+def run_pair(timer, resume_path, job_description, output_folder, name, compile_pdf):
+    """Run one resume x job pair; returns the stage that failed, or None on success."""
+    # extract_from_pdf analyzes the structure too, so "extract" covers both
+    with timer.time("extract"):
+        resume_text, structure = extract_from_pdf(resume_path, use_cache=False)
+    if not resume_text:
+        return "extract"
+    with timer.time("generate"):
+        optimized = optimize_resume_with_gemini(resume_text, structure, job_description, "", use_cache=False)
+    if not optimized:
+        return "generate"
+    with timer.time("write_tex"):
+        tex_path = write_tex_file(optimized, output_folder / f"{name}.tex")
+    with timer.time("preview"):
+        previewed = create_pdf_resume(optimized, output_folder / f"{name}.pdf")
+    if not previewed:
+        return "preview"
+    if compile_pdf:
+        with timer.time("compile"):
+            compiled = compile_latex(tex_path, output_folder)
+        if not compiled:
+            return "compile"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resumes", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=2, help="pages per synthetic resume")
+    parser.add_argument("--jobs", type=int, default=3, help="job descriptions; every resume runs against each")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake model latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=1, help="pairs processed at once")
+    parser.add_argument("--compile", action="store_true", help="also run pdflatex when it is installed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    compile_pdf = args.compile and shutil.which("pdflatex") is not None
+    if args.compile and not compile_pdf:
+        print("pdflatex not found, skipping the compile stage")
+
+    transport = FakeTransport(fake_resume_latex, latency=args.latency)
+    set_default_client(AsyncGeminiClient(transport, GEMINI_MODEL_NAME, GENERATION_CONFIG, SAFETY_SETTINGS,
+                                         requests_per_minute=1_000_000, tokens_per_minute=10**12,
+                                         max_concurrency=max(1, args.concurrency)))
+
+    rng = random.Random(args.seed)
+    timer = StageTimer()
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+        resumes = []
+        for r in range(args.resumes):
+            path = work_dir / f"resume_{r}.pdf"
+            generate_resume_pdf(path, args.pages, rng)
+            resumes.append(path)
+        job_descriptions = [generate_job_description(rng) for _ in range(args.jobs)]
+        pairs = [(resume, jd, f"pair_{r}_{j}") for r, resume in enumerate(resumes)
+                 for j, jd in enumerate(job_descriptions)]
+
+        # Pipeline progress goes to logging, which stays quiet below WARNING unless configured
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            outcomes = list(pool.map(lambda pair: run_pair(timer, pair[0], pair[1], work_dir, pair[2], compile_pdf),
+                                     pairs))
+        wall = time.perf_counter() - start
+
+    peak_self, peak_children = peak_rss_bytes()
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "config": vars(args) | {"compile": compile_pdf},
+        "pairs": len(pairs),
+        "succeeded": outcomes.count(None),
+        "failed": dict(Counter(stage for stage in outcomes if stage)),
+        "wall_seconds": round(wall, 4),
+        "throughput_pairs_per_second": round(len(pairs) / wall, 4) if wall else None,
+        "peak_rss_bytes": peak_self,
+        "peak_child_rss_bytes": peak_children,
+        "model_calls": transport.calls,
+        "stages": {stage: percentiles(samples) for stage, samples in timer.samples.items() if samples},
+    }
+
+    print(f"{results['succeeded']}/{len(pairs)} pairs in {wall:.2f}s "
+          f"({results['throughput_pairs_per_second']} pairs/s), peak RSS "
+          f"{(peak_self or 0) / 2**20:.1f} MiB")
+    if results["failed"]:
+        print("failed at: " + ", ".join(f"{stage} x{count}" for stage, count in results["failed"].items()))
+    print(f"{'stage':>10} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for stage, stats in results["stages"].items():
+        print(f"{stage:>10} " + " ".join(f"{stats[q] * 1000:10.2f}" for q in ("p50", "p90", "p99", "max")))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
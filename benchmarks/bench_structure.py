@@ -0,0 +1,90 @@
+"""Compare the single-scan analyze_resume_structure against the old per-section scans.
+
+Usage: python benchmarks/bench_structure.py [--pages 200] [--repeat 5]
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from main import analyze_resume_structure  # noqa: E402
+
+LEGACY_SECTIONS = ["EXPERIENCE", "EDUCATION", "SKILLS", "PROJECTS", "CERTIFICATIONS",
+                   "SUMMARY", "OBJECTIVE", "CONTACT", "REFERENCES", "PUBLICATIONS"]
+
+
+def legacy_analyze(text):
+    """The previous implementation: one regex scan per section plus a full findall."""
+    structure = {"sections": [], "has_bullet_points": False, "has_tables": False, "indentation_style": "unknown"}
+    for section in LEGACY_SECTIONS:
+        if re.search(r'(?i)\b' + section + r'\b', text):
+            structure["sections"].append(section)
+    if re.search(r'[•●■◦○◘►▪▫▸▹◆]', text):
+        structure["has_bullet_points"] = True
+    table_pattern = re.findall(r'(.+)\n(.+)\n(.+)', text)
+    if table_pattern and len(set(len(line.split()) for line in table_pattern[0])) <= 2:
+        structure["has_tables"] = True
+    if re.search(r'\n\s{2,}', text):
+        structure["indentation_style"] = "spaces"
+    elif re.search(r'\n\t', text):
+        structure["indentation_style"] = "tabs"
+    return structure
+
+
+def generate_text(pages):
+    """Resume-like text of roughly pages x 3 KB, with headers spread throughout."""
+    page = "\n".join([
+        "Jane Doe | jane@example.com | linkedin.com/in/jane",
+        "Work History",
+        *[f"Senior engineer at company {i}, built distributed systems in Python and Go" for i in range(12)],
+        "Education",
+        "B.Tech Computer Science, 2016 - 2020",
+        "Technical Skills",
+        "Python, Go, Rust, Kubernetes, PostgreSQL, Terraform",
+        "Publications",
+        *[f"Paper {i}: Scalable indexing for large corpora, Proceedings {2010 + i}" for i in range(12)],
+    ])
+    return "\n".join(page for _ in range(pages))
+
+
+def best_time(function, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    text = generate_text(args.pages)
+    legacy_time = best_time(legacy_analyze, text, args.repeat)
+    single_time = best_time(analyze_resume_structure, text, args.repeat)
+    spans = analyze_resume_structure(text)["section_spans"]
+
+    results = {
+        "text_chars": len(text),
+        "legacy_seconds": round(legacy_time, 6),
+        "single_scan_seconds": round(single_time, 6),
+        "section_spans": len(spans),
+    }
+    print(f"Text: {len(text):,} chars")
+    print(f"  legacy (10 scans + findall): {legacy_time * 1000:8.2f} ms, names only")
+    print(f"  single scan:                 {single_time * 1000:8.2f} ms, {len(spans):,} section spans")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from gemini_client import estimate_tokens
+
+DEFAULT_PROFILE_DIR = Path(os.environ.get("RESUME_CACHE_DIR", ".cache")) / "profiles"
+
+# Bump whenever build_profile output changes, so stale profiles are rebuilt
+PROFILE_VERSION = 3
+
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+')
+PHONE_PATTERN = re.compile(r'(?<![\w+])(?:\+\d{1,3}[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}(?!\w)')
+LINKEDIN_PATTERN = re.compile(r'(?:https?://)?(?:www\.)?(linkedin\.com/in/[a-zA-Z0-9_-]+)/?')
+GITHUB_PATTERN = re.compile(r'(?:https?://)?(?:www\.)?(github\.com/[a-zA-Z0-9_-]+)/?')
+NAME_PATTERN = re.compile(r"[A-Za-z][A-Za-z .'-]*")
+BULLET_PATTERN = re.compile(r'^[•●■◦○◘►▪▫▸▹◆*·-]+\s*')
+CONTACT_SEPARATORS = " \t|•·,;:-"
+SKILL_SEPARATORS = re.compile(r'\s*[,;|•·]\s*')
+# A line ending in one of these finished a clause or list item, so the next line is not its wrap
+CLAUSE_ENDINGS = ".,;:|•·!?"
+MAX_SKILL_CHARS = 40
+
+# Placeholders the prompt templates fall back to when a contact field is missing
+CONTACT_PLACEHOLDERS = {
+    "name": "Name",
+    "email": "email@example.com",
+    "linkedin": "linkedin.com/in/username",
+    "github": "github.com/username",
+}
+
+
+@dataclass
+class CandidateProfile:
+    """Everything per-job generation needs from one resume plus additional details.
+
+    Built once per (resume text, additional details) pair and persisted, so tailoring
+    one candidate to many job descriptions reuses it instead of re-deriving contact
+    details, sections and skills for every job. fact_sheet is the resume condensed
+    to its content lines under canonical section headers; structure describes
+    fact_sheet in the same shape analyze_resume_structure returns.
+
+    The saving is modest: typically 3-5% of a request's tokens, since most of a
+    resume is content that has to be sent anyway.
+    """
+
+    key: str
+    contact: dict
+    sections: list
+    skills: list
+    fact_sheet: str
+    details: str
+    structure: dict
+    source_tokens: int = 0
+    profile_tokens: int = 0
+    created: float = field(default_factory=time.time)
+
+    def contact_fields(self):
+        """(name, email, linkedin, github) for the prompt templates, with placeholders."""
+        return tuple(self.contact.get(name) or placeholder for name, placeholder in CONTACT_PLACEHOLDERS.items())
+
+    def prompt_inputs(self):
+        """(resume_text, resume_structure, additional_details) to pass to the optimize_* functions."""
+        return self.fact_sheet, self.structure, self.details
+
+    @property
+    def tokens_saved(self):
+        return self.source_tokens - self.profile_tokens
+
+
+def profile_key(resume_text, additional_details, resume_structure=None, extractor_version=None):
+    """Store key for a profile: changes with the text, the section spans found in it and the extractor."""
+    spans = [(span["name"], span["start"], span["end"])
+             for span in (resume_structure or {}).get("section_spans") or []]
+    digest = hashlib.sha256()
+    for part in (resume_text, additional_details or "", json.dumps(spans), str(extractor_version)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return f"{digest.hexdigest()}-v{PROFILE_VERSION}"
+
+
+def find_contact(resume_text):
+    """Normalized contact details from resume text; fields not found are None."""
+    first_line = next((line.strip() for line in resume_text.splitlines() if line.strip()), "")
+    name_match = NAME_PATTERN.match(first_line)
+    email_match = EMAIL_PATTERN.search(resume_text)
+    phone_match = PHONE_PATTERN.search(resume_text)
+    linkedin_match = LINKEDIN_PATTERN.search(resume_text)
+    github_match = GITHUB_PATTERN.search(resume_text)
+    return {
+        "name": " ".join(name_match.group().split()) if name_match else None,
+        "email": email_match.group().lower() if email_match else None,
+        "phone": " ".join(phone_match.group().split()) if phone_match else None,
+        "linkedin": linkedin_match.group(1).lower() if linkedin_match else None,
+        "github": github_match.group(1).lower() if github_match else None,
+    }
+
+
+def _is_contact_line(line):
+    rest = line
+    for pattern in (EMAIL_PATTERN, PHONE_PATTERN, LINKEDIN_PATTERN, GITHUB_PATTERN):
+        rest = pattern.sub("", rest)
+    return not rest.strip(CONTACT_SEPARATORS) and rest != line
+
+
+def _continues(previous, line):
+    """True when line looks like the wrapped rest of previous rather than a line of its own."""
+    first_word = line.split(" ", 1)[0]
+    # "iOS" or "jQuery" start lower case but are names, not the middle of a sentence
+    return first_word.islower() and not previous.endswith(tuple(CLAUSE_ENDINGS))
+
+
+def condense_lines(lines, join_wrapped=True):
+    """Collapse whitespace, normalize bullets, join wrapped lines and drop blank lines.
+
+    PDF extraction splits sentences at the page width; a lower-case line continues
+    the one before it unless that one ended a clause or list item. Pass
+    join_wrapped=False for lists such as skills, where every line stands alone.
+    """
+    condensed = []
+    for raw in lines:
+        line = " ".join(raw.split())
+        if not line:
+            continue
+        bullet = BULLET_PATTERN.match(line)
+        if bullet:
+            line = "- " + line[bullet.end():]
+        elif join_wrapped and condensed and _continues(condensed[-1], line):
+            condensed[-1] += " " + line
+            continue
+        condensed.append(line)
+    return condensed
+
+
+def skill_inventory(lines):
+    """Individual skills from the lines of a skills section, in order, without duplicates."""
+    skills = []
+    seen = set()
+    for line in lines:
+        line = BULLET_PATTERN.sub("", line.strip())
+        if ":" in line:
+            line = line.split(":", 1)[1]
+        for skill in SKILL_SEPARATORS.split(line):
+            skill = skill.strip(" .")
+            if skill and len(skill) <= MAX_SKILL_CHARS and skill.lower() not in seen:
+                seen.add(skill.lower())
+                skills.append(skill)
+    return skills
+
+
+def _segment(resume_text, resume_structure):
+    """(header lines, [(section name, body lines)]) from the extracted section spans."""
+    spans = (resume_structure or {}).get("section_spans") or []
+    if not spans:
+        return resume_text.splitlines(), []
+    header = resume_text[:spans[0]["start"]].splitlines()
+    sections = []
+    for span in spans:
+        lines = resume_text[span["start"]:span["end"]].splitlines()
+        # The first line is the header itself, written back in canonical form
+        sections.append((span["name"], lines[1:]))
+    return header, sections
+
+
+def _condense_details(additional_details):
+    """Condense additional details paragraph by paragraph, keeping the blank lines between them."""
+    paragraphs = re.split(r'\n\s*\n', additional_details or "")
+    return "\n\n".join("\n".join(lines) for lines in map(condense_lines, (p.splitlines() for p in paragraphs))
+                       if lines)
+
+
+def build_profile(resume_text, resume_structure, additional_details="", extractor_version=None):
+    """Build the CandidateProfile for one resume (as extracted) and its additional details.
+
+    extractor_version is the version of the extractor that produced resume_text and
+    resume_structure; it is part of the profile key.
+    """
+    resume_structure = resume_structure or {}
+    contact = find_contact(resume_text)
+    contact_values = {value.lower() for value in contact.values() if value}
+    header, raw_sections = _segment(resume_text, resume_structure)
+
+    # Contact details travel separately in the profile, so only other header lines stay.
+    # The prompt templates have no slot for a phone number, so it goes back in as a line
+    header_lines = condense_lines(line for line in header
+                                  if line.strip().lower() not in contact_values and not _is_contact_line(line))
+    if contact["phone"]:
+        header_lines.insert(0, f"Phone: {contact['phone']}")
+    parts = ["\n".join(header_lines) + "\n"] if header_lines else []
+    offset = len(parts[0]) if parts else 0
+    line_number = len(header_lines) + 1
+    sections, spans, skill_lines = [], [], []
+    for name, body in raw_sections:
+        lines = condense_lines(body, join_wrapped=name != "SKILLS")
+        if name == "SKILLS":
+            skill_lines.extend(lines)
+        sections.append({"name": name, "lines": lines})
+        text = "\n".join([name, *lines]) + "\n"
+        spans.append({"name": name, "header": name, "start": offset, "end": offset + len(text),
+                      "line_start": line_number, "line_end": line_number + len(lines)})
+        parts.append(text)
+        offset += len(text)
+        line_number += len(lines) + 1
+    fact_sheet = "".join(parts)
+    details = _condense_details(additional_details)
+
+    structure = {
+        "sections": list(resume_structure.get("sections", [])),
+        "section_spans": spans,
+        # Formatting hints describe the original resume, not the condensed sheet
+        "has_bullet_points": resume_structure.get("has_bullet_points", False),
+        "has_tables": resume_structure.get("has_tables", False),
+        "indentation_style": resume_structure.get("indentation_style", "unknown"),
+    }
+    source_tokens = estimate_tokens(resume_text) + (estimate_tokens(additional_details) if additional_details else 0)
+    profile_tokens = estimate_tokens(fact_sheet) + (estimate_tokens(details) if details else 0)
+    key = profile_key(resume_text, additional_details, resume_structure, extractor_version)
+    return CandidateProfile(key, contact, sections,
+                            skill_inventory(skill_lines),
+                            fact_sheet, details, structure, source_tokens, profile_tokens)
+
+
+class ProfileStore:
+    """Directory of persisted CandidateProfiles, one JSON file per profile key."""
+
+    def __init__(self, profile_dir=DEFAULT_PROFILE_DIR):
+        self.profile_dir = Path(profile_dir)
+
+    def _path(self, key):
+        return self.profile_dir / f"{key}.json"
+
+    def get(self, key):
+        """Return the CandidateProfile stored under key, or None."""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as file:
+                return CandidateProfile(**json.load(file))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def put(self, profile):
+        path = self._path(profile.key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write atomically so concurrent runs never read a partial profile
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(asdict(profile), file, indent=2)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and print the candidate profile for a resume.")
+    parser.add_argument("resume", help="resume PDF")
+    parser.add_argument("--additional-details", default="additional_details.txt")
+    parser.add_argument("--no-cache", action="store_true", help="rebuild instead of reading a stored profile")
+    args = parser.parse_args()
+
+    from main import extract_from_pdf, load_candidate_profile, read_additional_details
+    resume_text, resume_structure = extract_from_pdf(args.resume, use_cache=not args.no_cache)
+    if not resume_text:
+        raise SystemExit(1)
+    profile = load_candidate_profile(resume_text, resume_structure, read_additional_details(args.additional_details),
+                                     use_cache=not args.no_cache)
+    print(json.dumps(asdict(profile), indent=2))
+    print(f"{profile.profile_tokens}/{profile.source_tokens} tokens ({profile.tokens_saved} saved per job)")
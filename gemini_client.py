@@ -0,0 +1,504 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.error
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from telemetry import span
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: rate limiting and transient server-side failures
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# How often a call waiting for a concurrency slot checks again
+SLOT_POLL_SECONDS = 0.05
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token) used for rate limiting."""
+    return max(1, len(text) // 4)
+
+
+@dataclass
+class GenerationResult:
+    text: str
+    prompt_tokens: int = None
+    output_tokens: int = None
+    retries: int = 0
+
+
+class TransportError(Exception):
+    """Error raised by a transport, carrying the HTTP status when there is one."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def error_status(exc):
+    """Best-effort HTTP status for an exception raised by any transport."""
+    for attr in ("status", "code", "status_code"):
+        value = getattr(exc, attr, None)
+        if callable(value):
+            try:
+                value = value()
+            except Exception:
+                value = None
+        # google.api_core exceptions expose the HTTP status as an int; grpc codes are enums
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_retryable(exc):
+    if isinstance(exc, urllib.error.HTTPError):
+        return exc.code in RETRYABLE_STATUS_CODES
+    # URLError covers DNS failures and refused or reset connections, before any HTTP status
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError, urllib.error.URLError)):
+        return True
+    return error_status(exc) in RETRYABLE_STATUS_CODES
+
+
+async def iterate_in_thread(make_iterator):
+    """Drive a blocking iterator on a worker thread and yield its items asynchronously.
+
+    When the consumer stops early the worker is told to stop at the next item, which
+    drops the underlying stream instead of reading it to the end.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def worker():
+        try:
+            for item in make_iterator():
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = await queue.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+class TokenBucket:
+    """Thread-safe token bucket that refills continuously up to its capacity.
+
+    The level may go negative when a request turns out to cost more than was
+    reserved up front; later callers then wait until the debt is repaid.
+    """
+
+    def __init__(self, capacity, period=60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.level = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        """Take amount from the bucket and return how long to wait before it is covered."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.level -= amount
+            if self.level >= 0:
+                return 0.0
+            return -self.level / self.rate
+
+    def charge(self, amount):
+        """Adjust the bucket after the fact (negative amounts refund)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level - amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits shared across threads and event loops."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    async def acquire(self, tokens):
+        delay = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class GenaiTransport:
+    """Transport backed by the google-generativeai SDK."""
+
+    def __init__(self, api_key):
+        import google.generativeai as genai
+
+        self._genai = genai
+        genai.configure(api_key=api_key)
+        self._models = {}
+
+    def _model(self, model_name, generation_config):
+        key = (model_name, json.dumps(generation_config, sort_keys=True))
+        model = self._models.get(key)
+        if model is None:
+            model = self._genai.GenerativeModel(model_name, generation_config=generation_config)
+            self._models[key] = model
+        return model
+
+    async def generate(self, prompt, model_name, generation_config, safety_settings):
+        model = self._model(model_name, generation_config)
+        # The SDK's async client binds to the first event loop it sees, so run the
+        # blocking call in a worker thread to stay usable from any loop
+        response = await asyncio.to_thread(model.generate_content, prompt, safety_settings=safety_settings)
+        usage = getattr(response, "usage_metadata", None)
+        return GenerationResult(
+            text=response.text,
+            prompt_tokens=getattr(usage, "prompt_token_count", None),
+            output_tokens=getattr(usage, "candidates_token_count", None),
+        )
+
+    async def stream(self, prompt, model_name, generation_config, safety_settings):
+        """Yield response text chunks as the model produces them."""
+        model = self._model(model_name, generation_config)
+
+        def chunks():
+            response = model.generate_content(prompt, safety_settings=safety_settings, stream=True)
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+
+        async for text in iterate_in_thread(chunks):
+            yield text
+
+
+class HttpTransport:
+    """Transport speaking the Gemini REST generateContent protocol.
+
+    Point base_url at a local stand-in server to exercise the full client, rate
+    limiter and retry path without touching the real API.
+    """
+
+    def __init__(self, base_url="https://generativelanguage.googleapis.com", api_key=None, timeout=120):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def _post(self, url, body):
+        import urllib.request
+
+        request = urllib.request.Request(
+            url, data=json.dumps(body).encode("utf-8"), headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            raise TransportError(f"HTTP {e.code}: {e.reason}", status=e.code) from e
+
+    def _url(self, model_name, method, query=""):
+        url = f"{self.base_url}/v1beta/models/{model_name}:{method}"
+        params = [p for p in (query, f"key={self.api_key}" if self.api_key else "") if p]
+        return url + ("?" + "&".join(params) if params else "")
+
+    def _body(self, prompt, generation_config, safety_settings):
+        config = {
+            "maxOutputTokens": generation_config.get("max_output_tokens"),
+            "temperature": generation_config.get("temperature"),
+            "responseMimeType": generation_config.get("response_mime_type"),
+        }
+        return {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {key: value for key, value in config.items() if value is not None},
+            "safetySettings": safety_settings,
+        }
+
+    @staticmethod
+    def _text(data):
+        try:
+            parts = data["candidates"][0]["content"]["parts"]
+        except (KeyError, IndexError) as e:
+            raise TransportError(f"Malformed generateContent response: {e}") from e
+        return "".join(part.get("text", "") for part in parts)
+
+    async def generate(self, prompt, model_name, generation_config, safety_settings):
+        url = self._url(model_name, "generateContent")
+        data = await asyncio.to_thread(self._post, url, self._body(prompt, generation_config, safety_settings))
+        usage = data.get("usageMetadata", {})
+        return GenerationResult(
+            text=self._text(data),
+            prompt_tokens=usage.get("promptTokenCount"),
+            output_tokens=usage.get("candidatesTokenCount"),
+        )
+
+    async def stream(self, prompt, model_name, generation_config, safety_settings):
+        """Yield response text chunks from the server-sent-events streaming endpoint."""
+        url = self._url(model_name, "streamGenerateContent", "alt=sse")
+        body = json.dumps(self._body(prompt, generation_config, safety_settings)).encode("utf-8")
+
+        def events():
+            import urllib.request
+
+            request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    for line in response:
+                        line = line.decode("utf-8").strip()
+                        if line.startswith("data:"):
+                            yield json.loads(line[len("data:"):])
+            except urllib.error.HTTPError as e:
+                raise TransportError(f"HTTP {e.code}: {e.reason}", status=e.code) from e
+
+        async for event in iterate_in_thread(events):
+            text = self._text(event)
+            if text:
+                yield text
+
+
+class FakeTransport:
+    """In-process stand-in for the Gemini API.
+
+    responder is a string or a callable taking the prompt. failures is a list of
+    HTTP statuses to raise, one per call, before responses start succeeding.
+    Streaming splits the response into chunk_size pieces, each after chunk_latency.
+    """
+
+    def __init__(self, responder="", latency=0.0, failures=None, chunk_size=200, chunk_latency=0.0):
+        self.responder = responder
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_latency = chunk_latency
+        self.failures = list(failures or [])
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    async def generate(self, prompt, model_name, generation_config, safety_settings):
+        with self._lock:
+            self.calls += 1
+            status = self.failures.pop(0) if self.failures else None
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if status is not None:
+            raise TransportError(f"Simulated HTTP {status}", status=status)
+        text = self.responder(prompt) if callable(self.responder) else self.responder
+        return GenerationResult(text=text, prompt_tokens=estimate_tokens(prompt),
+                                output_tokens=estimate_tokens(text))
+
+    async def stream(self, prompt, model_name, generation_config, safety_settings):
+        result = await self.generate(prompt, model_name, generation_config, safety_settings)
+        for start in range(0, len(result.text), self.chunk_size):
+            if self.chunk_latency:
+                await asyncio.sleep(self.chunk_latency)
+            yield result.text[start:start + self.chunk_size]
+
+
+class AsyncGeminiClient:
+    """Rate-limited, retrying async client over a pluggable transport.
+
+    Every call reserves one request and its estimated prompt tokens from the shared
+    rate limiter, waits for a concurrency slot, and retries 429/5xx errors with
+    exponential backoff plus full jitter. Slots are a threading semaphore, so
+    max_concurrency holds across every thread and event loop using the client,
+    including generate_sync's one loop per call. shared_with makes this client use
+    another's rate limiter and slots, for clients of one API key.
+    """
+
+    def __init__(self, transport, model_name, generation_config, safety_settings=None,
+                 requests_per_minute=15, tokens_per_minute=1_000_000, max_concurrency=4,
+                 max_retries=5, base_delay=1.0, max_delay=60.0, shared_with=None):
+        self.transport = transport
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.safety_settings = safety_settings
+        if shared_with:
+            self.limiter = shared_with.limiter
+            self.max_concurrency = shared_with.max_concurrency
+            self._slots = shared_with._slots
+        else:
+            self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+            self.max_concurrency = max_concurrency
+            self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    @asynccontextmanager
+    async def _slot(self):
+        # Polled rather than awaited on a thread, so a cancelled call never leaves
+        # a worker thread behind that takes the slot later and never gives it back
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(SLOT_POLL_SECONDS)
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def generate(self, prompt, generation_config=None):
+        """Generate a response for prompt, returning a GenerationResult.
+
+        generation_config overrides the client's settings for this call only.
+        """
+        generation_config = generation_config or self.generation_config
+        prompt_tokens = estimate_tokens(prompt)
+        with span("gemini.generate", model=self.model_name, prompt_chars=len(prompt)) as request:
+            async with self._slot():
+                attempt = 0
+                while True:
+                    await self.limiter.acquire(prompt_tokens)
+                    try:
+                        result = await self.transport.generate(
+                            prompt, self.model_name, generation_config, self.safety_settings)
+                    except Exception as e:
+                        if attempt >= self.max_retries or not is_retryable(e):
+                            request.set("retries", attempt)
+                            raise
+                        delay = self.backoff(attempt)
+                        attempt += 1
+                        with self._lock:
+                            self.retries += 1
+                        logger.warning("Gemini request failed (%s); retry %d/%d in %.1fs",
+                                       e, attempt, self.max_retries, delay)
+                        await asyncio.sleep(delay)
+                        continue
+                    # Settle the token bucket with the real usage once it is known
+                    output_tokens = result.output_tokens or estimate_tokens(result.text)
+                    used = (result.prompt_tokens or prompt_tokens) + output_tokens
+                    self.limiter.tokens.charge(used - prompt_tokens)
+                    result.retries = attempt
+                    request.update(retries=attempt, prompt_tokens=result.prompt_tokens or prompt_tokens,
+                                   output_tokens=output_tokens, response_chars=len(result.text),
+                                   tokens_estimated=result.output_tokens is None)
+                    return result
+
+    async def stream(self, prompt):
+        """Yield response text chunks for prompt as they arrive.
+
+        Errors before the first chunk are retried like generate(); once output has
+        been handed to the caller a failure is raised instead, since replaying it
+        would duplicate text downstream.
+        """
+        prompt_tokens = estimate_tokens(prompt)
+        with span("gemini.stream", model=self.model_name, prompt_chars=len(prompt)) as request:
+            async with self._slot():
+                attempt = 0
+                while True:
+                    await self.limiter.acquire(prompt_tokens)
+                    output_chars = 0
+                    try:
+                        async for chunk in self.transport.stream(
+                                prompt, self.model_name, self.generation_config, self.safety_settings):
+                            output_chars += len(chunk)
+                            yield chunk
+                    except Exception as e:
+                        if output_chars or attempt >= self.max_retries or not is_retryable(e):
+                            request.update(retries=attempt, response_chars=output_chars)
+                            raise
+                        delay = self.backoff(attempt)
+                        attempt += 1
+                        with self._lock:
+                            self.retries += 1
+                        logger.warning("Gemini stream failed (%s); retry %d/%d in %.1fs",
+                                       e, attempt, self.max_retries, delay)
+                        await asyncio.sleep(delay)
+                        continue
+                    self.limiter.tokens.charge(max(1, output_chars // 4))
+                    # Streaming usage metadata is not surfaced, so tokens are estimated
+                    request.update(retries=attempt, prompt_tokens=prompt_tokens,
+                                   output_tokens=max(1, output_chars // 4),
+                                   response_chars=output_chars, tokens_estimated=True)
+                    return
+
+    async def generate_many(self, prompts):
+        """Generate responses for many prompts concurrently, preserving order.
+
+        Failed prompts yield their exception instead of a result.
+        """
+        return await asyncio.gather(*(self.generate(p) for p in prompts), return_exceptions=True)
+
+    def generate_sync(self, prompt, generation_config=None):
+        """Blocking wrapper around generate for callers outside an event loop."""
+        return asyncio.run(self.generate(prompt, generation_config))
+
+
+_default_client = None
+_default_clients = {}
+_default_client_lock = threading.Lock()
+
+
+def _client_key(model_name, generation_config, safety_settings):
+    return model_name, json.dumps([generation_config, safety_settings], sort_keys=True, default=str)
+
+
+def get_default_client(model_name, generation_config, safety_settings, api_key):
+    """Process-wide client for this model and configuration.
+
+    Clients for different models or configurations share one rate limiter and one
+    set of concurrency slots, since the limits belong to the API key. Limits come
+    from GEMINI_RPM, GEMINI_TPM, GEMINI_MAX_CONCURRENCY and GEMINI_MAX_RETRIES;
+    GEMINI_BASE_URL switches to the REST transport, e.g. to target a local
+    stand-in server. A client set with set_default_client serves every call.
+    """
+    with _default_client_lock:
+        if _default_client is not None:
+            return _default_client
+        key = _client_key(model_name, generation_config, safety_settings)
+        client = _default_clients.get(key)
+        if client is None:
+            shared_with = next(iter(_default_clients.values()), None)
+            base_url = os.environ.get("GEMINI_BASE_URL")
+            if shared_with:
+                transport = shared_with.transport
+            elif base_url:
+                transport = HttpTransport(base_url, api_key=api_key)
+            else:
+                transport = GenaiTransport(api_key)
+            client = AsyncGeminiClient(
+                transport,
+                model_name,
+                generation_config,
+                safety_settings,
+                requests_per_minute=int(os.environ.get("GEMINI_RPM", 15)),
+                tokens_per_minute=int(os.environ.get("GEMINI_TPM", 1_000_000)),
+                max_concurrency=int(os.environ.get("GEMINI_MAX_CONCURRENCY", 4)),
+                max_retries=int(os.environ.get("GEMINI_MAX_RETRIES", 5)),
+                shared_with=shared_with,
+            )
+            _default_clients[key] = client
+        return client
+
+
+def default_client_available():
+    """True when a client can be built or used without a GEMINI_API_KEY."""
+    return _default_client is not None or bool(_default_clients) or bool(os.environ.get("GEMINI_BASE_URL"))
+
+
+def set_default_client(client):
+    """Replace the process-wide clients with one, e.g. over a FakeTransport in tests."""
+    global _default_client
+    with _default_client_lock:
+        _default_client = client
+        _default_clients.clear()
@@ -0,0 +1,222 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_INDEX_PATH = Path(os.environ.get("RESUME_CACHE_DIR", ".cache")) / "jd_index.jsonl"
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 3
+DEFAULT_SEED = 1
+MERSENNE_PRIME = (1 << 31) - 1
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+# Weight of missed near-duplicates against extra candidates when choosing LSH bands
+LSH_FALSE_NEGATIVE_WEIGHT = 0.8
+LSH_INTEGRATION_POINTS = 201
+
+
+def shingles(text, size=DEFAULT_SHINGLE_SIZE):
+    """Hashed word n-grams of text, lower-cased and stripped of punctuation."""
+    words = TOKEN_PATTERN.findall(text.lower())
+    if len(words) < size:
+        words = words + [""] * (size - len(words))
+    # crc32 rather than hash(): string hashes are salted per process, and
+    # signatures are persisted across runs
+    return np.fromiter({zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+                        for i in range(len(words) - size + 1)}, dtype=np.uint64)
+
+
+def lsh_bands(num_perm, threshold, false_negative_weight=LSH_FALSE_NEGATIVE_WEIGHT):
+    """(bands, rows), bands * rows <= num_perm, minimizing weighted false positive and negative rates.
+
+    A pair with Jaccard similarity s collides in at least one band with probability
+    1 - (1 - s**rows)**bands. The false positive area is that probability integrated
+    below threshold, the false negative area its complement integrated above it, as
+    datasketch does. Candidates are verified against the threshold afterwards, so a
+    false positive only costs one comparison and false negatives weigh more; that
+    puts the S-curve's steep part just below threshold rather than above it.
+    """
+    below = np.linspace(0.0, threshold, LSH_INTEGRATION_POINTS)
+    above = np.linspace(threshold, 1.0, LSH_INTEGRATION_POINTS)
+
+    def error(option):
+        bands, rows = option
+        false_positive = np.mean(1 - (1 - below ** rows) ** bands) * threshold
+        false_negative = np.mean((1 - above ** rows) ** bands) * (1 - threshold)
+        return (1 - false_negative_weight) * false_positive + false_negative_weight * false_negative
+
+    options = [(bands, rows) for rows in range(1, num_perm + 1) for bands in range(1, num_perm // rows + 1)]
+    return min(options, key=error)
+
+
+class JobDescriptionIndex:
+    """MinHash signatures of job descriptions with an LSH index for near-duplicate lookup.
+
+    query() only compares against descriptions that share an LSH band with the
+    new one, so lookups stay sub-linear in the number of indexed postings.
+    Entries are appended to a JSON lines file as they are added, so the index grows
+    incrementally across runs; re-adding an id with new text replaces its entry.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                 shingle_size=DEFAULT_SHINGLE_SIZE, seed=DEFAULT_SEED):
+        self.path = Path(path) if path else None
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.entries = {}
+        self._buckets = [{} for _ in range(self.bands)]
+        self._lock = threading.Lock()
+        if self.path:
+            self._load()
+
+    def _settings(self):
+        return {"num_perm": self.num_perm, "shingle_size": self.shingle_size, "seed": self.seed}
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                lines = file.read().splitlines()
+        except OSError:
+            return
+        try:
+            settings = json.loads(lines[0]) if lines else None
+        except ValueError:
+            settings = None
+        if settings != self._settings():
+            # Signatures from other settings (or an unreadable header) are not comparable; start over
+            self.path.unlink(missing_ok=True)
+            return
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a write interrupted mid-line
+            self._insert(entry["id"], entry["digest"], np.array(entry["signature"], dtype=np.uint64))
+
+    def signature(self, text):
+        """MinHash signature: per permutation, the minimum of (a * x + b) mod p over the shingles."""
+        hashes = shingles(text, self.shingle_size) % MERSENNE_PRIME
+        # One (num_perm x shingles) product; a and x are below 2**31, so nothing overflows
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _insert(self, doc_id, digest, signature):
+        self._remove(doc_id)
+        self.entries[doc_id] = {"digest": digest, "signature": signature}
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, set()).add(doc_id)
+
+    def _remove(self, doc_id):
+        entry = self.entries.pop(doc_id, None)
+        if entry is None:
+            return
+        for band, key in enumerate(self._band_keys(entry["signature"])):
+            bucket = self._buckets[band].get(key)
+            if bucket:
+                bucket.discard(doc_id)
+
+    def query(self, text, signature=None):
+        """Indexed ids whose estimated Jaccard similarity to text reaches the threshold, most similar first."""
+        signature = self.signature(text) if signature is None else signature
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates |= self._buckets[band].get(key, set())
+            scored = [(doc_id, float(np.mean(self.entries[doc_id]["signature"] == signature)))
+                      for doc_id in candidates]
+        return sorted((pair for pair in scored if pair[1] >= self.threshold), key=lambda pair: -pair[1])
+
+    def add(self, doc_id, text):
+        """Index text under doc_id and persist it. Returns the signature."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            existing = self.entries.get(doc_id)
+            if existing and existing["digest"] == digest:
+                return existing["signature"]
+        signature = self.signature(text)
+        with self._lock:
+            self._insert(doc_id, digest, signature)
+            if self.path:
+                self._append({"id": doc_id, "digest": digest, "signature": signature.tolist()})
+        return signature
+
+    def _append(self, entry):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        new_file = not self.path.exists()
+        with open(self.path, "a", encoding="utf-8") as file:
+            if new_file:
+                file.write(json.dumps(self._settings()) + "\n")
+            file.write(json.dumps(entry) + "\n")
+
+    def canonical(self, doc_id, text, among=None):
+        """Add text under doc_id and return the id it duplicates, or doc_id itself.
+
+        among, if given, limits the candidates to those ids, e.g. the descriptions
+        already handled in the current batch.
+        """
+        signature = self.add(doc_id, text)
+        for other, _ in self.query(text, signature):
+            if other != doc_id and (among is None or other in among):
+                return other
+        return doc_id
+
+    def compact(self):
+        """Rewrite the index file with one line per current entry."""
+        if not self.path:
+            return
+        with self._lock:
+            lines = [json.dumps(self._settings())]
+            lines += [json.dumps({"id": doc_id, "digest": entry["digest"], "signature": entry["signature"].tolist()})
+                      for doc_id, entry in self.entries.items()]
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            os.replace(tmp_path, self.path)
+
+
+def cluster_job_descriptions(job_texts, index):
+    """Map each job id to the first earlier id in job_texts it near-duplicates (or itself).
+
+    job_texts is an ordered mapping of id to text; every text is added to index.
+    """
+    canonical = {}
+    for doc_id, text in job_texts.items():
+        target = index.canonical(doc_id, text, among=canonical)
+        # Point at the cluster's representative, not a chain of duplicates
+        canonical[doc_id] = canonical.get(target, target)
+    return canonical
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate job descriptions.")
+    parser.add_argument("--jobs", default="jobs", help="folder of job description .txt files")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--index", default=str(DEFAULT_INDEX_PATH))
+    parser.add_argument("--compact", action="store_true", help="rewrite the index file without stale lines")
+    args = parser.parse_args()
+
+    index = JobDescriptionIndex(args.index, threshold=args.threshold)
+    job_paths = sorted(Path(args.jobs).glob("*.txt"))
+    clusters = cluster_job_descriptions({str(p): p.read_text(encoding="utf-8") for p in job_paths}, index)
+    for doc_id, target in clusters.items():
+        if target != doc_id:
+            print(f"{Path(doc_id).name}  duplicates  {Path(target).name}")
+    unique = len(set(clusters.values()))
+    print(f"{len(clusters)} job descriptions, {unique} unique at threshold {args.threshold} "
+          f"({index.bands} bands x {index.rows} rows), {len(index.entries)} indexed in total.")
+    if args.compact:
+        index.compact()
@@ -0,0 +1,267 @@
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from latex_template import RESUME_PREAMBLE
+from telemetry import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FORMAT_DIR = Path(os.environ.get("RESUME_CACHE_DIR", ".cache")) / "latex"
+DEFAULT_TIMEOUT = 60
+BEGIN_DOCUMENT = "\\begin{document}"
+
+
+@dataclass
+class CompileResult:
+    tex_path: str
+    pdf_path: str = None
+    ok: bool = False
+    seconds: float = 0.0
+    used_format: bool = False
+    returncode: int = None
+    error: str = None
+
+
+def normalize_preamble(preamble):
+    """Preamble with comments, indentation and blank lines removed, for comparison."""
+    lines = []
+    for line in preamble.splitlines():
+        line = re.sub(r'(?<!\\)%.*', '', line).strip()
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def split_preamble(content):
+    """Split a LaTeX document into (preamble, body starting at \\begin{document})."""
+    index = content.find(BEGIN_DOCUMENT)
+    if index == -1:
+        return content, ""
+    return content[:index], content[index:]
+
+
+class PreambleFormat:
+    """The template preamble dumped once into a pdflatex .fmt file.
+
+    The format file is keyed by the preamble text and the pdflatex version, since
+    formats are only loadable by the engine build that dumped them.
+    """
+
+    def __init__(self, preamble=RESUME_PREAMBLE, format_dir=DEFAULT_FORMAT_DIR, timeout=DEFAULT_TIMEOUT):
+        self.preamble = preamble
+        self.normalized = normalize_preamble(preamble)
+        self.format_dir = Path(format_dir)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._path = None
+        self._failed = False
+        self._rebuilt = False
+
+    def matches(self, preamble):
+        return normalize_preamble(preamble) == self.normalized
+
+    def _engine_version(self):
+        result = subprocess.run(["pdflatex", "--version"], capture_output=True, text=True, timeout=self.timeout)
+        return result.stdout.splitlines()[0] if result.stdout else ""
+
+    def path(self):
+        """Return the .fmt path, building it on first use. None if it cannot be built."""
+        with self._lock:
+            if self._path or self._failed:
+                return self._path
+            try:
+                self._path = self._build()
+            except (OSError, subprocess.SubprocessError) as e:
+                logger.warning("Could not build LaTeX preamble format, compiling without it: %s", e)
+                self._path = None
+            self._failed = self._path is None
+            return self._path
+
+    def invalidate(self, fmt_path):
+        """Drop a format that broke a compile the full preamble handles; it is rebuilt once on next use."""
+        with self._lock:
+            if self._path != fmt_path:
+                return  # already dropped by another job
+            logger.warning("Precompiled LaTeX format %s failed a compile; %s.", fmt_path.name,
+                           "compiling without it from now on" if self._rebuilt else "rebuilding it")
+            try:
+                fmt_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            self._path = None
+            # A format that breaks again after a rebuild is not rebuilt a second time
+            self._failed = self._rebuilt
+            self._rebuilt = True
+
+    def _build(self):
+        digest = hashlib.sha256((self._engine_version() + "\n" + self.preamble).encode("utf-8")).hexdigest()[:16]
+        name = f"resume_preamble_{digest}"
+        fmt_path = self.format_dir / f"{name}.fmt"
+        if fmt_path.exists():
+            return fmt_path
+
+        self.format_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory() as work_dir:
+            source = Path(work_dir) / f"{name}.tex"
+            source.write_text(self.preamble + "\n\\dump\n", encoding="utf-8")
+            logger.info("Building precompiled LaTeX preamble format...")
+            result = subprocess.run(
+                ["pdflatex", "-ini", "-interaction=nonstopmode", f"-jobname={name}", "&pdflatex", source.name],
+                cwd=work_dir, capture_output=True, text=True, timeout=self.timeout,
+            )
+            built = Path(work_dir) / f"{name}.fmt"
+            if result.returncode != 0 or not built.exists():
+                logger.warning("LaTeX format build failed: %s", result.stdout[-500:])
+                return None
+            # Move into place atomically so concurrent processes never load a partial file
+            tmp_target = self.format_dir / f"{name}.{os.getpid()}.tmp"
+            shutil.copyfile(built, tmp_target)
+            os.replace(tmp_target, fmt_path)
+        return fmt_path
+
+
+def _run_pdflatex(tex_path, output_folder, content, body, fmt_path, timeout, result):
+    """One pdflatex run in a private temp directory; fills in result and returns whether it succeeded."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        source = Path(work_dir) / tex_path.name
+        cmd = ["pdflatex", "-interaction=nonstopmode", "-halt-on-error"]
+        if fmt_path:
+            # Link the format next to the job so kpathsea finds it by name
+            os.symlink(fmt_path.resolve(), Path(work_dir) / fmt_path.name)
+            cmd.append(f"-fmt={fmt_path.stem}")
+            source.write_text(body, encoding="utf-8")
+        else:
+            source.write_text(content, encoding="utf-8")
+        cmd.append(source.name)
+
+        completed = subprocess.run(cmd, cwd=work_dir, capture_output=True, text=True, timeout=timeout)
+        result.returncode = completed.returncode
+        result.used_format = bool(fmt_path)
+        built_pdf = source.with_suffix(".pdf")
+        if completed.returncode == 0 and built_pdf.exists():
+            output_folder.mkdir(parents=True, exist_ok=True)
+            pdf_path = output_folder / built_pdf.name
+            shutil.copyfile(built_pdf, pdf_path)
+            result.pdf_path = str(pdf_path)
+            result.ok = True
+            result.error = None
+        else:
+            result.error = completed.stdout[-2000:] or completed.stderr[-2000:]
+            log_path = source.with_suffix(".log")
+            if log_path.exists():
+                output_folder.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(log_path, output_folder / log_path.name)
+    return result.ok
+
+
+def _compile_tex(tex_path, output_folder, preamble_format, timeout):
+    tex_path = Path(tex_path)
+    output_folder = Path(output_folder)
+    result = CompileResult(tex_path=str(tex_path))
+    start = time.perf_counter()
+    try:
+        content = tex_path.read_text(encoding="utf-8")
+        preamble, body = split_preamble(content)
+        fmt_path = None
+        if preamble_format and body and preamble_format.matches(preamble):
+            fmt_path = preamble_format.path()
+
+        if not _run_pdflatex(tex_path, output_folder, content, body, fmt_path, timeout, result) and fmt_path:
+            # A stale or corrupt format fails every compile; the full preamble tells
+            # whether the document itself is at fault
+            logger.info("Compile against the precompiled preamble failed, retrying with the full preamble.")
+            if _run_pdflatex(tex_path, output_folder, content, body, None, timeout, result):
+                preamble_format.invalidate(fmt_path)
+    except subprocess.TimeoutExpired:
+        result.error = f"pdflatex timed out after {timeout}s"
+    except (OSError, subprocess.SubprocessError) as e:
+        result.error = str(e)
+    result.seconds = round(time.perf_counter() - start, 4)
+    return result
+
+
+def compile_tex(tex_path, output_folder, preamble_format=None, timeout=DEFAULT_TIMEOUT):
+    """Compile tex_path in a private temp directory and copy the PDF into output_folder.
+
+    When the document's preamble matches the template and a preamble format is
+    available, only the body is compiled against the precompiled format. If that
+    fails, the full document is compiled once more; when that succeeds the format
+    was at fault and is invalidated.
+    """
+    with span("compile", tex=Path(tex_path).name) as stage:
+        result = _compile_tex(tex_path, output_folder, preamble_format, timeout)
+        stage.update(ok=result.ok, used_format=result.used_format)
+        if result.returncode is not None:
+            stage.set("returncode", result.returncode)
+    return result
+
+
+class LatexCompileQueue:
+    """Runs pdflatex jobs in parallel, each isolated in its own temp directory.
+
+    Every job's wall time and whether it used the precompiled preamble are kept in
+    results, so format and cold compile times can be compared directly.
+    """
+
+    def __init__(self, max_workers=2, timeout=DEFAULT_TIMEOUT, use_format=True, format_dir=DEFAULT_FORMAT_DIR):
+        self.timeout = timeout
+        self.preamble_format = PreambleFormat(format_dir=format_dir, timeout=timeout) if use_format else None
+        self.results = []
+        self._results_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _run(self, tex_path, output_folder):
+        result = compile_tex(tex_path, output_folder, self.preamble_format, self.timeout)
+        with self._results_lock:
+            self.results.append(result)
+        return result
+
+    def submit(self, tex_path, output_folder):
+        """Queue a compile and return a Future resolving to a CompileResult."""
+        return self._executor.submit(self._run, tex_path, output_folder)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def summary(self):
+        """Mean compile seconds split by whether the precompiled format was used."""
+        with self._results_lock:
+            results = list(self.results)
+        summary = {}
+        for label, used in (("with_format", True), ("cold", False)):
+            times = [r.seconds for r in results if r.ok and r.used_format == used]
+            summary[label] = {
+                "jobs": len(times),
+                "mean_seconds": round(sum(times) / len(times), 4) if times else None,
+            }
+        summary["failed"] = sum(1 for r in results if not r.ok)
+        return summary
+
+
+_default_format = None
+_default_format_lock = threading.Lock()
+
+
+def get_default_format():
+    """Process-wide preamble format shared by single-resume compiles."""
+    global _default_format
+    with _default_format_lock:
+        if _default_format is None:
+            _default_format = PreambleFormat()
+        return _default_format
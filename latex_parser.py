@@ -0,0 +1,355 @@
+import re
+from dataclasses import dataclass, field
+
+# Argument counts for the commands of the resume template. Commands not listed take
+# no arguments; any groups after them are kept as ordinary nested content.
+COMMAND_ARITY = {
+    "section": 1,
+    "resumeSubheading": 4,
+    "resumeSubSubheading": 2,
+    "resumeProjectHeading": 2,
+    "resumeItem": 1,
+    "resumeSubItem": 1,
+    "textbf": 1,
+    "textit": 1,
+    "emph": 1,
+    "underline": 1,
+    "href": 2,
+    "url": 1,
+    "begin": 1,
+    "end": 1,
+    "vspace": 1,
+    "hspace": 1,
+}
+# Commands whose arguments are layout only and never rendered as text
+SILENT_COMMANDS = {"vspace", "hspace", "begin", "end"}
+# Commands that start a resume entry inside a section
+ENTRY_COMMANDS = {"resumeSubheading", "resumeSubSubheading", "resumeProjectHeading", "resumeItem",
+                  "resumeSubItem", "textbf"}
+# Commands that format running text rather than start a new resume entry
+INLINE_COMMANDS = {"textbf", "textit", "emph", "underline", "href", "url", "small", "\\"}
+ESCAPED_CHARACTERS = {"&": "&", "%": "%", "$": "$", "#": "#", "_": "_", "{": "{", "}": "}", " ": " "}
+
+# A brace group nested at most three deep, without comments or a \\[...] line
+# break (whose option may run past the closing brace): matched whole, its contents
+# are only tokenized if something needs more than their text
+_GROUP_CONTENT = r"[^{}\\%]|\\[^\\\n]|\\\\(?!\[)"
+BALANCED_GROUP = r"\{(?:%s)*\}" % _GROUP_CONTENT
+for _ in range(2):
+    BALANCED_GROUP = r"\{(?:%s|%s)*\}" % (_GROUP_CONTENT, BALANCED_GROUP)
+
+TOKEN_PATTERN = re.compile(
+    r"(?P<comment>%[^\n]*)"
+    r"|(?P<linebreak>\\\\(?:\[[^\]]*\])?)"
+    r"|(?P<command>\\[A-Za-z]+\*?)"
+    r"|(?P<escaped>\\.)"
+    r"|(?P<group>" + BALANCED_GROUP + r")"
+    r"|(?P<open>\{)"
+    r"|(?P<close>\})"
+    r"|(?P<optional>\[(?:[^\[\]{}\\]|\{[^{}]*\})*\])"
+    r"|(?P<text>[^\\{}%\[]+|\[)"
+)
+# Group sources whose text needs no parse tree: plain text, or only the inline
+# formatting commands and escapes, which to_text unwraps
+SPECIAL_CHARACTERS = re.compile(r"[\\{}%]")
+INLINE_ONLY = re.compile(r"(?:[^\\%\[]|\\(?:textbf|textit|emph|underline)(?![A-Za-z*])|\\[&%$#_{}])*")
+# A command that finds no group drops the whitespace before the next command,
+# group or the end, like bind_arguments does
+INLINE_MARKUP = re.compile(r"\\(?:textbf|textit|emph|underline)(?:\s+(?=[\\{}]|\Z))?|\\([&%$#_{}])|[{}]")
+
+
+@dataclass(slots=True)
+class Text:
+    value: str
+
+
+@dataclass(slots=True)
+class Group:
+    children: list = field(default_factory=list)
+    # Source between the braces of a group matched whole; children are parsed from
+    # it on first use (see group_children)
+    source: str = None
+
+
+def group_children(group):
+    """The group's child nodes, parsing them from its source the first time."""
+    if group.source is not None:
+        group.children = parse_nodes(group.source)
+        group.source = None
+    return group.children
+
+
+def _source_text(source):
+    """What _collect_text gives for the nodes of source, without building them when it can."""
+    if not SPECIAL_CHARACTERS.search(source):
+        return source
+    if INLINE_ONLY.fullmatch(source):
+        return INLINE_MARKUP.sub(lambda match: match.group(1) or "", source)
+    parts = []
+    _collect_text(parse_nodes(source), parts)
+    return "".join(parts)
+
+
+@dataclass(slots=True)
+class Command:
+    name: str
+    args: list = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Subheading:
+    title: str
+    location: str
+    subtitle: str
+    date: str
+
+
+@dataclass(slots=True)
+class ProjectHeading:
+    info: str
+    date: str
+    # Only set for documents built from JSON; parsed LaTeX keeps them inside info
+    technologies: str = ""
+
+
+@dataclass(slots=True)
+class Item:
+    text: str
+
+
+@dataclass(slots=True)
+class SkillLine:
+    category: str
+    skills: str
+
+
+@dataclass(slots=True)
+class Paragraph:
+    text: str
+
+
+@dataclass(slots=True)
+class Section:
+    title: str
+    entries: list = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class ContactLink:
+    text: str
+    url: str = ""
+
+
+@dataclass(slots=True)
+class ResumeDocument:
+    name: str = "Name"
+    contact: str = ""
+    sections: list = field(default_factory=list)
+    # ContactLinks behind the contact line, when known (documents built from JSON)
+    links: list = field(default_factory=list)
+
+
+def parse_nodes(content):
+    """Parse LaTeX source into a flat list of top-level Text, Group and Command nodes.
+
+    Tokens come from one left-to-right scan of TOKEN_PATTERN; comments are dropped.
+    Groups up to three deep are matched whole by one regex and kept as their source,
+    so the text inside command arguments is never tokenized character run by
+    character run unless a caller walks into it.
+
+    Braces are matched with an explicit stack; unbalanced closing braces are ignored
+    rather than fatal and unclosed groups simply end with the input. Command
+    arguments are bound afterwards in bind_arguments.
+    """
+    root = Group()
+    stack = [root]
+    current = root.children
+    for match in TOKEN_PATTERN.finditer(content):
+        kind = match.lastgroup
+        if kind == "text":
+            current.append(Text(match.group()))
+        elif kind == "command":
+            current.append(Command(match.group()[1:]))
+        elif kind == "group":
+            current.append(Group(source=match.group()[1:-1]))
+        elif kind == "open":
+            group = Group()
+            current.append(group)
+            stack.append(group)
+            current = group.children
+        elif kind == "close":
+            if len(stack) > 1:
+                stack.pop()
+                current = stack[-1].children
+        elif kind == "linebreak":
+            current.append(Command("\\"))
+        elif kind == "escaped":
+            value = match.group()[1]
+            current.append(Text(ESCAPED_CHARACTERS.get(value, value)))
+        elif kind == "optional":
+            # Options right after a command or its argument, such as
+            # \begin{itemize}[leftmargin=...], carry no text
+            if not (current and isinstance(current[-1], (Command, Group))):
+                current.append(Text(match.group()))
+    return bind_arguments(root.children)
+
+
+def bind_arguments(nodes):
+    """Attach the following groups to each command according to COMMAND_ARITY."""
+    bound = []
+    index = 0
+    while index < len(nodes):
+        node = nodes[index]
+        index += 1
+        if isinstance(node, Group):
+            if node.source is None:
+                node.children = bind_arguments(node.children)
+        elif isinstance(node, Command):
+            arity = COMMAND_ARITY.get(node.name, 0)
+            while len(node.args) < arity and index < len(nodes):
+                candidate = nodes[index]
+                if isinstance(candidate, Text) and not candidate.value.strip():
+                    index += 1
+                    continue
+                if not isinstance(candidate, Group):
+                    break
+                if candidate.source is None:
+                    candidate.children = bind_arguments(candidate.children)
+                node.args.append(candidate)
+                index += 1
+        bound.append(node)
+    return bound
+
+
+def to_text(nodes):
+    """Plain text of a node list, with formatting commands unwrapped."""
+    parts = []
+    _collect_text(nodes, parts)
+    return " ".join("".join(parts).replace("$", "").split())
+
+
+def _collect_text(nodes, parts):
+    for node in nodes:
+        if isinstance(node, Text):
+            parts.append(node.value)
+        elif isinstance(node, Group):
+            if node.source is not None:
+                parts.append(_source_text(node.source))
+            else:
+                _collect_text(node.children, parts)
+        elif isinstance(node, Command):
+            if node.name == "\\":
+                parts.append(" ")
+            elif node.name in SILENT_COMMANDS:
+                continue
+            elif node.name == "href" and len(node.args) == 2:
+                _collect_text(node.args[1:], parts)
+            else:
+                _collect_text(node.args, parts)
+
+
+def _environment(node):
+    if isinstance(node, Command) and node.name in ("begin", "end") and node.args:
+        return node.name, to_text(node.args[:1])
+    return None, None
+
+
+def _parse_header(nodes, document):
+    """Fill in name and contact line from the centered block before the first section."""
+    inside, header = False, []
+    for node in nodes:
+        kind, env = _environment(node)
+        if env == "center":
+            if kind == "end":
+                break
+            inside = True
+            continue
+        if inside:
+            header.append(node)
+
+    name_nodes, contact_nodes = None, []
+    for node in header:
+        if name_nodes is None and isinstance(node, Command) and node.name == "textbf" and node.args:
+            name_nodes = node.args[:1]
+        else:
+            contact_nodes.append(node)
+    if name_nodes is not None:
+        document.name = to_text(name_nodes) or document.name
+    document.contact = to_text(contact_nodes)
+
+
+def _parse_entries(nodes, entries, top_level=False):
+    """Collect resume entries from a section body in document order.
+
+    Loose text directly inside a section (such as a summary) becomes a Paragraph.
+    """
+    index = 0
+    loose = []
+
+    def flush_loose():
+        text = to_text(loose)
+        if text:
+            entries.append(Paragraph(text))
+        loose.clear()
+
+    while index < len(nodes):
+        node = nodes[index]
+        index += 1
+        if top_level and (isinstance(node, Text) or (isinstance(node, Command) and node.name in INLINE_COMMANDS)):
+            is_skill = (isinstance(node, Command) and node.name == "textbf" and index < len(nodes)
+                        and isinstance(nodes[index], Group) and to_text(nodes[index:index + 1]).startswith(":"))
+            if not is_skill:
+                loose.append(node)
+                continue
+        if loose:
+            flush_loose()
+        if isinstance(node, Group):
+            _parse_entries(group_children(node), entries)
+        elif isinstance(node, Command) and node.name in ENTRY_COMMANDS:
+            args = [to_text([arg]) for arg in node.args]
+            if node.name == "resumeSubheading" and len(args) == 4:
+                entries.append(Subheading(*args))
+            elif node.name == "resumeSubSubheading" and len(args) == 2:
+                entries.append(Subheading("", "", *args))
+            elif node.name == "resumeProjectHeading" and len(args) == 2:
+                entries.append(ProjectHeading(*args))
+            elif node.name in ("resumeItem", "resumeSubItem") and args:
+                entries.append(Item(args[0]))
+            elif node.name == "textbf" and args and index < len(nodes) and isinstance(nodes[index], Group):
+                # Skills lines look like \textbf{Category}{: skill, skill}
+                skills = to_text(nodes[index:index + 1])
+                if skills.startswith(":"):
+                    entries.append(SkillLine(args[0], skills[1:].strip()))
+                    index += 1
+    if loose:
+        flush_loose()
+
+
+def build_document(nodes):
+    """Build a ResumeDocument from parsed nodes."""
+    document = ResumeDocument()
+    section_starts = [i for i, node in enumerate(nodes) if isinstance(node, Command) and node.name == "section"]
+    end = next((i for i, node in enumerate(nodes) if _environment(node) == ("end", "document")), len(nodes))
+    _parse_header(nodes[:section_starts[0]] if section_starts else nodes[:end], document)
+
+    for position, start in enumerate(section_starts):
+        if start >= end:
+            break
+        stop = section_starts[position + 1] if position + 1 < len(section_starts) else end
+        command = nodes[start]
+        title = to_text(command.args[:1]) if command.args else "Untitled"
+        section = Section(title)
+        _parse_entries(nodes[start + 1:min(stop, end)], section.entries, top_level=True)
+        document.sections.append(section)
+    return document
+
+
+def parse_resume(content):
+    """Parse a generated LaTeX resume into a ResumeDocument in linear time.
+
+    Only the document body is parsed; the preamble's macro definitions are skipped.
+    """
+    begin = content.find("\\begin{document}")
+    if begin != -1:
+        content = content[begin:]
+    return build_document(parse_nodes(content))
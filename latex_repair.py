@@ -0,0 +1,323 @@
+"""Validate generated LaTeX and repair it with small, targeted follow-up requests.
+
+Generation is capped at max_output_tokens, so a long resume can stop short of
+\\end{document}, and one stray or missing brace breaks both the FPDF preview and
+pdflatex. Regenerating the whole document pays for every output token again;
+instead each problem is fixed with a request whose reply is only the missing or
+broken part:
+
+- a truncated document is cut back to the start of its last (possibly partial)
+  section, and the model continues from there to \\end{document};
+- a section whose braces do not balance is sent on its own to be corrected;
+- template sections the source resume has but the document lacks are
+  requested on their own.
+
+A broken preamble is replaced with the template's locally, since the prompt asks
+for it verbatim. A reply is only spliced in when it is whole sections with
+balanced braces; the document is then validated again, up to max_rounds times,
+and repairing stops at the first round in which no reply was usable.
+"""
+import argparse
+import logging
+import re
+from dataclasses import dataclass, field
+
+from gemini_client import estimate_tokens
+from latex_template import RESUME_PREAMBLE
+from streaming import FENCES
+
+logger = logging.getLogger(__name__)
+
+BEGIN_DOCUMENT = "\\begin{document}"
+END_DOCUMENT = "\\end{document}"
+SECTION_PATTERN = re.compile(r'\\section\*?\{([^}]*)\}')
+# Template section title for each canonical name analyze_resume_structure reports
+TEMPLATE_SECTIONS = {
+    "SKILLS": "Technical Skills",
+    "EXPERIENCE": "Experience",
+    "PROJECTS": "Projects",
+    "EDUCATION": "Education",
+}
+MAX_REPAIR_ROUNDS = 2
+# Bump whenever repair_latex output changes, so cached checked documents are redone
+REPAIR_VERSION = 1
+# Characters of the kept text quoted back to the model so it can continue seamlessly
+CONTINUATION_CONTEXT_CHARS = 600
+
+
+def required_sections_for(resume_structure):
+    """Template sections the generated resume must have: those the source resume has."""
+    found = set((resume_structure or {}).get("sections", []))
+    return tuple(title for name, title in TEMPLATE_SECTIONS.items() if name in found)
+
+
+def strip_fences(text):
+    for fence in FENCES:
+        text = text.replace(fence, "")
+    return text
+
+
+def brace_balance(text):
+    """(unclosed, unmatched) brace counts, ignoring escaped braces and % comments."""
+    depth = unmatched = 0
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == "\\":
+            i += 2  # \{, \}, \% and \\ are not structure
+            continue
+        if char == "%":
+            newline = text.find("\n", i)
+            i = len(text) if newline == -1 else newline
+            continue
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            if depth:
+                depth -= 1
+            else:
+                unmatched += 1
+        i += 1
+    return depth, unmatched
+
+
+@dataclass
+class Block:
+    """A span of the document: the preamble, the header, or one section."""
+
+    name: str
+    start: int
+    end: int
+
+
+def split_blocks(text):
+    """Blocks of text in order; sections run to the next \\section or \\end{document}."""
+    begin = text.find(BEGIN_DOCUMENT)
+    if begin == -1:
+        return []
+    body_start = begin + len(BEGIN_DOCUMENT)
+    end = text.find(END_DOCUMENT, body_start)
+    body_end = len(text) if end == -1 else end
+    matches = list(SECTION_PATTERN.finditer(text, body_start, body_end))
+    blocks = [Block("preamble", 0, body_start),
+              Block("header", body_start, matches[0].start() if matches else body_end)]
+    for i, match in enumerate(matches):
+        blocks.append(Block(match.group(1).strip(), match.start(),
+                            matches[i + 1].start() if i + 1 < len(matches) else body_end))
+    return blocks
+
+
+@dataclass
+class LatexCheck:
+    """What is wrong with a generated document, if anything."""
+
+    has_document: bool = True
+    truncated: bool = False
+    unbalanced: list = field(default_factory=list)  # block names
+    missing: list = field(default_factory=list)  # required section titles
+
+    @property
+    def ok(self):
+        return self.has_document and not self.truncated and not self.unbalanced and not self.missing
+
+    def describe(self):
+        if not self.has_document:
+            return "no \\begin{document}"
+        problems = []
+        if self.truncated:
+            problems.append("no \\end{document} (truncated)")
+        if self.unbalanced:
+            problems.append(f"unbalanced braces in {', '.join(self.unbalanced)}")
+        if self.missing:
+            problems.append(f"missing sections {', '.join(self.missing)}")
+        return "; ".join(problems) or "ok"
+
+
+def check_latex(text, required_sections=()):
+    """Check text for \\end{document}, per-block brace balance and the required sections."""
+    blocks = split_blocks(text)
+    if not blocks:
+        return LatexCheck(has_document=False)
+    present = {block.name.lower() for block in blocks[2:]}
+    return LatexCheck(
+        truncated=END_DOCUMENT not in text[blocks[0].end:],
+        unbalanced=[block.name for block in blocks if brace_balance(text[block.start:block.end]) != (0, 0)],
+        missing=[name for name in required_sections if name.lower() not in present],
+    )
+
+
+@dataclass
+class Repair:
+    """One successful repair request (or local fix) and what it cost."""
+
+    kind: str  # "continuation", "section", "missing sections" or "preamble"
+    target: str
+    output_tokens: int
+    full_retry_tokens: int = 0
+
+    @property
+    def tokens_saved(self):
+        return self.full_retry_tokens - self.output_tokens
+
+
+def continuation_prompt(context_prompt, kept_text, sections):
+    return f"""{context_prompt}
+
+Your previous reply was cut off by the output length limit. It has been kept up to this point:
+
+{kept_text[-CONTINUATION_CONTEXT_CHARS:]}
+
+Continue the LaTeX document from exactly that point. Write these sections next: {", ".join(sections)}, then
+\\end{{document}}. Return ONLY the LaTeX that follows, starting with \\section{{{sections[0]}}}. Do not repeat the
+preamble, the header or any section above, and do not include explanations or markdown.
+"""
+
+
+def section_repair_prompt(section_text):
+    unclosed, unmatched = brace_balance(section_text)
+    return f"""The following section of a LaTeX resume does not compile: it has {unclosed} unclosed and
+{unmatched} unmatched closing braces. Fix the braces so every command and group is properly closed,
+changing nothing else. Return ONLY the corrected LaTeX for this section, without explanations or markdown.
+
+{section_text}
+"""
+
+
+def missing_sections_prompt(context_prompt, sections):
+    return f"""{context_prompt}
+
+Your previous reply was complete except that it has no {", ".join(sections)} section(s). Write only those
+sections, in the template's LaTeX format, each starting with \\section{{...}}. Return ONLY that LaTeX, without the
+preamble, \\end{{document}}, explanations or markdown.
+"""
+
+
+def _sections_only(reply):
+    """The reply from its first \\section on, when the model repeated the document start anyway."""
+    reply = strip_fences(reply)
+    if BEGIN_DOCUMENT in reply or "\\documentclass" in reply:
+        start = reply.find("\\section")
+        if start != -1:
+            return reply[start:]
+    return reply
+
+
+def whole_sections(reply, titles=()):
+    """True when reply is one or more complete sections, including every title, with balanced braces."""
+    if not reply.startswith("\\section") or brace_balance(reply) != (0, 0):
+        return False
+    found = {match.group(1).strip().lower() for match in SECTION_PATTERN.finditer(reply)}
+    return all(title.lower() in found for title in titles)
+
+
+def _continue(text, context_prompt, required_sections, generate):
+    blocks = split_blocks(text)
+    sections = blocks[2:]
+    # The last section may stop mid-item, so it is regenerated whole
+    cut = sections[-1].start if sections else len(text)
+    kept = text[:cut].rstrip() + "\n"
+    kept_titles = {block.name.lower() for block in sections[:-1]}
+    wanted = ([sections[-1].name] if sections else []) + [
+        name for name in required_sections
+        if name.lower() not in kept_titles and (not sections or name.lower() != sections[-1].name.lower())]
+    if not wanted:
+        # No sections and none required: closing the document is all that is left
+        return text.rstrip() + "\n\n" + END_DOCUMENT + "\n", [Repair("continuation", END_DOCUMENT, 0)]
+    reply, output_tokens = generate(continuation_prompt(context_prompt, kept, wanted))
+    reply = _sections_only(reply).split(END_DOCUMENT, 1)[0].strip()
+    if not whole_sections(reply, wanted):
+        logger.warning("Continuation reply is not the sections %s; keeping the truncated document.",
+                       ", ".join(wanted))
+        return text, []
+    return (kept + "\n" + reply + "\n\n" + END_DOCUMENT + "\n",
+            [Repair("continuation", wanted[0], output_tokens or estimate_tokens(reply))])
+
+
+def _fix_blocks(text, names, generate):
+    repairs = []
+    # Splice from the end so earlier offsets stay valid
+    for block in reversed([block for block in split_blocks(text) if block.name in names]):
+        if block.name == "preamble":
+            replacement = RESUME_PREAMBLE.rstrip() + "\n\n" + BEGIN_DOCUMENT
+            repairs.append(Repair("preamble", block.name, 0))
+        elif block.name == "header":
+            continue  # no section of its own to ask for; left to pdflatex's error report
+        else:
+            reply, output_tokens = generate(section_repair_prompt(text[block.start:block.end]))
+            reply = _sections_only(reply).strip()
+            if not whole_sections(reply, [block.name]):
+                logger.warning("Repair of '%s' is not a balanced section; keeping the original.", block.name)
+                continue
+            replacement = reply + "\n\n"
+            repairs.append(Repair("section", block.name, output_tokens or estimate_tokens(reply)))
+        text = text[:block.start] + replacement + text[block.end:]
+    return text, repairs
+
+
+def _add_missing(text, context_prompt, missing, generate):
+    reply, output_tokens = generate(missing_sections_prompt(context_prompt, missing))
+    reply = _sections_only(reply).replace(END_DOCUMENT, "").strip()
+    if not whole_sections(reply, missing):
+        logger.warning("Reply for missing sections %s is not those sections; leaving them out.",
+                       ", ".join(missing))
+        return text, []
+    end = text.rfind(END_DOCUMENT)
+    text = text[:end].rstrip() + "\n\n" + reply + "\n\n" + text[end:]
+    return text, [Repair("missing sections", ", ".join(missing), output_tokens or estimate_tokens(reply))]
+
+
+def repair_latex(text, generate, context_prompt, required_sections=(), max_rounds=MAX_REPAIR_ROUNDS):
+    """Validate text and repair it; returns (text, LatexCheck of the result, [Repair]).
+
+    generate(prompt) sends one request and returns (reply text, output tokens or
+    None). context_prompt is the original generation prompt; continuation and
+    missing-section requests repeat it so the model has the resume to write from,
+    while their replies carry only the missing part. required_sections should only
+    name sections the source resume has (see required_sections_for). Only usable
+    replies are spliced in and reported; a failing request stops the repair and
+    the document is returned as it stands.
+    """
+    text = strip_fences(text)
+    repairs = []
+    check = check_latex(text, required_sections)
+    for _ in range(max_rounds):
+        if check.ok or not check.has_document:
+            break
+        logger.info("Generated LaTeX needs repair: %s", check.describe())
+        fixed = []
+        try:
+            if check.truncated:
+                text, fixed = _continue(text, context_prompt, required_sections, generate)
+            else:
+                if check.unbalanced:
+                    text, fixed = _fix_blocks(text, set(check.unbalanced), generate)
+                if check.missing:
+                    text, added = _add_missing(text, context_prompt, check.missing, generate)
+                    fixed += added
+        except Exception as e:
+            logger.warning("LaTeX repair request failed: %s", e)
+        repairs += fixed
+        check = check_latex(text, required_sections)
+        if not fixed:
+            break  # asking again would most likely get the same unusable reply
+
+    # A full retry would have cost the whole finished document in output tokens
+    full_retry_tokens = estimate_tokens(text)
+    for repair in repairs:
+        repair.full_retry_tokens = full_retry_tokens
+        logger.info("  - Repaired %s (%s): %d output tokens vs ~%d for a full retry (%d saved)",
+                    repair.target, repair.kind, repair.output_tokens, repair.full_retry_tokens, repair.tokens_saved)
+    return text, check, repairs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check a generated .tex for truncation, braces and sections.")
+    parser.add_argument("tex")
+    parser.add_argument("--require", action="append", default=[], metavar="TITLE",
+                        help="a section the document must have (repeatable)")
+    args = parser.parse_args()
+
+    with open(args.tex, "r", encoding="utf-8") as file:
+        result = check_latex(strip_fences(file.read()), args.require)
+    print(result.describe())
+    raise SystemExit(0 if result.ok else 1)
@@ -1,28 +1,252 @@
+import json
+import logging
 import os
-import PyPDF2
-import google.generativeai as genai
+import sys
 from pathlib import Path
-from fpdf import FPDF
 import re
-
-def process_resume(resume_path, output_folder, job_desc_path, additional_details_path=None):
-    """Process a resume with optimization and return result status"""
-    print("Starting resume optimization process...")
+import shutil
+import textwrap
+from functools import lru_cache
+from pdf_cache import ExtractionCache
+from candidate_profile import PROFILE_VERSION, ProfileStore, build_profile, profile_key
+from pipeline import MANIFEST_NAME, Manifest, Pipeline, Stage, file_digest, text_digest
+from pdf_pages import iter_pages
+from response_cache import get_default_cache, prompt_cache_key
+from gemini_client import default_client_available, get_default_client
+from streaming import MalformedStreamError, StreamingResumeWriter
+from latex_template import RESUME_PREAMBLE
+from latex_compile import compile_tex, get_default_format
+from prompt_budget import budget_prompt_inputs
+from latex_repair import REPAIR_VERSION, repair_latex, required_sections_for
+from latex_parser import Item, Paragraph, ProjectHeading, SkillLine, Subheading, parse_resume
+from telemetry import span
+from resume_json import RESUME_JSON_SCHEMA, ResumeSchemaError, document_from_json, parse_resume_json, render_latex
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever extract_from_pdf or analyze_resume_structure output changes,
+# so stale entries in the extraction cache are never served.
+EXTRACTOR_VERSION = 2
+
+DEFAULT_OUTPUT_NAME = "MicroLED_Display_Product_Engineer"
+
+# Stages reported to process_resume's progress callback, in order
+PIPELINE_STAGES = ("extract", "profile", "generate", "preview", "compile")
+
+# Bump when the prompt builders or the FPDF preview change, so incremental runs
+# regenerate or re-render outputs built by the old code
+PROMPT_VERSION = 2
+PREVIEW_VERSION = 3
+
+# The template preamble as it appears (indented) inside the prompt
+PROMPT_PREAMBLE = textwrap.indent(RESUME_PREAMBLE, " " * 8)
+
+GEMINI_MODEL_NAME = "gemini-2.0-flash"
+
+# Set generation config to allow for larger responses
+GENERATION_CONFIG = {
+    "max_output_tokens": 8192,  # Maximum token limit to ensure all content is processed
+    "temperature": 0.2,         # Lower temperature for more focused output
+}
+
+# JSON mode: the model returns only resume content and the LaTeX is rendered locally
+JSON_GENERATION_CONFIG = {**GENERATION_CONFIG, "response_mime_type": "application/json"}
+
+# Safety settings adjusted for resume content
+SAFETY_SETTINGS = [
+    {
+        "category": "HARM_CATEGORY_HARASSMENT",
+        "threshold": "BLOCK_ONLY_HIGH"
+    },
+    {
+        "category": "HARM_CATEGORY_HATE_SPEECH",
+        "threshold": "BLOCK_ONLY_HIGH"
+    },
+    {
+        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+        "threshold": "BLOCK_ONLY_HIGH"
+    },
+    {
+        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+        "threshold": "BLOCK_ONLY_HIGH"
+    },
+]
+
+def process_resume(resume_path, output_folder, job_desc_path, additional_details_path=None, output_name=None,
+                   use_cache=True, stream=False, token_budget=None, progress=None, json_mode=False,
+                   use_profile=True, stop_after=None, force=False, dry_run=False, cancel=None):
+    """Process a resume with optimization and return result status
+
+    progress, if given, is called as progress(stage, state) with stage one of
+    PIPELINE_STAGES and state "running", "done", "failed" or "skipped".
+
+    With use_profile the prompt is built from the persisted candidate profile
+    (condensed resume, contact details and additional details) rather than the raw
+    extracted text; see candidate_profile.py.
+
+    With json_mode the model returns the resume as JSON; the .tex and the preview
+    are both rendered locally from it, and the JSON is saved next to them.
+
+    stop_after names a stage in PIPELINE_STAGES after which to stop, e.g.
+    "generate" to write the .tex without rendering or compiling it.
+
+    Stages are incremental: a manifest in output_folder records what each stage
+    was built from, and stages whose inputs are unchanged are skipped (see
+    pipeline.py). force reruns everything; dry_run only logs what would run.
+    cancel is an optional threading.Event; setting it stops the run before the
+    next stage starts.
+    """
+    with span("process_resume", resume=Path(resume_path).name, stream=stream, json_mode=json_mode) as root:
+        ok = _process_resume(Path(resume_path), Path(output_folder), job_desc_path, additional_details_path,
+                             output_name, use_cache, stream, token_budget, progress, json_mode, use_profile,
+                             stop_after, force, dry_run, cancel)
+        root.set("ok", ok)
+    return ok
+
+def _process_resume(resume_path, output_folder, job_desc_path, additional_details_path, output_name,
+                    use_cache, stream, token_budget, progress, json_mode, use_profile, stop_after, force, dry_run,
+                    cancel):
+    logger.info("Starting resume optimization process...")
 
     # Create output folder if it doesn't exist
-    if not output_folder.exists():
+    if not output_folder.exists() and not dry_run:
         os.makedirs(output_folder)
-        print(f"Created '{output_folder}' folder for optimized resumes.")
+        logger.info("Created '%s' folder for optimized resumes.", output_folder)
 
-    print(f"Processing resume: {resume_path.name}")
+    logger.info("Processing resume: %s", resume_path.name)
 
     # Ensure job description file exists
     job_desc_path = Path(job_desc_path)
     if not job_desc_path.exists():
-        print(f"Job description file {job_desc_path} not found.")
+        logger.error("Job description file %s not found.", job_desc_path)
         return False
 
     # Check for additional details file
+    additional_details = read_additional_details(additional_details_path)
+
+    job_title = output_name or DEFAULT_OUTPUT_NAME
+    tex_path = output_folder / f"{job_title}.tex"
+    json_path = output_folder / f"{job_title}.json"
+    pdf_path = output_folder / f"{job_title}.pdf"
+    # The preview has its own file, so re-rendering it never replaces a pdflatex PDF
+    preview_path = output_folder / f"{job_title}.preview.pdf"
+
+    if json_mode and stream:
+        logger.warning("Streaming is not available in JSON mode; generating the full response instead.")
+        stream = False
+
+    def extract_stage(pipeline):
+        # Extract text and analyze structure from resume
+        resume_text, resume_structure = extract_from_pdf(resume_path, use_cache=use_cache)
+        if not resume_text:
+            logger.error("Failed to extract text from the resume.")
+            return None
+        return resume_text, resume_structure
+
+    def profile_stage(pipeline):
+        extracted = pipeline.value("extract")
+        if extracted is None:
+            return None
+        resume_text, resume_structure = extracted
+        if not use_profile:
+            return resume_text, resume_structure, additional_details, None
+        profile = load_candidate_profile(resume_text, resume_structure, additional_details, use_cache=use_cache)
+        return (*profile.prompt_inputs(), profile.contact_fields())
+
+    def generate_stage(pipeline):
+        prompt_inputs = pipeline.value("profile")
+        if prompt_inputs is None:
+            return None
+        resume_text, resume_structure, details, contact = prompt_inputs
+        # Read job description
+        with open(job_desc_path, "r", encoding="utf-8") as file:
+            job_description = file.read()
+
+        if json_mode:
+            data = optimize_resume_json(resume_text, resume_structure, job_description, details,
+                                        use_cache=use_cache, token_budget=token_budget, contact=contact)
+            optimized_resume = None
+            if data:
+                with open(json_path, "w", encoding="utf-8") as file:
+                    json.dump(data, file, indent=2)
+                optimized_resume = render_latex(document_from_json(data))
+        elif stream:
+            # Write the .tex and preview sections as the response arrives
+            optimized_resume = optimize_resume_streaming(resume_text, resume_structure, job_description, details,
+                                                         tex_path, preview_path, use_cache=use_cache,
+                                                         token_budget=token_budget, contact=contact)
+        else:
+            # Optimize resume using Google Gemini
+            optimized_resume = optimize_resume_with_gemini(resume_text, resume_structure, job_description,
+                                                           details, use_cache=use_cache,
+                                                           token_budget=token_budget, contact=contact)
+        if not optimized_resume:
+            logger.error("Failed to optimize the resume.")
+            return None
+        if not stream:
+            # Save as .tex file for LaTeX processing with job title as filename
+            write_tex_file(optimized_resume, tex_path)
+        logger.info("Optimized resume saved to: %s", tex_path)
+        return tex_path
+
+    def preview_stage(pipeline):
+        # Generate PDF from the optimized resume content using our built-in method
+        try:
+            if json_mode:
+                # One structure feeds both renderers
+                with open(json_path, "r", encoding="utf-8") as file:
+                    render_document_pdf(document_from_json(parse_resume_json(file.read())), preview_path)
+            else:
+                with open(tex_path, "r", encoding="utf-8") as file:
+                    render_preview_pdf(file.read(), preview_path)
+        except Exception as e:
+            logger.error("Error creating PDF: %s", e)
+            return None
+        logger.info("PDF preview created at: %s", preview_path)
+        return preview_path
+
+    def compile_stage(pipeline):
+        # Compile the .tex file to create a proper LaTeX PDF; the preview PDF still
+        # stands in when pdflatex is unavailable, so this is not fatal
+        if compile_latex(tex_path, output_folder):
+            return True
+        if preview_path.exists():
+            shutil.copyfile(preview_path, pdf_path)
+        return False
+
+    stages = [
+        Stage("extract", lambda: {"resume": file_digest(resume_path), "version": EXTRACTOR_VERSION},
+              extract_stage),
+        Stage("profile", lambda: {"additional_details": text_digest(additional_details),
+                                  "use_profile": use_profile, "version": PROFILE_VERSION},
+              profile_stage, deps=("extract",)),
+        Stage("generate", lambda: {"job_description": file_digest(job_desc_path), "model": GEMINI_MODEL_NAME,
+                                   "generation_config": JSON_GENERATION_CONFIG if json_mode else GENERATION_CONFIG,
+                                   "safety_settings": SAFETY_SETTINGS, "json_mode": json_mode,
+                                   "token_budget": token_budget, "version": PROMPT_VERSION},
+              generate_stage, deps=("profile",), outputs=lambda: [tex_path, json_path] if json_mode else [tex_path]),
+        Stage("preview", lambda: {"source": file_digest(json_path if json_mode else tex_path),
+                                  "version": PREVIEW_VERSION},
+              preview_stage, deps=("generate",), outputs=lambda: [preview_path], required=False),
+        Stage("compile", lambda: {"tex": file_digest(tex_path)},
+              compile_stage, deps=("generate",), outputs=lambda: [pdf_path], required=False),
+    ]
+    pipeline = Pipeline(stages, Manifest(output_folder / MANIFEST_NAME), job_title, force=force, dry_run=dry_run,
+                        progress=progress, cancel=cancel)
+    results = pipeline.run(until=stop_after)
+
+    for result in results:
+        detail = f" ({', '.join(result.reasons)})" if result.reasons else ""
+        logger.info("  %-9s %s%s", result.name, result.action, detail)
+    if dry_run:
+        return True
+    ok = pipeline.ok(results)
+    if ok:
+        logger.info("Resume optimization complete!")
+    return ok
+
+def read_additional_details(additional_details_path):
+    """Read the optional additional details file, falling back to latin-1 for odd encodings."""
     additional_details = ""
     if additional_details_path:
         additional_details_path = Path(additional_details_path)
@@ -31,107 +255,266 @@ def process_resume(resume_path, output_folder, job_desc_path, additional_details
                 # Try UTF-8 first
                 with open(additional_details_path, "r", encoding="utf-8") as file:
                     additional_details = file.read()
-                print("Found additional details file. This information will be incorporated into the resume.")
+                logger.info("Found additional details file. This information will be incorporated into the resume.")
             except UnicodeDecodeError:
                 # Fall back to latin-1 which can read any byte value
                 with open(additional_details_path, "r", encoding="latin-1") as file:
                     additional_details = file.read()
-                print("Found additional details file (using alternate encoding). This information will be incorporated into the resume.")
+                logger.info("Found additional details file (using alternate encoding). "
+                            "This information will be incorporated into the resume.")
+    return additional_details
 
-
-    # Extract text and analyze structure from resume
-    resume_text, resume_structure = extract_from_pdf(resume_path)
-    if not resume_text:
-        print("Failed to extract text from the resume.")
-        return False
-
-    # Read job description
-    with open(job_desc_path, "r", encoding="utf-8") as file:
-        job_description = file.read()
-
-    # Optimize resume using Google Gemini
-    optimized_resume = optimize_resume_with_gemini(resume_text, resume_structure, job_description, additional_details)
-    if not optimized_resume:
-        print("Failed to optimize the resume.")
-        return False
-
-    # Save as .tex file for LaTeX processing with job title as filename
-    job_title = "MicroLED_Display_Product_Engineer"
-    tex_path = output_folder / f"{job_title}.tex"
+def write_tex_file(optimized_resume, tex_path):
+    """Write the model output to a .tex file, stripping any markdown fences."""
     # Remove any markdown backticks if present in the optimized resume
     clean_resume = optimized_resume.replace("```latex", "").replace("```", "")
     with open(tex_path, "w", encoding="utf-8") as file:
         file.write(clean_resume)
+    return tex_path
+
+def compile_latex(tex_path, output_folder):
+    """Compile a .tex file with pdflatex into output_folder. Returns True on success.
+
+    Runs in an isolated temp directory against the precompiled template preamble
+    when the document's preamble is unchanged.
+    """
+    logger.info("Attempting to compile LaTeX file to PDF...")
+    result = compile_tex(tex_path, output_folder, get_default_format())
+    if result.ok:
+        mode = "precompiled preamble" if result.used_format else "full preamble"
+        logger.info("LaTeX compilation successful in %.2fs (%s). PDF created at: %s",
+                    result.seconds, mode, result.pdf_path)
+        return True
+    logger.warning("LaTeX compilation had issues. Using basic PDF version instead.")
+    logger.warning("Error details: %s", result.error)
+    return False
+
+def extract_from_pdf(pdf_path, use_cache=True, workers=None):
+    """Extract text from a PDF file and analyze its structure.
+
+    Large PDFs are extracted in page ranges across a process pool; workers=1 forces
+    serial extraction.
+    """
+    with span("extract", pdf=Path(pdf_path).name) as stage:
+        text, structure = _extract_from_pdf(pdf_path, use_cache, workers, stage)
+        stage.update(ok=text is not None, chars=len(text or ""))
+    return text, structure
+
+def _extract_from_pdf(pdf_path, use_cache, workers, stage):
+    cache = ExtractionCache() if use_cache else None
+    cache_key = None
+    if cache:
+        try:
+            cache_key = cache.key(pdf_path, EXTRACTOR_VERSION)
+            cached = cache.get(cache_key)
+            stage.set("cache_hit", bool(cached))
+            if cached:
+                logger.info("Using cached extraction for PDF: %s", pdf_path)
+                return cached
+        except OSError as e:
+            logger.warning("Extraction cache unavailable: %s", e)
+            cache = None
 
-    print(f"Optimized resume saved to: {tex_path}")
-    print("Resume optimization complete!")
-
-    # Generate PDF from the optimized resume content using our built-in method
-    pdf_path = create_pdf_resume(optimized_resume, output_folder / f"{job_title}.pdf")
-    print(f"PDF preview created at: {pdf_path}")
-
-    # Compile the .tex file to create a proper LaTeX PDF
     try:
-        import subprocess
-        print("Attempting to compile LaTeX file to PDF...")
-        cmd = ["pdflatex", "-output-directory", str(output_folder), str(tex_path)]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f"LaTeX compilation successful. PDF created at: {output_folder}/{job_title}.pdf")
-        else:
-            print("LaTeX compilation had issues. Using basic PDF version instead.")
-            print(f"Error details: {result.stderr}")
-    except Exception as e:
-        print(f"Could not compile LaTeX: {e}")
-        print("Using basic PDF version instead.")
-    return True
+        logger.info("Extracting text from PDF: %s", pdf_path)
+        pages = []
+        for i, page_text in iter_pages(pdf_path, workers=workers):
+            pages.append(page_text + "\n")
+            logger.debug("  - Extracted %d characters from page %d", len(page_text), i + 1)
+        text = "".join(pages)
+        stage.set("pages", len(pages))
+
+        # Analyze resume structure (sections, formatting, etc.)
+        structure = analyze_resume_structure(text)
+        logger.info("  - Identified %d sections in the resume", len(structure['sections']))
 
-def extract_from_pdf(pdf_path):
-    """Extract text from a PDF file and analyze its structure."""
-    try:
-        print(f"Extracting text from PDF: {pdf_path}")
-        with open(pdf_path, "rb") as file:
-            reader = PyPDF2.PdfReader(file)
-            text = ""
-            for i, page in enumerate(reader.pages):
-                page_text = page.extract_text()
-                text += page_text + "\n"
-                print(f"  - Extracted {len(page_text)} characters from page {i+1}")
-
-            # Analyze resume structure (sections, formatting, etc.)
-            structure = analyze_resume_structure(text)
-            print(f"  - Identified {len(structure['sections'])} sections in the resume")
-
-            return text, structure
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
-        print("Please check if the PDF is valid and not encrypted.")
+        logger.error("Error extracting text from PDF: %s", e)
+        logger.error("Please check if the PDF is valid and not encrypted.")
         return None, None
 
-def analyze_resume_structure(text):
-    """Analyze the structure of the resume to preserve formatting."""
+    if cache and cache_key:
+        try:
+            cache.put(cache_key, text, structure, source=pdf_path)
+        except OSError as e:
+            logger.warning("Could not write extraction cache: %s", e)
+    return text, structure
+
+def load_candidate_profile(resume_text, resume_structure, additional_details, use_cache=True):
+    """Return the CandidateProfile for this resume text and additional details.
+
+    Profiles are stored under .cache/profiles, so tailoring the same candidate to
+    further job descriptions reads the stored one instead of rebuilding it.
+    """
+    with span("profile") as stage:
+        store = ProfileStore() if use_cache else None
+        key = None
+        if store:
+            key = profile_key(resume_text, additional_details, resume_structure, EXTRACTOR_VERSION)
+            profile = store.get(key)
+            stage.set("cache_hit", profile is not None)
+            if profile:
+                logger.info("Using stored candidate profile.")
+                return profile
+
+        profile = build_profile(resume_text, resume_structure, additional_details, EXTRACTOR_VERSION)
+        stage.update(source_tokens=profile.source_tokens, profile_tokens=profile.profile_tokens)
+        logger.info("  - Built candidate profile: %d skills, ~%d tokens (was ~%d)",
+                    len(profile.skills), profile.profile_tokens, profile.source_tokens)
+        if store:
+            try:
+                store.put(profile)
+            except OSError as e:
+                logger.warning("Could not store candidate profile: %s", e)
+        return profile
+
+# Canonical section names (in reporting order) and the header synonyms that map to them.
+# The canonical name counts wherever it appears; synonyms only count as header lines.
+SECTION_VOCABULARY = {
+    "EXPERIENCE": ["WORK EXPERIENCE", "PROFESSIONAL EXPERIENCE", "WORK HISTORY", "EMPLOYMENT HISTORY", "EMPLOYMENT"],
+    "EDUCATION": ["ACADEMIC BACKGROUND", "ACADEMICS", "QUALIFICATIONS"],
+    "SKILLS": ["TECHNICAL SKILLS", "CORE COMPETENCIES", "COMPETENCIES", "TECHNOLOGIES"],
+    "PROJECTS": ["PERSONAL PROJECTS", "ACADEMIC PROJECTS", "SELECTED PROJECTS"],
+    "CERTIFICATIONS": ["CERTIFICATES", "LICENSES", "LICENSES & CERTIFICATIONS"],
+    "SUMMARY": ["PROFESSIONAL SUMMARY", "PROFILE", "ABOUT ME"],
+    "OBJECTIVE": ["CAREER OBJECTIVE"],
+    "CONTACT": ["CONTACT INFORMATION", "PERSONAL DETAILS"],
+    "REFERENCES": [],
+    "PUBLICATIONS": ["RESEARCH", "PAPERS"],
+}
+HEADER_TRIM_CHARS = " \t:•-|#*_"
+
+
+def _trie_pattern(terms):
+    """Regex alternation of terms factored by shared prefixes.
+
+    Python's re tries every branch of a flat alternation at each position; a trie
+    lets it rule out most positions on the first character. Optional tails are
+    greedy, so the longest term still wins ("work experience" over "work").
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+@lru_cache(maxsize=16)
+def _section_matcher(vocabulary):
+    """Compile one alternation over every canonical name and synonym (lower case)."""
+    lookup = {}
+    for canonical, synonyms in vocabulary:
+        lookup[canonical.lower()] = canonical
+        for synonym in synonyms:
+            lookup.setdefault(synonym.lower(), canonical)
+    alternation = _trie_pattern(lookup)
+    pattern = re.compile(r'\b' + alternation + r'\b')
+    # Fallback for text whose lower-cased form has a different length
+    ignore_case_pattern = re.compile(r'(?i)\b' + alternation + r'\b')
+    # Terms that contain the canonical word itself count anywhere, like the bare word
+    anywhere = {t for t in lookup if re.search(r'\b' + re.escape(lookup[t].lower()) + r'\b', t)}
+    return pattern, ignore_case_pattern, lookup, anywhere
+
+
+def _merge_vocabulary(extra_headers):
+    vocabulary = {name: list(synonyms) for name, synonyms in SECTION_VOCABULARY.items()}
+    for name, synonyms in (extra_headers or {}).items():
+        vocabulary.setdefault(name.upper(), []).extend(synonyms)
+    return tuple((name, tuple(synonyms)) for name, synonyms in vocabulary.items())
+
+
+def find_section_spans(text, extra_headers=None):
+    """Scan text once for section headers.
+
+    Returns (names, spans): names are canonical sections seen anywhere, in vocabulary
+    order; spans cover each header line up to the next header, with character
+    offsets (end exclusive) and 1-based inclusive line numbers.
+    """
+    vocabulary = _merge_vocabulary(extra_headers)
+    pattern, ignore_case_pattern, lookup, anywhere = _section_matcher(vocabulary)
+    # Matching lower-cased text is much faster than (?i), but only safe when
+    # lower-casing keeps every character offset in place
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        matches = pattern.finditer(lowered)
+    else:
+        matches = ignore_case_pattern.finditer(text)
+
+    found = set()
+    headers = []
+    line_number, counted_to = 1, 0
+    last_header_line = -1
+    for match in matches:
+        term = match.group().lower()
+        canonical = lookup[term]
+        if term in anywhere:
+            found.add(canonical)
+
+        line_start = text.rfind("\n", 0, match.start()) + 1
+        line_end = text.find("\n", match.end())
+        line_end = len(text) if line_end == -1 else line_end
+        if text[line_start:line_end].strip(HEADER_TRIM_CHARS).lower() != term or line_start == last_header_line:
+            continue
+        found.add(canonical)
+        last_header_line = line_start
+        line_number += text.count("\n", counted_to, line_start)
+        counted_to = line_start
+        headers.append((canonical, text[match.start():match.end()], line_start, line_number))
+
+    spans = []
+    total_lines = text.count("\n", counted_to) + line_number
+    for index, (canonical, header, start, line) in enumerate(headers):
+        if index + 1 < len(headers):
+            end, next_line = headers[index + 1][2], headers[index + 1][3]
+        else:
+            end, next_line = len(text), total_lines + 1
+        spans.append({
+            "name": canonical,
+            "header": header,
+            "start": start,
+            "end": end,
+            "line_start": line,
+            "line_end": max(line, next_line - 1),
+        })
+
+    names = [name for name, _ in vocabulary if name in found]
+    return names, spans
+
+
+def analyze_resume_structure(text, extra_headers=None):
+    """Analyze the structure of the resume to preserve formatting.
+
+    extra_headers maps canonical section names to additional header synonyms, e.g.
+    {"EXPERIENCE": ["Industry Roles"]}. New canonical names are allowed too.
+    """
     structure = {
         "sections": [],
+        "section_spans": [],
         "has_bullet_points": False,
         "has_tables": False,
         "indentation_style": "unknown"
     }
 
-    # Look for common section headers
-    common_sections = ["EXPERIENCE", "EDUCATION", "SKILLS", "PROJECTS", "CERTIFICATIONS", 
-                       "SUMMARY", "OBJECTIVE", "CONTACT", "REFERENCES", "PUBLICATIONS"]
-
-    for section in common_sections:
-        if re.search(r'(?i)\b' + section + r'\b', text):
-            structure["sections"].append(section)
+    # Look for common section headers in a single pass
+    structure["sections"], structure["section_spans"] = find_section_spans(text, extra_headers)
 
     # Check for bullet points
     if re.search(r'[•●■◦○◘►▪▫▸▹◆]', text):
         structure["has_bullet_points"] = True
 
     # Check for potential table structures (multiple consecutive lines with similar patterns)
-    table_pattern = re.findall(r'(.+)\n(.+)\n(.+)', text)
-    if table_pattern and len(set(len(line.split()) for line in table_pattern[0])) <= 2:
+    table_match = re.search(r'(.+)\n(.+)\n(.+)', text)
+    if table_match and len(set(len(line.split()) for line in table_match.groups())) <= 2:
         structure["has_tables"] = True
 
     # Try to determine indentation style
@@ -142,52 +525,35 @@ def analyze_resume_structure(text):
 
     return structure
 
-def optimize_resume_with_gemini(resume_text, resume_structure, job_description, additional_details):
-    """Use Google Gemini API to optimize the resume based on job description and convert to LaTeX format."""
-    try:
-        # Get Google Gemini API key from environment variables
-        api_key = os.environ.get("GEMINI_API_KEY")
-
-        if not api_key:
-            print("\nError: GEMINI_API_KEY not found in environment variables.")
-            print("Please add your Gemini API key using the Secrets tool.")
-            print("Go to https://makersuite.google.com/app/apikey to get your API key.")
-            print("Then add it to the Secrets tool in Replit.")
-
-            # For testing purposes, you can uncomment and use this line with your actual API key
-            # api_key = "YOUR_GEMINI_API_KEY_HERE"
-
-            return None
-
-        # Configure the Gemini API with increased response size
-        print("Configuring Gemini API...")
-        genai.configure(api_key=api_key)
-        
-        # Set generation config to allow for larger responses
-        generation_config = {
-            "max_output_tokens": 8192,  # Maximum token limit to ensure all content is processed
-            "temperature": 0.2,         # Lower temperature for more focused output
-        }
+def extract_contact_details(resume_text):
+    """Best-effort (name, email, linkedin, github) from resume text, with placeholders."""
+    # Extract name and contact information from resume_text
+    name_match = re.search(r'^([A-Za-z\s]+)', resume_text)
+    name = name_match.group(1).strip() if name_match else "Name"
 
-        # Create a detailed prompt for the Gemini API
-        sections_str = ", ".join(resume_structure["sections"])
+    # Try to find email in the resume
+    email_match = re.search(r'([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)', resume_text)
+    email = email_match.group(1) if email_match else "email@example.com"
 
-        # Extract name and contact information from resume_text
-        name_match = re.search(r'^([A-Za-z\s]+)', resume_text)
-        name = name_match.group(1).strip() if name_match else "Name"
+    # Try to find LinkedIn and GitHub links
+    linkedin_match = re.search(r'linkedin\.com/in/([a-zA-Z0-9_-]+)', resume_text)
+    linkedin = linkedin_match.group(0) if linkedin_match else "linkedin.com/in/username"
 
-        # Try to find email in the resume
-        email_match = re.search(r'([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)', resume_text)
-        email = email_match.group(1) if email_match else "email@example.com"
+    github_match = re.search(r'github\.com/([a-zA-Z0-9_-]+)', resume_text)
+    github = github_match.group(0) if github_match else "github.com/username"
+    return name, email, linkedin, github
 
-        # Try to find LinkedIn and GitHub links
-        linkedin_match = re.search(r'linkedin\.com/in/([a-zA-Z0-9_-]+)', resume_text)
-        linkedin = linkedin_match.group(0) if linkedin_match else "linkedin.com/in/username"
+def build_resume_prompt(resume_text, resume_structure, job_description, additional_details, contact=None):
+    """Build the full Gemini prompt for tailoring a resume to a job description.
 
-        github_match = re.search(r'github\.com/([a-zA-Z0-9_-]+)', resume_text)
-        github = github_match.group(0) if github_match else "github.com/username"
+    contact is (name, email, linkedin, github), e.g. from a candidate profile;
+    without it the details are searched for in resume_text.
+    """
+    # Create a detailed prompt for the Gemini API
+    sections_str = ", ".join(resume_structure["sections"])
+    name, email, linkedin, github = contact or extract_contact_details(resume_text)
 
-        prompt = f"""
+    prompt = f"""
 Process the ENTIRE resume content provided below. Go through ALL projects, skills, certifications, and experiences in the resume. Don't limit yourself to just the first few items.
 
 Generate a highly optimized, ATS-friendly resume in LaTeX format following the exact template provided. Extract ALL relevant details from the given resume and align them perfectly with the job description, ensuring that the most relevant skills, projects, and experiences are highlighted. Prioritize high-impact keywords to maximize ATS compatibility.
@@ -215,96 +581,7 @@ Ensure the final resume is formatted professionally, is easy to read, and effect
 
         Convert this resume to the following LaTeX format and structure, maintaining this exact format including preamble and document class settings:
 
-        %-------------------------
-        % Resume in Latex
-        % Author : Jake Gutierrez
-        % Based off of: https://github.com/sb2nov/resume
-        % License : MIT
-        %------------------------
-
-        \\documentclass[letterpaper,11pt]{{article}}
-
-        \\usepackage{{latexsym}}
-        \\usepackage[empty]{{fullpage}}
-        \\usepackage{{titlesec}}
-        \\usepackage{{marvosym}}
-        \\usepackage[usenames,dvipsnames]{{color}}
-        \\usepackage{{verbatim}}
-        \\usepackage{{enumitem}}
-        \\usepackage[hidelinks]{{hyperref}}
-        \\usepackage{{fancyhdr}}
-        \\usepackage[english]{{babel}}
-        \\usepackage{{tabularx}}
-        \\input{{glyphtounicode}}
-
-        \\pagestyle{{fancy}}
-        \\fancyhf{{}} % clear all header and footer fields
-        \\fancyfoot{{}}
-        \\renewcommand{{\\headrulewidth}}{{0pt}}
-        \\renewcommand{{\\footrulewidth}}{{0pt}}
-
-        % Adjust margins
-        \\addtolength{{\\oddsidemargin}}{{-0.5in}}
-        \\addtolength{{\\evensidemargin}}{{-0.5in}}
-        \\addtolength{{\\textwidth}}{{1in}}
-        \\addtolength{{\\topmargin}}{{-.5in}}
-        \\addtolength{{\\textheight}}{{1.0in}}
-
-        \\urlstyle{{same}}
-
-        \\raggedbottom
-        \\raggedright
-        \\setlength{{\\tabcolsep}}{{0in}}
-
-        % Sections formatting
-        \\titleformat{{\\section}}{{
-          \\vspace{{-4pt}}\\scshape\\raggedright\\large
-        }}{{}}{{0em}}{{}}[\\color{{black}}\\titlerule \\vspace{{-5pt}}]
-
-        % Ensure that generate pdf is machine readable/ATS parsable
-        \\pdfgentounicode=1
-
-        %-------------------------
-        % Custom commands
-        \\newcommand{{\\resumeItem}}[1]{{
-          \\item\\small{{
-            {{#1 \\vspace{{-2pt}}}}
-          }}
-        }}
-
-        \\newcommand{{\\resumeSubheading}}[4]{{
-          \\vspace{{-2pt}}\\item
-            \\begin{{tabular*}}{{0.97\\textwidth}}[t]{{l@{{\\extracolsep{{\\fill}}}}r}}
-              \\textbf{{#1}} & #2 \\\\
-              \\textit{{\\small#3}} & \\textit{{\\small #4}} \\\\
-            \\end{{tabular*}}\\vspace{{-7pt}}
-        }}
-
-        \\newcommand{{\\resumeSubSubheading}}[2]{{
-            \\item
-            \\begin{{tabular*}}{{0.97\\textwidth}}{{l@{{\\extracolsep{{\\fill}}}}r}}
-              \\textit{{\\small#1}} & \\textit{{\\small #2}} \\\\
-            \\end{{tabular*}}\\vspace{{-7pt}}
-        }}
-
-        \\newcommand{{\\resumeProjectHeading}}[2]{{
-            \\item
-            \\begin{{tabular*}}{{0.97\\textwidth}}{{l@{{\\extracolsep{{\\fill}}}}r}}
-              \\small#1 & #2 \\\\
-            \\end{{tabular*}}\\vspace{{-7pt}}
-        }}
-
-        \\newcommand{{\\resumeSubItem}}[1]{{\\resumeItem{{#1}}\\vspace{{-4pt}}}}
-
-        \\renewcommand\\labelitemii{{$\\vcenter{{\\hbox{{\\tiny$\\bullet$}}}}$}}
-
-        \\newcommand{{\\resumeSubHeadingListStart}}{{\\begin{{itemize}}[leftmargin=0.15in, label={{}}]}}
-        \\newcommand{{\\resumeSubHeadingListEnd}}{{\\end{{itemize}}}}
-        \\newcommand{{\\resumeItemListStart}}{{\\begin{{itemize}}}}
-        \\newcommand{{\\resumeItemListEnd}}{{\\end{{itemize}}\\vspace{{-5pt}}}}
-
-        %-------------------------------------------
-        %%%%%%  RESUME STARTS HERE  %%%%%%%%%%%%%%%%%%%%%%%%%%%%
+{PROMPT_PREAMBLE}
 
 
         \\begin{{document}}
@@ -372,43 +649,331 @@ Ensure the final resume is formatted professionally, is easy to read, and effect
 
         Return ONLY the LaTeX code for the resume. Do not include any explanations or markdown.
         """
+    return prompt
+
+
+def build_resume_json_prompt(resume_text, resume_structure, job_description, additional_details, contact=None):
+    """Build the Gemini prompt for JSON mode, where the model returns content only.
+
+    The LaTeX preamble and layout are rendered locally, so the response carries no
+    template boilerplate.
+    """
+    sections_str = ", ".join(resume_structure["sections"])
+    name, email, linkedin, github = contact or extract_contact_details(resume_text)
+    example = {
+        "name": name,
+        "contact": [{"text": email, "url": f"mailto:{email}"},
+                    {"text": linkedin, "url": f"https://{linkedin}"},
+                    {"text": github, "url": f"https://{github}"}],
+        "sections": [
+            {"title": "Summary", "entries": [{"type": "paragraph", "text": "TAILORED SUMMARY"}]},
+            {"title": "Technical Skills", "entries": [
+                {"type": "skills", "category": "Languages", "skills": "LIST OF LANGUAGES"}]},
+            {"title": "Experience", "entries": [
+                {"type": "experience", "title": "JOB TITLE", "organization": "COMPANY NAME", "dates": "DATES",
+                 "location": "LOCATION", "bullets": ["BULLET POINT ABOUT ACHIEVEMENT"]}]},
+            {"title": "Projects", "entries": [
+                {"type": "project", "name": "PROJECT NAME", "technologies": "TECHNOLOGIES USED", "dates": "DATES",
+                 "bullets": ["BULLET POINT ABOUT PROJECT"]}]},
+            {"title": "Education", "entries": [
+                {"type": "experience", "title": "UNIVERSITY NAME", "organization": "DEGREE", "dates": "DATES",
+                 "location": "LOCATION", "bullets": []}]},
+        ],
+    }
+
+    prompt = f"""
+Process the ENTIRE resume content provided below. Go through ALL projects, skills, certifications, and experiences in the resume. Don't limit yourself to just the first few items.
+
+Generate a highly optimized, ATS-friendly resume aligned with the job description, ensuring that the most relevant skills, projects, and experiences are highlighted. Prioritize high-impact keywords to maximize ATS compatibility.
+
+Include ALL relevant experiences, education, projects, and certifications from the original resume that match the job requirements. Maintain concise, action-oriented bullet points and quantify accomplishments where possible.
+
+        JOB DESCRIPTION:
+        {job_description}
+
+        CURRENT RESUME CONTENT:
+        {resume_text}
+
+        ADDITIONAL DETAILS ABOUT THE PERSON (incorporate if relevant):
+        {additional_details}
+
+        RESUME STRUCTURE ANALYSIS:
+        - Sections detected: {sections_str}
+
+        Return ONLY a JSON document matching this JSON Schema:
+        {json.dumps(RESUME_JSON_SCHEMA, separators=(",", ":"))}
+
+        Entry types and their fields:
+        - paragraph: text
+        - experience: title, organization, dates, location, bullets
+        - project: name, technologies (optional), dates, bullets
+        - skills: category, skills (comma-separated)
+        - bullets: bullets
+
+        Example of the expected shape:
+        {json.dumps(example, indent=2)}
+
+        Use plain text in every field: no LaTeX, no markdown. Do not include any explanations.
+        """
+    return prompt
+
+
+def apply_token_budget(resume_text, resume_structure, job_description, additional_details, token_budget):
+    """Pack the resume and additional details into token_budget, most job-relevant blocks first."""
+    if not token_budget:
+        return resume_text, additional_details
+    with span("budget", budget=token_budget) as stage:
+        resume_text, additional_details, report = budget_prompt_inputs(
+            resume_text, resume_structure, job_description, additional_details, token_budget)
+        stage.update(original_tokens=report.original_tokens, packed_tokens=report.packed_tokens,
+                     tokens_saved=report.tokens_saved, dropped_blocks=report.dropped_blocks)
+    logger.info("Prompt budget: %d/%d input tokens kept (%d saved, %d blocks dropped)",
+                report.packed_tokens, report.original_tokens, report.tokens_saved, report.dropped_blocks)
+    return resume_text, additional_details
+
+def log_missing_api_key():
+    logger.error("GEMINI_API_KEY not found in environment variables.")
+    logger.error("Please add your Gemini API key using the Secrets tool.")
+    logger.error("Go to https://makersuite.google.com/app/apikey to get your API key.")
+    logger.error("Then add it to the Secrets tool in Replit.")
+
+def checked_cache_key(prompt):
+    """Response cache key for the document ensure_valid_latex made of prompt's response."""
+    return prompt_cache_key(prompt, GEMINI_MODEL_NAME, {**GENERATION_CONFIG, "latex_repair": REPAIR_VERSION},
+                            SAFETY_SETTINGS)
+
+def get_cached_latex(cache, cache_key, prompt, stage):
+    """(response, checked) from the response cache, or (None, False) on a miss.
+
+    Checked documents are stored under checked_cache_key, apart from the raw
+    response, so a response is checked and repaired at most once, even when the
+    repair did not succeed. Either way one lookup counts as one hit or one miss.
+    """
+    response = cache.get(checked_cache_key(prompt), count_miss=False)
+    checked = response is not None
+    if not checked:
+        response = cache.get(cache_key)
+    stage.set("cache_hit", bool(response))
+    if response:
+        logger.info("Using cached Gemini response (identical prompt and settings).")
+        stage.set("response_chars", len(response))
+    return response, checked
+
+def ensure_valid_latex(text, prompt, api_key, stage, required_sections=()):
+    """Check generated LaTeX and repair it with targeted follow-up requests (see latex_repair.py).
+
+    required_sections are the template sections the source resume has. The
+    client is only set up if a repair is needed.
+    """
+    def generate(repair_prompt):
+        if not api_key and not default_client_available():
+            raise RuntimeError("GEMINI_API_KEY is not set")
+        client = get_default_client(GEMINI_MODEL_NAME, GENERATION_CONFIG, SAFETY_SETTINGS, api_key)
+        result = client.generate_sync(repair_prompt)
+        return result.text, result.output_tokens
+
+    text, check, repairs = repair_latex(text, generate, prompt, required_sections)
+    if repairs:
+        stage.update(repairs=len(repairs), repair_output_tokens=sum(r.output_tokens for r in repairs),
+                     repair_tokens_saved=sum(r.tokens_saved for r in repairs))
+    if not check.ok:
+        stage.set("latex_problems", check.describe())
+        logger.warning("Generated LaTeX may not compile: %s", check.describe())
+    return text
+
+def optimize_resume_with_gemini(resume_text, resume_structure, job_description, additional_details, use_cache=True,
+                                token_budget=None, contact=None):
+    """Use Google Gemini API to optimize the resume based on job description and convert to LaTeX format.
+
+    Responses are cached by a hash of the prompt, model name and generation settings,
+    so re-running with identical inputs skips the network. Pass use_cache=False to bypass.
+    With token_budget set, the resume and additional details are first trimmed to
+    the blocks most relevant to the job description. contact, if given, is passed
+    to build_resume_prompt. Truncated or unbalanced output is repaired with
+    targeted follow-up requests before it is cached and returned.
+    """
+    with span("generate", stream=False) as stage:
+        try:
+            resume_text, additional_details = apply_token_budget(
+                resume_text, resume_structure, job_description, additional_details, token_budget)
+            prompt = build_resume_prompt(resume_text, resume_structure, job_description, additional_details,
+                                         contact)
+            stage.set("prompt_chars", len(prompt))
+
+            cache = get_default_cache() if use_cache else None
+            cache_key = prompt_cache_key(prompt, GEMINI_MODEL_NAME, GENERATION_CONFIG, SAFETY_SETTINGS)
+            required_sections = required_sections_for(resume_structure)
+            # Get Google Gemini API key from environment variables
+            api_key = os.environ.get("GEMINI_API_KEY")
+            if cache:
+                cached_response, checked = get_cached_latex(cache, cache_key, prompt, stage)
+                if checked:
+                    return cached_response
+                if cached_response:
+                    # Cached before responses were checked
+                    text = ensure_valid_latex(cached_response, prompt, api_key, stage, required_sections)
+                    cache.put(checked_cache_key(prompt), text, GEMINI_MODEL_NAME)
+                    return text
+
+            if not api_key and not default_client_available():
+                log_missing_api_key()
+
+                # For testing purposes, you can uncomment and use this line with your actual API key
+                # api_key = "YOUR_GEMINI_API_KEY_HERE"
+
+                return None
+
+            # The shared client configures the API once and applies rate limits and retries
+            client = get_default_client(GEMINI_MODEL_NAME, GENERATION_CONFIG, SAFETY_SETTINGS, api_key)
+            result = client.generate_sync(prompt)
+            stage.set("response_chars", len(result.text))
+            if cache:
+                cache.put(cache_key, result.text, GEMINI_MODEL_NAME)
+            text = ensure_valid_latex(result.text, prompt, api_key, stage, required_sections)
+
+            # Extract and return the optimized resume
+            if cache:
+                cache.put(checked_cache_key(prompt), text, GEMINI_MODEL_NAME)
+            return text
+
+        except Exception as e:
+            logger.error("Error with Google Gemini API: %s", e)
+            stage.set("error", type(e).__name__)
+            return None
+
+
+def optimize_resume_json(resume_text, resume_structure, job_description, additional_details, use_cache=True,
+                         token_budget=None, contact=None):
+    """Ask Gemini for the tailored resume as JSON and return the validated data, or None.
+
+    Only responses that pass schema validation are cached.
+    """
+    with span("generate", stream=False, json_mode=True) as stage:
+        try:
+            resume_text, additional_details = apply_token_budget(
+                resume_text, resume_structure, job_description, additional_details, token_budget)
+            prompt = build_resume_json_prompt(resume_text, resume_structure, job_description, additional_details,
+                                              contact)
+            stage.set("prompt_chars", len(prompt))
+
+            cache = get_default_cache() if use_cache else None
+            cache_key = prompt_cache_key(prompt, GEMINI_MODEL_NAME, JSON_GENERATION_CONFIG, SAFETY_SETTINGS)
+            if cache:
+                cached_response = cache.get(cache_key)
+                stage.set("cache_hit", bool(cached_response))
+                if cached_response:
+                    logger.info("Using cached Gemini response (identical prompt and settings).")
+                    stage.set("response_chars", len(cached_response))
+                    return parse_resume_json(cached_response)
+
+            api_key = os.environ.get("GEMINI_API_KEY")
+            if not api_key and not default_client_available():
+                log_missing_api_key()
+                return None
+
+            client = get_default_client(GEMINI_MODEL_NAME, GENERATION_CONFIG, SAFETY_SETTINGS, api_key)
+            result = client.generate_sync(prompt, JSON_GENERATION_CONFIG)
+            stage.set("response_chars", len(result.text))
+            data = parse_resume_json(result.text)
+
+            if cache:
+                cache.put(cache_key, result.text, GEMINI_MODEL_NAME)
+            return data
+
+        except ResumeSchemaError as e:
+            logger.error("Gemini returned a resume that does not match the JSON schema: %s", e)
+            stage.set("error", "ResumeSchemaError")
+            return None
+        except Exception as e:
+            logger.error("Error with Google Gemini API: %s", e)
+            stage.set("error", type(e).__name__)
+            return None
+
+
+def optimize_resume_streaming(resume_text, resume_structure, job_description, additional_details,
+                              tex_path, preview_path, use_cache=True, token_budget=None, contact=None):
+    """Stream the Gemini response straight into tex_path, refreshing the preview per section.
+
+    Returns the cleaned LaTeX document, or None if generation failed or the stream
+    was cancelled as malformed.
+    """
+    with span("generate", stream=True) as stage:
+        return _optimize_resume_streaming(resume_text, resume_structure, job_description, additional_details,
+                                          tex_path, preview_path, use_cache, token_budget, contact, stage)
+
+
+def _optimize_resume_streaming(resume_text, resume_structure, job_description, additional_details,
+                               tex_path, preview_path, use_cache, token_budget, contact, stage):
+    writer = None
+    try:
+        resume_text, additional_details = apply_token_budget(
+            resume_text, resume_structure, job_description, additional_details, token_budget)
+        prompt = build_resume_prompt(resume_text, resume_structure, job_description, additional_details, contact)
+        stage.set("prompt_chars", len(prompt))
+
+        def report_section(title, elapsed):
+            logger.info("  - Section '%s' rendered to preview after %.1fs", title, elapsed)
 
-        # Get available models
-        model = genai.GenerativeModel('gemini-2.0-flash', generation_config=generation_config)
-
-        # Generate content with safety settings adjusted for resume content
-        safety_settings = [
-            {
-                "category": "HARM_CATEGORY_HARASSMENT",
-                "threshold": "BLOCK_ONLY_HIGH"
-            },
-            {
-                "category": "HARM_CATEGORY_HATE_SPEECH",
-                "threshold": "BLOCK_ONLY_HIGH"
-            },
-            {
-                "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                "threshold": "BLOCK_ONLY_HIGH"
-            },
-            {
-                "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                "threshold": "BLOCK_ONLY_HIGH"
-            },
-        ]
-        
-        # Generate content with increased limits
-        response = model.generate_content(
-            prompt,
-            safety_settings=safety_settings,
-        )
-
-        # Extract and return the optimized resume
-        return response.text
+        writer = StreamingResumeWriter(tex_path, preview_path, render_preview=render_preview_pdf,
+                                       on_section=report_section)
 
+        cache = get_default_cache() if use_cache else None
+        cache_key = prompt_cache_key(prompt, GEMINI_MODEL_NAME, GENERATION_CONFIG, SAFETY_SETTINGS)
+        required_sections = required_sections_for(resume_structure)
+        api_key = os.environ.get("GEMINI_API_KEY")
+        cached_response, checked = get_cached_latex(cache, cache_key, prompt, stage) if cache else (None, False)
+        if cached_response:
+            writer.feed(cached_response)
+            streamed = writer.finish()
+            if checked:
+                return streamed
+            text = ensure_valid_latex(streamed, prompt, api_key, stage, required_sections)
+            if text != streamed:
+                write_tex_file(text, tex_path)
+            cache.put(checked_cache_key(prompt), text, GEMINI_MODEL_NAME)
+            return text
+
+        if not api_key and not default_client_available():
+            log_missing_api_key()
+            return None
+
+        client = get_default_client(GEMINI_MODEL_NAME, GENERATION_CONFIG, SAFETY_SETTINGS, api_key)
+        raw_chunks = []
+
+        async def consume():
+            async for chunk in client.stream(prompt):
+                raw_chunks.append(chunk)
+                writer.feed(chunk)
+
+        # Only streaming runs an event loop, so other commands skip importing asyncio
+        import asyncio
+
+        logger.info("Streaming response from Gemini...")
+        asyncio.run(consume())
+        streamed = writer.finish()
+        stage.update(response_chars=sum(len(chunk) for chunk in raw_chunks), chunks=len(raw_chunks))
+        if cache:
+            cache.put(cache_key, "".join(raw_chunks), GEMINI_MODEL_NAME)
+        text = ensure_valid_latex(streamed, prompt, api_key, stage, required_sections)
+        if text != streamed:
+            write_tex_file(text, tex_path)
+        if cache:
+            cache.put(checked_cache_key(prompt), text, GEMINI_MODEL_NAME)
+        return text
+
+    except MalformedStreamError as e:
+        logger.warning("Cancelled streaming generation: %s", e)
+        stage.set("error", "MalformedStreamError")
+        writer.abort()
+        return None
     except Exception as e:
-        print(f"Error with Google Gemini API: {e}")
+        logger.error("Error with Google Gemini API: %s", e)
+        stage.set("error", type(e).__name__)
+        if writer:
+            writer.abort()
         return None
 
+
 def create_pdf_resume(content, output_path):
     """Convert the optimized LaTeX resume content to a properly formatted PDF."""
     try:
@@ -418,6 +983,33 @@ def create_pdf_resume(content, output_path):
             with open(tex_path, 'w', encoding='utf-8') as f:
                 f.write(content)
 
+        render_preview_pdf(content, output_path)
+        return output_path
+
+    except Exception as e:
+        logger.error("Error creating PDF: %s", e)
+        return None
+
+def render_preview_pdf(content, output_path):
+    """Render LaTeX resume content to a basic FPDF preview without touching any .tex file."""
+    # Parse the LaTeX content once into a document tree
+    return render_document_pdf(parse_resume(content), output_path)
+
+def pdf_text(text):
+    """text as FPDF's core fonts can draw it.
+
+    fpdf 1.7 writes strings as latin-1 bytes that the core fonts read as
+    cp1252, so bullets, dashes and curly quotes are mapped to their cp1252
+    bytes and anything else becomes "?" instead of failing the whole preview.
+    """
+    return text.encode("cp1252", "replace").decode("latin-1")
+
+def render_document_pdf(document, output_path):
+    """Render a ResumeDocument, parsed from LaTeX or built from JSON, to a basic FPDF preview."""
+    # fpdf is only needed here, so commands that never render skip importing it
+    from fpdf import FPDF
+
+    with span("preview") as stage:
         # Create a basic PDF that follows the LaTeX structure
         pdf = FPDF(orientation='P', unit='mm', format='A4')
         pdf.add_page()
@@ -430,117 +1022,178 @@ def create_pdf_resume(content, output_path):
         header_font = "Arial"
         body_font = "Arial"
 
-        # Parse LaTeX content
-        # Extract name
-        name_match = re.search(r'\\textbf{\\Huge \\scshape ([^}]+)}', content)
-        name = name_match.group(1) if name_match else "Name"
-
-        # Extract contact info
-        contact_match = re.search(r'\\small ([^\n]+)', content)
-        contact = contact_match.group(1) if contact_match else ""
-        contact = re.sub(r'\\href{[^}]+}{\\underline{([^}]+)}}', r'\1', contact)
-        contact = contact.replace('$|$', '|')
-
         # Set name at top
         pdf.set_font(header_font, 'B', 16)
-        pdf.cell(0, 10, name, 0, 1, 'C')
+        pdf.cell(0, 10, pdf_text(document.name), 0, 1, 'C')
 
         # Set contact info
         pdf.set_font(body_font, '', 10)
-        pdf.cell(0, 6, contact, 0, 1, 'C')
+        pdf.cell(0, 6, pdf_text(document.contact), 0, 1, 'C')
         pdf.ln(4)
 
         # Process sections
-        section_pattern = r'\\section{([^}]+)}(.*?)(?=\\section{|\\end{document})'
-        for match in re.finditer(section_pattern, content, re.DOTALL):
-            section_title = match.group(1)
-            section_content = match.group(2)
-
+        for section in document.sections:
             # Add section title
             pdf.set_font(header_font, 'B', 14)
-            pdf.cell(0, 10, section_title, 0, 1, 'L')
+            pdf.cell(0, 10, pdf_text(section.title), 0, 1, 'L')
             pdf.ln(1)
 
             # Draw horizontal line
             pdf.line(15, pdf.get_y(), 195, pdf.get_y())
             pdf.ln(4)
 
-            # Extract \resumeSubheading blocks
-            subheading_pattern = r'\\resumeSubheading\s*{([^}]*)}{([^}]*)}{([^}]*)}{([^}]*)}'
-            for subheading_match in re.finditer(subheading_pattern, section_content):
-                org = subheading_match.group(1)
-                location = subheading_match.group(2)
-                title = subheading_match.group(3)
-                date = subheading_match.group(4)
-
-                # Add organization and location
-                pdf.set_font(body_font, 'B', 11)
-                pdf.cell(120, 6, org, 0, 0, 'L')
-                pdf.cell(60, 6, location, 0, 1, 'R')
-
-                # Add title and date
-                pdf.set_font(body_font, 'I', 10)
-                pdf.cell(120, 6, title, 0, 0, 'L')
-                pdf.cell(60, 6, date, 0, 1, 'R')
-                pdf.ln(2)
-
-            # Extract \resumeProjectHeading blocks
-            project_pattern = r'\\resumeProjectHeading\s*{([^}]*)}{([^}]*)}'
-            for project_match in re.finditer(project_pattern, section_content):
-                project_info = project_match.group(1)
-                project_date = project_match.group(2)
-
-                # Clean up LaTeX formatting for project info
-                project_info = re.sub(r'\\textbf{([^}]*)}', r'\1', project_info)
-                project_info = re.sub(r'\\emph{([^}]*)}', r'\1', project_info)
-
-                # Add project info and date
-                pdf.set_font(body_font, 'B', 11)
-                pdf.cell(120, 6, project_info, 0, 0, 'L')
-                pdf.cell(60, 6, project_date, 0, 1, 'R')
-                pdf.ln(2)
-
-            # Extract bullet points
-            bullet_pattern = r'\\resumeItem{([^}]*)}'
-            for bullet_match in re.finditer(bullet_pattern, section_content):
-                bullet_text = bullet_match.group(1)
-
-                # Add bullet point
-                pdf.set_font(body_font, '', 10)
-                pdf.cell(5, 6, "•", 0, 0, 'L')
-                pdf.multi_cell(175, 6, bullet_text, 0, 'L')
-
-            # Handle technical skills section specially
-            if section_title == "Technical Skills":
-                skills_pattern = r'\\textbf{([^}]*)}{{: ([^}\\]*)}}'
-                for skills_match in re.finditer(skills_pattern, section_content):
-                    skill_category = skills_match.group(1)
-                    skill_list = skills_match.group(2)
+            for entry in section.entries:
+                if isinstance(entry, Subheading):
+                    # Add organization and location
+                    pdf.set_font(body_font, 'B', 11)
+                    pdf.cell(120, 6, pdf_text(entry.title), 0, 0, 'L')
+                    pdf.cell(60, 6, pdf_text(entry.location), 0, 1, 'R')
+
+                    # Add title and date
+                    pdf.set_font(body_font, 'I', 10)
+                    pdf.cell(120, 6, pdf_text(entry.subtitle), 0, 0, 'L')
+                    pdf.cell(60, 6, pdf_text(entry.date), 0, 1, 'R')
+                    pdf.ln(2)
+
+                elif isinstance(entry, ProjectHeading):
+                    # Add project info and date
+                    pdf.set_font(body_font, 'B', 11)
+                    info = f"{entry.info} | {entry.technologies}" if entry.technologies else entry.info
+                    pdf.cell(120, 6, pdf_text(info), 0, 0, 'L')
+                    pdf.cell(60, 6, pdf_text(entry.date), 0, 1, 'R')
+                    pdf.ln(2)
+
+                elif isinstance(entry, Item):
+                    # Add bullet point
+                    pdf.set_font(body_font, '', 10)
+                    pdf.cell(5, 6, pdf_text("•"), 0, 0, 'L')
+                    pdf.multi_cell(175, 6, pdf_text(entry.text), 0, 'L')
 
+                elif isinstance(entry, Paragraph):
+                    pdf.set_font(body_font, '', 10)
+                    pdf.multi_cell(180, 6, pdf_text(entry.text), 0, 'L')
+                    pdf.ln(1)
+
+                elif isinstance(entry, SkillLine):
                     pdf.set_font(body_font, 'B', 10)
-                    pdf.cell(30, 6, skill_category + ":", 0, 0, 'L')
+                    pdf.cell(30, 6, pdf_text(entry.category + ":"), 0, 0, 'L')
                     pdf.set_font(body_font, '', 10)
-                    pdf.multi_cell(150, 6, skill_list, 0, 'L')
+                    pdf.multi_cell(150, 6, pdf_text(entry.skills), 0, 'L')
 
             pdf.ln(5)  # Space between sections
 
         # Save the PDF
         pdf.output(str(output_path))
+        stage.update(sections=len(document.sections), pages=pdf.page_no())
         return output_path
 
-    except Exception as e:
-        print(f"Error creating PDF: {e}")
-        return None
+def find_resume(resume_folder):
+    """The first resume PDF in resume_folder, or None."""
+    resume_folder = Path(resume_folder)
+    pdfs = sorted(resume_folder.glob("*.pdf")) if resume_folder.exists() else []
+    return pdfs[0] if pdfs else None
+
+def render_file(input_path, output_path=None):
+    """Render an existing .tex or JSON-mode .json resume to a preview PDF."""
+    input_path = Path(input_path)
+    output_path = Path(output_path) if output_path else input_path.with_suffix(".pdf")
+    with open(input_path, "r", encoding="utf-8") as file:
+        content = file.read()
+    if input_path.suffix.lower() == ".json":
+        return render_document_pdf(document_from_json(parse_resume_json(content)), output_path)
+    return render_preview_pdf(content, output_path)
+
+def main(argv=None):
+    """Command line entry point. Without a subcommand, runs the whole pipeline."""
+    import argparse
+
+    inputs = argparse.ArgumentParser(add_help=False)
+    inputs.add_argument("--resume", help="resume PDF (default: the first PDF in --resume-folder)")
+    inputs.add_argument("--resume-folder", default="resume")
+    inputs.add_argument("--job-description", default="job_description.txt")
+    inputs.add_argument("--additional-details", default="additional_details.txt")
+    inputs.add_argument("--output", default="newresume", help="output folder")
+    inputs.add_argument("--name", default=DEFAULT_OUTPUT_NAME, help="output file name without extension")
+    inputs.add_argument("--json", action="store_true",
+                        help="have Gemini return JSON and render the LaTeX locally")
+    inputs.add_argument("--token-budget", type=int, default=None,
+                        help="pack resume and additional details into this many input tokens")
+    inputs.add_argument("--no-profile", action="store_true",
+                        help="prompt with the raw extracted text instead of the candidate profile")
+    inputs.add_argument("--no-cache", action="store_true", help="bypass the extraction and response caches")
+    inputs.add_argument("--force", action="store_true", help="rerun every stage, even if its inputs are unchanged")
+    inputs.add_argument("--dry-run", action="store_true", help="show which stages would run, without running them")
+
+    parser = argparse.ArgumentParser(description="Tailor a resume to a job description with Gemini.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", parents=[inputs], help="extract, generate, preview and compile (default)")
+    run_parser.add_argument("--stream", action="store_true",
+                            help="write the .tex and refresh the preview as the response arrives")
+    sub.add_parser("generate", parents=[inputs], help="extract and generate the .tex only")
+    extract_parser = sub.add_parser("extract", help="print the text extracted from a resume PDF")
+    extract_parser.add_argument("resume")
+    extract_parser.add_argument("--structure", action="store_true", help="print the detected structure as JSON")
+    extract_parser.add_argument("--no-cache", action="store_true", help="bypass the extraction cache")
+    render_parser = sub.add_parser("render", help="render a .tex or JSON-mode .json to a preview PDF")
+    render_parser.add_argument("input")
+    render_parser.add_argument("--output", help="PDF path (default: next to the input)")
+    compile_parser = sub.add_parser("compile", help="compile a .tex with pdflatex")
+    compile_parser.add_argument("tex")
+    compile_parser.add_argument("--output", help="output folder (default: next to the .tex)")
+    watch_parser = sub.add_parser("watch", parents=[inputs],
+                                  help="stay running and regenerate whenever an input file changes")
+    watch_parser.add_argument("--jobs", help="folder of job description .txt files (instead of --job-description)")
+    watch_parser.add_argument("--debounce", type=float, default=0.5,
+                              help="seconds without further changes before regenerating")
+    watch_parser.add_argument("--poll", action="store_true",
+                              help="poll for changes instead of using filesystem events")
+    watch_parser.add_argument("--dedup-threshold", type=float, default=None,
+                              help="reuse one generation for job descriptions at least this similar (0-1)")
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Plain `python main.py [--stream] [--json]` keeps meaning a full run
+    if not argv or (argv[0].startswith("-") and argv[0] not in ("-h", "--help")):
+        argv = ["run", *argv]
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "extract":
+        text, structure = extract_from_pdf(args.resume, use_cache=not args.no_cache)
+        if text is None:
+            return 1
+        print(json.dumps(structure, indent=2) if args.structure else text)
+        return 0
+    if args.command == "render":
+        try:
+            pdf_path = render_file(args.input, args.output)
+        except Exception as e:
+            logger.error("Could not render %s: %s", args.input, e)
+            return 1
+        logger.info("PDF preview created at: %s", pdf_path)
+        return 0
+    if args.command == "compile":
+        tex_path = Path(args.tex)
+        return 0 if compile_latex(tex_path, Path(args.output) if args.output else tex_path.parent) else 1
+
+    if args.command == "watch":
+        from watch import watch
+        watch(args.resume_folder, args.jobs or args.job_description, Path(args.output), args.additional_details,
+              args.name, debounce=args.debounce, use_events=not args.poll, dedup_threshold=args.dedup_threshold,
+              use_cache=not args.no_cache, token_budget=args.token_budget, json_mode=args.json,
+              use_profile=not args.no_profile, force=args.force)
+        return 0
+
+    resume_path = Path(args.resume) if args.resume else find_resume(args.resume_folder)
+    if resume_path is None:
+        logger.error("Please place your resume PDF in the '%s' folder.", args.resume_folder)
+        return 1
+    ok = process_resume(resume_path, Path(args.output), args.job_description, args.additional_details,
+                        output_name=args.name, use_cache=not args.no_cache,
+                        stream=getattr(args, "stream", False), token_budget=args.token_budget,
+                        json_mode=args.json, use_profile=not args.no_profile,
+                        stop_after="generate" if args.command == "generate" else None,
+                        force=args.force, dry_run=args.dry_run)
+    return 0 if ok else 1
 
 if __name__ == "__main__":
-    resume_folder = Path("resume")
-    output_folder = Path("newresume")
-    job_desc_path = "job_description.txt"
-    additional_details_path = "additional_details.txt"
-
-    # Check if resume folder exists and contains pdf files
-    if resume_folder.exists() and list(resume_folder.glob("*.pdf")):
-        resume_path = list(resume_folder.glob("*.pdf"))[0]
-        process_resume(resume_path, output_folder, job_desc_path, additional_details_path)
-    else:
-        print("Please place your resume PDF in the 'resume' folder.")
\ No newline at end of file
+    sys.exit(main())
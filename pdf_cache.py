@@ -0,0 +1,203 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("RESUME_CACHE_DIR", ".cache")) / "extract"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE_DAYS = 30
+# Entries also kept in memory, so a long-running process (watch.py) does not
+# re-read and re-parse the same extraction for every regeneration
+MEMORY_ENTRIES = 16
+# put() rescans the directory for eviction only after this many bytes have been
+# written to it, so the cache can overshoot max_bytes by at most this much
+EVICT_SCAN_BYTES = 8 * 1024 * 1024
+
+# Keyed by (cache directory, entry key): two caches never see each other's entries
+_memory = OrderedDict()
+# Bytes written per cache directory since it was last scanned for eviction
+_unscanned_bytes = {}
+_memory_lock = threading.Lock()
+
+
+def hash_pdf(pdf_path):
+    """Return the SHA-256 hex digest of a file, reading it through a memory map."""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            digest.update(mapped)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Content-addressed on-disk cache of extract_from_pdf results.
+
+    Entries are keyed by the SHA-256 of the PDF bytes plus the extractor version, so
+    renaming or copying a resume still hits, while changing the extractor invalidates
+    everything it produced.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.cache_dir = Path(cache_dir)
+        self._memory_dir = str(self.cache_dir.resolve())
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+
+    def key(self, pdf_path, version):
+        return f"{hash_pdf(pdf_path)}-v{version}"
+
+    def _entry_path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        """Return (text, structure) for key, or None on a miss."""
+        with _memory_lock:
+            entry = _memory.get((self._memory_dir, key))
+            if entry is not None:
+                _memory.move_to_end((self._memory_dir, key))
+                return entry
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        # Touch the entry so age-based eviction measures time since last use
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._remember(key, entry["text"], entry["structure"])
+        return entry["text"], entry["structure"]
+
+    def _remember(self, key, text, structure):
+        with _memory_lock:
+            _memory[(self._memory_dir, key)] = (text, structure)
+            _memory.move_to_end((self._memory_dir, key))
+            while len(_memory) > MEMORY_ENTRIES:
+                _memory.popitem(last=False)
+
+    def put(self, key, text, structure, source=None):
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "key": key,
+            "source": str(source) if source else None,
+            "created": time.time(),
+            "text": text,
+            "structure": structure,
+        }
+        # Write atomically so concurrent extract workers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(entry, file)
+                written = file.tell()
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._remember(key, text, structure)
+        self._maybe_evict(written)
+
+    def _maybe_evict(self, written):
+        """Run evict() on the first write to this directory, then once EVICT_SCAN_BYTES more are written."""
+        with _memory_lock:
+            unscanned = _unscanned_bytes.get(self._memory_dir)
+            if unscanned is not None and unscanned + written < EVICT_SCAN_BYTES:
+                _unscanned_bytes[self._memory_dir] = unscanned + written
+                return
+            _unscanned_bytes[self._memory_dir] = 0
+        self.evict()
+
+    def entries(self):
+        """List cache entries as dicts of key, path, size and last-used time."""
+        if not self.cache_dir.exists():
+            return []
+        result = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            result.append({"key": path.stem, "path": path, "size": stat.st_size, "last_used": stat.st_mtime})
+        return result
+
+    def evict(self, max_bytes=None, max_age_days=None):
+        """Drop entries older than max_age_days, then least recently used ones until under max_bytes."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        entries = sorted(self.entries(), key=lambda e: e["last_used"])
+        removed = 0
+
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 86400
+            for entry in [e for e in entries if e["last_used"] < cutoff]:
+                removed += self._remove(entry)
+                entries.remove(entry)
+
+        if max_bytes is not None:
+            total = sum(e["size"] for e in entries)
+            for entry in list(entries):
+                if total <= max_bytes:
+                    break
+                total -= entry["size"]
+                removed += self._remove(entry)
+        return removed
+
+    def purge(self):
+        """Remove every entry. Returns the number of entries removed."""
+        with _memory_lock:
+            for memory_key in [k for k in _memory if k[0] == self._memory_dir]:
+                del _memory[memory_key]
+        return sum(self._remove(entry) for entry in self.entries())
+
+    def _remove(self, entry):
+        try:
+            entry["path"].unlink()
+            return 1
+        except OSError:
+            return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or purge the PDF extraction cache.")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR))
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="show entry count and total size")
+    sub.add_parser("list", help="list entries, most recently used first")
+    purge_parser = sub.add_parser("purge", help="remove entries")
+    purge_parser.add_argument("--max-age-days", type=float, default=None,
+                              help="only remove entries unused for this many days")
+    purge_parser.add_argument("--max-bytes", type=int, default=None,
+                              help="only remove least recently used entries until under this size")
+    args = parser.parse_args()
+
+    # No implicit limits from the CLI: only the thresholds given on the command line apply
+    cache = ExtractionCache(args.cache_dir, max_bytes=None, max_age_days=None)
+    if args.command == "stats":
+        entries = cache.entries()
+        total = sum(e["size"] for e in entries)
+        print(f"Cache directory: {cache.cache_dir}")
+        print(f"Entries: {len(entries)}")
+        print(f"Total size: {total / 1024:.1f} KiB")
+    elif args.command == "list":
+        for entry in sorted(cache.entries(), key=lambda e: e["last_used"], reverse=True):
+            last_used = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["last_used"]))
+            print(f"{entry['key']}  {entry['size']:>10}  {last_used}")
+    elif args.command == "purge":
+        if args.max_age_days is None and args.max_bytes is None:
+            removed = cache.purge()
+        else:
+            removed = cache.evict(max_bytes=args.max_bytes, max_age_days=args.max_age_days)
+        print(f"Removed {removed} cache entries.")
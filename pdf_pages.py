@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_PAGES_PER_CHUNK = 8
+# Below this many pages the process pool costs more than it saves
+PARALLEL_PAGE_THRESHOLD = 16
+
+
+def process_pool(max_workers):
+    """A ProcessPoolExecutor whose workers are not forked from this process.
+
+    The server and watch mode extract from worker threads; forking there copies
+    locks (logging's, pdf_cache's) that another thread may hold, and the child
+    deadlocks on them. forkserver and spawn start workers from a clean process.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+
+
+def count_pages(pdf_path):
+    import PyPDF2
+
+    with open(pdf_path, "rb") as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def iter_pdf_pages(pdf_path, start=0, stop=None):
+    """Lazily yield (page_index, text) for pages start..stop-1.
+
+    The file stays open only while the generator is being consumed.
+    """
+    # Imported here so commands that never read a PDF skip its import cost
+    import PyPDF2
+
+    with open(pdf_path, "rb") as file:
+        reader = PyPDF2.PdfReader(file)
+        stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+        for index in range(start, stop):
+            yield index, reader.pages[index].extract_text() or ""
+
+
+def extract_page_range(pdf_path, start, stop):
+    """Worker entry point: text of pages start..stop-1 as a list."""
+    return [text for _, text in iter_pdf_pages(pdf_path, start, stop)]
+
+
+def iter_pdf_pages_parallel(pdf_path, workers=None, pages_per_chunk=DEFAULT_PAGES_PER_CHUNK,
+                            max_pending_chunks=None, page_count=None):
+    """Yield (page_index, text) in page order, extracting page ranges in a process pool.
+
+    At most max_pending_chunks ranges are in flight or waiting to be yielded at any
+    time, which bounds how much extracted text is held in memory no matter how far
+    the workers run ahead of the consumer.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending_chunks = max_pending_chunks or workers * 2
+    page_count = count_pages(pdf_path) if page_count is None else page_count
+    ranges = [(start, min(start + pages_per_chunk, page_count))
+              for start in range(0, page_count, pages_per_chunk)]
+
+    with process_pool(workers) as pool:
+        pending = {}
+        next_submit = 0
+        for next_yield in range(len(ranges)):
+            while next_submit < len(ranges) and next_submit - next_yield < max_pending_chunks:
+                start, stop = ranges[next_submit]
+                pending[next_submit] = pool.submit(extract_page_range, pdf_path, start, stop)
+                next_submit += 1
+            start, _ = ranges[next_yield]
+            for offset, text in enumerate(pending.pop(next_yield).result()):
+                yield start + offset, text
+
+
+def iter_pages(pdf_path, workers=None, parallel_threshold=PARALLEL_PAGE_THRESHOLD):
+    """Pick serial or parallel page extraction based on page count and workers.
+
+    workers=1 forces serial extraction (e.g. when already inside a worker process);
+    on a single-CPU machine extraction is always serial.
+
+    Parallel workers are started with forkserver or spawn (see process_pool), which
+    re-import the calling script, so a script that calls this must keep its own
+    work under an `if __name__ == "__main__":` guard.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return iter_pdf_pages(pdf_path)
+    page_count = count_pages(pdf_path)
+    if page_count < parallel_threshold:
+        return iter_pdf_pages(pdf_path)
+    return iter_pdf_pages_parallel(pdf_path, workers=workers, page_count=page_count)
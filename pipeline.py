@@ -0,0 +1,213 @@
+"""Make-style incremental execution of the resume pipeline stages.
+
+Each Stage declares its inputs (file digests, versions, settings) and the stages
+it depends on. A stage's key is a hash of its inputs plus its dependencies' keys,
+so a change anywhere upstream reaches everything downstream. Keys of finished
+stages are kept in a manifest in the output folder; on the next run a stage is
+skipped when its key is unchanged and its output files still exist.
+
+Stages that produce in-memory values (extracted text, the candidate profile)
+are only executed for a skipped stage when a downstream stage that does run
+asks for their value; their own caches make that cheap.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from pdf_cache import hash_pdf
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".pipeline_manifest.json"
+
+
+def file_digest(path):
+    """SHA-256 hex digest of a file's bytes, or None if it does not exist."""
+    try:
+        return hash_pdf(path)
+    except FileNotFoundError:
+        return None
+
+
+def text_digest(text):
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def fingerprint(value):
+    """Stable hash of a JSON-serializable value."""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Stage:
+    """One node of the pipeline graph.
+
+    inputs() returns a JSON-serializable dict of everything besides upstream
+    stages that determines the result. run(pipeline) does the work and returns its
+    value; None or False means the stage failed. outputs() lists files that must
+    exist for a finished stage to count as up to date. Stages that are not
+    required may fail without failing the run.
+    """
+
+    name: str
+    inputs: callable
+    run: callable
+    deps: tuple = ()
+    outputs: callable = None
+    required: bool = True
+
+
+@dataclass
+class StageResult:
+    name: str
+    action: str  # "ran", "skipped", "failed", "blocked", "would run", "cancelled"
+    reasons: list = field(default_factory=list)
+    seconds: float = None
+
+
+class Manifest:
+    """Per-output-folder record of finished stage keys, grouped by output name."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                self.data = json.load(file)
+        except (OSError, ValueError):
+            self.data = {}
+
+    def entry(self, target, stage):
+        return self.data.get(target, {}).get(stage)
+
+    def record(self, target, stage, key, inputs, outputs):
+        self.data.setdefault(target, {})[stage] = {
+            "key": key,
+            "inputs": {name: fingerprint(value) for name, value in inputs.items()},
+            "outputs": [str(path) for path in outputs],
+            "finished": time.time(),
+        }
+
+    def forget(self, target, stage):
+        self.data.get(target, {}).pop(stage, None)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Write atomically so an interrupted run never leaves a truncated manifest
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(self.data, file, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class Pipeline:
+    """Run a list of stages (in dependency order) against a manifest.
+
+    With force every stage runs. With dry_run nothing runs; run() reports which
+    stages would run and why. progress, if given, is called as
+    progress(stage, state) with state "running", "done", "failed" or "skipped".
+    cancel is an optional threading.Event checked before each stage; once set,
+    the remaining stages are reported as cancelled.
+    """
+
+    def __init__(self, stages, manifest, target, force=False, dry_run=False, progress=None, cancel=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.order = [stage.name for stage in stages]
+        self.manifest = manifest
+        self.target = target
+        self.force = force
+        self.dry_run = dry_run
+        self.progress = progress
+        self.cancel = cancel
+        self.keys = {}
+        self.values = {}
+
+    def _report(self, stage, state):
+        if self.progress:
+            self.progress(stage, state)
+
+    def _inputs(self, stage):
+        inputs = dict(stage.inputs())
+        for dep in stage.deps:
+            inputs[f"stage:{dep}"] = self.keys[dep]
+        return inputs
+
+    def value(self, name):
+        """The value of stage name, executing it now if this run skipped it."""
+        if name not in self.values:
+            logger.debug("Loading %s for a downstream stage", name)
+            self.values[name] = self.stages[name].run(self)
+        return self.values[name]
+
+    def plan(self, stage, inputs, key):
+        """Reasons stage must run, or an empty list if it is up to date."""
+        if self.force:
+            return ["forced"]
+        entry = self.manifest.entry(self.target, stage.name)
+        if entry is None:
+            return ["never run"]
+        if entry["key"] != key:
+            recorded = entry.get("inputs", {})
+            changed = [name for name, value in inputs.items() if recorded.get(name) != fingerprint(value)]
+            return [f"changed: {name}" for name in changed] or ["inputs changed"]
+        missing = [path for path in entry.get("outputs", []) if not Path(path).exists()]
+        return [f"missing: {Path(path).name}" for path in missing]
+
+    def run(self, until=None):
+        """Run stages in order, up to and including until. Returns a list of StageResults."""
+        results = []
+        failed = set()
+        for name in self.order:
+            stage = self.stages[name]
+            if self.cancel is not None and self.cancel.is_set():
+                failed.add(name)
+                results.append(StageResult(name, "cancelled"))
+            elif any(dep in failed for dep in stage.deps):
+                failed.add(name)
+                results.append(StageResult(name, "blocked"))
+            else:
+                inputs = self._inputs(stage)
+                key = fingerprint(inputs)
+                self.keys[name] = key
+                reasons = self.plan(stage, inputs, key)
+                if not reasons:
+                    self._report(name, "skipped")
+                    results.append(StageResult(name, "skipped"))
+                elif self.dry_run:
+                    results.append(StageResult(name, "would run", reasons))
+                else:
+                    self._report(name, "running")
+                    start = time.perf_counter()
+                    value = stage.run(self)
+                    seconds = round(time.perf_counter() - start, 4)
+                    self.values[name] = value
+                    if value is None or value is False:
+                        failed.add(name)
+                        self.manifest.forget(self.target, name)
+                        self._report(name, "failed")
+                        results.append(StageResult(name, "failed", reasons, seconds))
+                    else:
+                        outputs = stage.outputs() if stage.outputs else []
+                        self.manifest.record(self.target, name, key, inputs, outputs)
+                        self._report(name, "done")
+                        results.append(StageResult(name, "ran", reasons, seconds))
+                    # Persist after each stage so an interrupted run keeps finished work
+                    self.manifest.save()
+            if name == until:
+                break
+        return results
+
+    def ok(self, results):
+        """True when no required stage failed, was blocked or was cancelled."""
+        return not any(r.action in ("failed", "blocked", "cancelled") and self.stages[r.name].required
+                       for r in results)
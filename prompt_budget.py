@@ -0,0 +1,193 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+
+from gemini_client import estimate_tokens
+
+STOPWORDS = {
+    "a", "about", "above", "across", "after", "all", "also", "an", "and", "any", "are", "as", "at", "be",
+    "been", "being", "both", "but", "by", "can", "could", "do", "does", "each", "either", "etc", "for",
+    "from", "has", "have", "how", "if", "in", "including", "into", "is", "it", "its", "may", "more",
+    "most", "must", "new", "not", "of", "on", "or", "other", "our", "out", "over", "per", "such", "than",
+    "that", "the", "their", "them", "then", "there", "these", "they", "this", "those", "through", "to",
+    "under", "up", "us", "use", "using", "via", "was", "we", "well", "were", "what", "when", "where",
+    "which", "while", "who", "will", "with", "within", "work", "would", "you", "your",
+}
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9+#./-]*[a-z0-9+#]|[a-z]")
+MARKDOWN_HEADER = re.compile(r"^\s*(#{1,6}\s+|\*\*[^*]+\*\*\s*$|-{3,}\s*$)")
+DEFAULT_MAX_BLOCK_TOKENS = 250
+
+
+def keywords(text):
+    """Lower-cased content words of text, without stopwords or one-letter tokens."""
+    return [w for w in WORD_PATTERN.findall(text.lower()) if len(w) > 1 and w not in STOPWORDS]
+
+
+@dataclass
+class Block:
+    source: str
+    section: str
+    text: str
+    order: int
+    tokens: int = 0
+    score: float = 0.0
+    pinned: bool = False
+
+
+@dataclass
+class BudgetReport:
+    budget: int
+    original_tokens: int
+    packed_tokens: int
+    kept_blocks: int
+    dropped_blocks: int
+    dropped_sections: list = field(default_factory=list)
+
+    @property
+    def tokens_saved(self):
+        return self.original_tokens - self.packed_tokens
+
+
+def _split_long(lines, max_block_tokens):
+    """Group lines into chunks of at most max_block_tokens each."""
+    chunks, current, size = [], [], 0
+    for line in lines:
+        line_tokens = estimate_tokens(line)
+        if current and size + line_tokens > max_block_tokens:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(line)
+        size += line_tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_resume_blocks(resume_text, sections, max_block_tokens=DEFAULT_MAX_BLOCK_TOKENS, spans=None):
+    """Split resume text into blocks at the detected section headers.
+
+    With the section_spans from analyze_resume_structure the text is sliced
+    directly; otherwise header lines are found by matching the section names.
+    Everything before the first header (name and contact details) becomes a pinned
+    block that is always kept.
+    """
+    blocks = []
+
+    def add(section, lines):
+        if not any(line.strip() for line in lines):
+            return
+        for chunk in _split_long(lines, max_block_tokens):
+            blocks.append(Block("resume", section or "HEADER", "\n".join(chunk), len(blocks),
+                                pinned=section is None))
+
+    if spans:
+        add(None, resume_text[:spans[0]["start"]].splitlines())
+        for span in spans:
+            add(span["name"], resume_text[span["start"]:span["end"]].splitlines())
+        return blocks
+
+    names = [s.upper() for s in sections]
+    current_section, current_lines = None, []
+    for line in resume_text.splitlines():
+        header = line.strip().rstrip(":").upper()
+        matched = next((n for n in names if header == n or (header.startswith(n) and len(header) <= len(n) + 15)), None)
+        if matched:
+            add(current_section, current_lines)
+            current_section, current_lines = matched, [line]
+        else:
+            current_lines.append(line)
+    add(current_section, current_lines)
+    return blocks
+
+
+def split_detail_blocks(additional_details, max_block_tokens=DEFAULT_MAX_BLOCK_TOKENS):
+    """Split the free-form additional details into header- or paragraph-delimited blocks."""
+    blocks = []
+    section = "DETAILS"
+    current = []
+
+    def flush():
+        if not any(line.strip() for line in current):
+            return
+        for chunk in _split_long(current, max_block_tokens):
+            blocks.append(Block("details", section, "\n".join(chunk), len(blocks)))
+
+    for line in additional_details.splitlines():
+        if MARKDOWN_HEADER.match(line) or not line.strip():
+            flush()
+            current = []
+            if MARKDOWN_HEADER.match(line) and line.strip("-* #\t"):
+                section = line.strip("-* #\t").upper()
+                current = [line]
+            continue
+        current.append(line)
+    flush()
+    return blocks
+
+
+def score_blocks(blocks, job_description):
+    """Score each block by the job-description keyword weight it covers, per token.
+
+    Keyword weights grow with how often the job description repeats a term, damped
+    by how many blocks also contain it, so generic words count for less.
+    """
+    jd_counts = Counter(keywords(job_description))
+    block_terms = [set(keywords(b.text)) for b in blocks]
+    document_frequency = Counter(term for terms in block_terms for term in terms if term in jd_counts)
+    total = max(1, len(blocks))
+    for block, terms in zip(blocks, block_terms):
+        block.tokens = estimate_tokens(block.text)
+        weight = 0.0
+        for term in terms:
+            if term in jd_counts:
+                idf = math.log(1 + total / document_frequency[term])
+                weight += (1 + math.log(jd_counts[term])) * idf
+        block.score = weight / math.sqrt(block.tokens)
+    return blocks
+
+
+def pack_blocks(blocks, budget):
+    """Keep pinned blocks, then the highest-scoring blocks that fit in budget, in original order."""
+    used = sum(b.tokens for b in blocks if b.pinned)
+    kept = {id(b) for b in blocks if b.pinned}
+    for block in sorted((b for b in blocks if not b.pinned), key=lambda b: b.score, reverse=True):
+        if used + block.tokens <= budget:
+            kept.add(id(block))
+            used += block.tokens
+    return [b for b in blocks if id(b) in kept]
+
+
+def budget_prompt_inputs(resume_text, resume_structure, job_description, additional_details, budget,
+                         max_block_tokens=DEFAULT_MAX_BLOCK_TOKENS):
+    """Trim resume text and additional details to the blocks most relevant to the job.
+
+    Returns (resume_text, additional_details, BudgetReport). Inputs already within
+    budget are returned unchanged.
+    """
+    resume_blocks = split_resume_blocks(resume_text, resume_structure.get("sections", []), max_block_tokens,
+                                        spans=resume_structure.get("section_spans"))
+    detail_blocks = split_detail_blocks(additional_details or "", max_block_tokens)
+    original_tokens = estimate_tokens(resume_text) + (estimate_tokens(additional_details) if additional_details else 0)
+
+    if original_tokens <= budget:
+        report = BudgetReport(budget, original_tokens, original_tokens, len(resume_blocks) + len(detail_blocks), 0)
+        return resume_text, additional_details, report
+
+    all_blocks = score_blocks(resume_blocks + detail_blocks, job_description)
+    kept = pack_blocks(all_blocks, budget)
+    kept_ids = {id(b) for b in kept}
+    dropped = [b for b in all_blocks if id(b) not in kept_ids]
+
+    packed_resume = "\n".join(b.text for b in kept if b.source == "resume")
+    packed_details = "\n\n".join(b.text for b in kept if b.source == "details")
+    packed_tokens = estimate_tokens(packed_resume) + (estimate_tokens(packed_details) if packed_details else 0)
+    report = BudgetReport(
+        budget=budget,
+        original_tokens=original_tokens,
+        packed_tokens=packed_tokens,
+        kept_blocks=len(kept),
+        dropped_blocks=len(dropped),
+        dropped_sections=sorted({f"{b.source}:{b.section}" for b in dropped}),
+    )
+    return packed_resume, packed_details, report
@@ -0,0 +1,164 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_DB_PATH = Path(os.environ.get("RESUME_CACHE_DIR", ".cache")) / "responses.sqlite3"
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL_SECONDS = 7 * 86400
+
+
+def prompt_cache_key(prompt, model_name, generation_config, safety_settings=None):
+    """Canonical hash of everything that determines a model response."""
+    payload = json.dumps(
+        {
+            "prompt": prompt,
+            "model": model_name,
+            "generation_config": generation_config,
+            "safety_settings": safety_settings,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed cache of model responses with LRU and TTL eviction.
+
+    Hit and miss counters are kept both for this process (hits/misses attributes)
+    and cumulatively in the database, so `python response_cache.py stats` shows how
+    much the cache has saved across runs.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_entries=DEFAULT_MAX_ENTRIES,
+                 ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL,"
+                " created REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps this safe to share across threads
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _bump(self, conn, name):
+        conn.execute(
+            "INSERT INTO counters(name, value) VALUES (?, 1)"
+            " ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def get(self, key, count_miss=True):
+        """Return the cached response for key, or None if missing or expired.
+
+        Pass count_miss=False for a lookup that falls back to another key when it
+        misses, so one request is not counted as two misses.
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                if count_miss:
+                    self.misses += 1
+                    self._bump(conn, "misses")
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            self._bump(conn, "hits")
+            return row[0]
+
+    def put(self, key, response, model_name=None):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses(key, model, response, created, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, model_name, response, now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        if self.ttl_seconds is not None:
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        if self.max_entries is not None:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self):
+        with self._lock, self._connect() as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(response)), 0) FROM responses").fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        return {
+            "entries": entries,
+            "response_chars": size,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "session_hits": self.hits,
+            "session_misses": self.misses,
+        }
+
+    def purge(self):
+        with self._lock, self._connect() as conn:
+            removed = conn.execute("DELETE FROM responses").rowcount
+            conn.execute("DELETE FROM counters")
+        return removed
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Process-wide cache instance shared by every optimize_resume_with_gemini call."""
+    global _default_cache
+    # Batch threads reach this together; without the lock each could open its own connection
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or purge the Gemini response cache.")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH))
+    parser.add_argument("command", choices=["stats", "purge"])
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.db)
+    if args.command == "stats":
+        for name, value in cache.stats().items():
+            if not name.startswith("session_"):
+                print(f"{name}: {value}")
+    else:
+        print(f"Removed {cache.purge()} cached responses.")
@@ -0,0 +1,234 @@
+import json
+import re
+
+from latex_parser import (
+    ContactLink,
+    Item,
+    Paragraph,
+    ProjectHeading,
+    ResumeDocument,
+    Section,
+    SkillLine,
+    Subheading,
+)
+from latex_template import RESUME_PREAMBLE
+
+# The document the model returns in JSON mode. Entries are a tagged union on "type";
+# ENTRY_FIELDS lists the fields each type requires.
+RESUME_JSON_SCHEMA = {
+    "type": "object",
+    "required": ["name", "contact", "sections"],
+    "properties": {
+        "name": {"type": "string"},
+        "contact": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["text"],
+                "properties": {"text": {"type": "string"}, "url": {"type": "string"}},
+            },
+        },
+        "sections": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["title", "entries"],
+                "properties": {
+                    "title": {"type": "string"},
+                    "entries": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "required": ["type"],
+                            "properties": {
+                                "type": {"type": "string",
+                                         "enum": ["paragraph", "experience", "project", "skills", "bullets"]},
+                                "text": {"type": "string"},
+                                "title": {"type": "string"},
+                                "organization": {"type": "string"},
+                                "dates": {"type": "string"},
+                                "location": {"type": "string"},
+                                "name": {"type": "string"},
+                                "technologies": {"type": "string"},
+                                "category": {"type": "string"},
+                                "skills": {"type": "string"},
+                                "bullets": {"type": "array", "items": {"type": "string"}},
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    },
+}
+ENTRY_FIELDS = {
+    "paragraph": ("text",),
+    "experience": ("title", "organization", "dates", "location", "bullets"),
+    "project": ("name", "dates", "bullets"),
+    "skills": ("category", "skills"),
+    "bullets": ("bullets",),
+}
+JSON_TYPES = {"object": dict, "array": list, "string": str}
+
+LATEX_SPECIAL_CHARACTERS = {
+    "\\": r"\textbackslash{}", "&": r"\&", "%": r"\%", "$": r"\$", "#": r"\#", "_": r"\_",
+    "{": r"\{", "}": r"\}", "~": r"\textasciitilde{}", "^": r"\textasciicircum{}",
+}
+LATEX_SPECIAL_PATTERN = re.compile("|".join(re.escape(c) for c in LATEX_SPECIAL_CHARACTERS))
+
+
+class ResumeSchemaError(ValueError):
+    """Raised when model output is not valid JSON or does not match RESUME_JSON_SCHEMA."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def _check(value, schema, path, errors):
+    expected = JSON_TYPES[schema["type"]]
+    if not isinstance(value, expected):
+        errors.append(f"{path}: expected {schema['type']}, got {type(value).__name__}")
+        return
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} is not one of {schema['enum']}")
+    if expected is dict:
+        for key in schema.get("required", ()):
+            if key not in value:
+                errors.append(f"{path}: missing required field '{key}'")
+        for key, child in schema.get("properties", {}).items():
+            if key in value:
+                _check(value[key], child, f"{path}.{key}", errors)
+    elif expected is list:
+        for index, item in enumerate(value):
+            _check(item, schema["items"], f"{path}[{index}]", errors)
+
+
+def validate_resume_json(data):
+    """Check data against RESUME_JSON_SCHEMA and the per-type entry fields.
+
+    Raises ResumeSchemaError listing every problem found.
+    """
+    errors = []
+    _check(data, RESUME_JSON_SCHEMA, "$", errors)
+    if not errors:
+        for s, section in enumerate(data["sections"]):
+            for e, entry in enumerate(section["entries"]):
+                for key in ENTRY_FIELDS[entry["type"]]:
+                    if key not in entry:
+                        errors.append(f"$.sections[{s}].entries[{e}]: {entry['type']} entry needs '{key}'")
+    if errors:
+        raise ResumeSchemaError(errors)
+    return data
+
+
+def parse_resume_json(text):
+    """Parse and validate a model response, tolerating markdown code fences around it."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```[a-zA-Z]*\s*|\s*```$", "", text)
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ResumeSchemaError([f"invalid JSON: {e}"]) from e
+    return validate_resume_json(data)
+
+
+def document_from_json(data):
+    """Build the ResumeDocument that both the LaTeX and FPDF renderers consume."""
+    links = [ContactLink(link["text"], link.get("url", "")) for link in data["contact"]]
+    document = ResumeDocument(name=data["name"], contact=" | ".join(link.text for link in links), links=links)
+    for section_data in data["sections"]:
+        section = Section(section_data["title"])
+        for entry in section_data["entries"]:
+            kind = entry["type"]
+            if kind == "paragraph":
+                section.entries.append(Paragraph(entry["text"]))
+                continue
+            if kind == "skills":
+                section.entries.append(SkillLine(entry["category"], entry["skills"]))
+                continue
+            if kind == "experience":
+                # Subheading fields follow the template's layout: title and dates on
+                # the first row, organization and location on the second
+                section.entries.append(Subheading(entry["title"], entry["dates"], entry["organization"],
+                                                  entry["location"]))
+            elif kind == "project":
+                section.entries.append(ProjectHeading(entry["name"], entry["dates"],
+                                                      entry.get("technologies", "")))
+            section.entries.extend(Item(bullet) for bullet in entry["bullets"])
+        document.sections.append(section)
+    return document
+
+
+def escape_latex(text):
+    return LATEX_SPECIAL_PATTERN.sub(lambda m: LATEX_SPECIAL_CHARACTERS[m.group()], text)
+
+
+def _render_header(document, lines):
+    lines.append("\\begin{center}")
+    lines.append(f"    \\textbf{{\\Huge \\scshape {escape_latex(document.name)}}} \\\\ \\vspace{{1pt}}")
+    parts = []
+    for link in document.links:
+        text = escape_latex(link.text)
+        url = link.url.replace("%", r"\%").replace("#", r"\#")
+        parts.append(f"\\href{{{url}}}{{\\underline{{{text}}}}}" if url else text)
+    if not parts and document.contact:
+        parts.append(escape_latex(document.contact))
+    if parts:
+        lines.append("    \\small " + " $|$ ".join(parts))
+    lines.append("\\end{center}")
+
+
+def _render_entries(entries, lines):
+    index = 0
+    while index < len(entries):
+        entry = entries[index]
+        if isinstance(entry, Paragraph):
+            lines.append(escape_latex(entry.text))
+            index += 1
+        elif isinstance(entry, SkillLine):
+            skills = []
+            while index < len(entries) and isinstance(entries[index], SkillLine):
+                line = entries[index]
+                skills.append(f"     \\textbf{{{escape_latex(line.category)}}}{{: {escape_latex(line.skills)}}}")
+                index += 1
+            lines.append(" \\begin{itemize}[leftmargin=0.15in, label={}]")
+            lines.append("    \\small{\\item{")
+            lines.append(" \\\\\n".join(skills))
+            lines.append("    }}")
+            lines.append(" \\end{itemize}")
+        else:
+            # Headings and their bullets share one subheading list
+            lines.append("  \\resumeSubHeadingListStart")
+            while index < len(entries) and isinstance(entries[index], (Subheading, ProjectHeading, Item)):
+                entry = entries[index]
+                index += 1
+                if isinstance(entry, Subheading):
+                    args = (entry.title, entry.location, entry.subtitle, entry.date)
+                    lines.append("    \\resumeSubheading" + "".join(f"{{{escape_latex(a)}}}" for a in args))
+                elif isinstance(entry, ProjectHeading):
+                    heading = f"\\textbf{{{escape_latex(entry.info)}}}"
+                    if entry.technologies:
+                        heading += f" $|$ \\emph{{{escape_latex(entry.technologies)}}}"
+                    lines.append(f"    \\resumeProjectHeading{{{heading}}}{{{escape_latex(entry.date)}}}")
+                else:
+                    lines.append("      \\resumeItemListStart")
+                    lines.append(f"        \\resumeItem{{{escape_latex(entry.text)}}}")
+                    while index < len(entries) and isinstance(entries[index], Item):
+                        lines.append(f"        \\resumeItem{{{escape_latex(entries[index].text)}}}")
+                        index += 1
+                    lines.append("      \\resumeItemListEnd")
+            lines.append("  \\resumeSubHeadingListEnd")
+
+
+def render_latex(document, preamble=RESUME_PREAMBLE):
+    """Render a ResumeDocument into a complete LaTeX document using the template preamble."""
+    lines = [preamble, "", "\\begin{document}", ""]
+    _render_header(document, lines)
+    for section in document.sections:
+        lines.append("")
+        lines.append(f"\\section{{{escape_latex(section.title)}}}")
+        _render_entries(section.entries, lines)
+    lines += ["", "\\end{document}", ""]
+    return "\n".join(lines)
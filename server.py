@@ -0,0 +1,276 @@
+"""HTTP job queue around process_resume.
+
+Usage: python server.py [--host 127.0.0.1] [--port 8080] [--workers 2] [--max-queue 16]
+
+This runs Flask's development server, which only listens on loopback unless
+--allow-remote is given. To serve other machines, run create_app under a WSGI
+server in one process (jobs live in its memory), e.g.
+gunicorn -w 1 --threads 8 -b 0.0.0.0:8080 "server:create_app()".
+
+POST /jobs                      multipart form: resume (PDF), job_description (file or text),
+                                optional additional_details (file or text), token_budget, stream
+GET  /jobs/<id>                 status and per-stage progress
+GET  /jobs/<id>/artifacts/tex   the generated LaTeX source
+GET  /jobs/<id>/artifacts/pdf   the compiled PDF, or the preview when pdflatex failed
+GET  /health                    queue depth and worker count
+GET  /metrics                   stage timings and counters in the Prometheus text format
+"""
+import argparse
+import ipaddress
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from flask import Flask, Response, abort, jsonify, request, send_file
+
+from main import DEFAULT_OUTPUT_NAME, PIPELINE_STAGES, process_resume
+from telemetry import PrometheusSink, get_tracer
+
+DEFAULT_JOBS_DIR = Path(os.environ.get("RESUME_JOBS_DIR", "job_runs"))
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_QUEUE = 16
+# Finished jobs kept in memory for status polling; their files stay on disk
+DEFAULT_MAX_FINISHED = 1000
+RETRY_AFTER_SECONDS = 30
+ARTIFACT_SUFFIXES = {"tex": (".tex", "application/x-tex"), "pdf": (".pdf", "application/pdf")}
+
+
+class QueueFull(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    folder: str
+    status: str = "queued"
+    stages: dict = field(default_factory=lambda: {stage: {"state": "pending", "seconds": None}
+                                                  for stage in PIPELINE_STAGES})
+    created: float = field(default_factory=time.time)
+    started: float = None
+    finished: float = None
+    error: str = None
+
+
+class JobQueue:
+    """Runs process_resume on a bounded worker pool.
+
+    At most max_queue jobs may be waiting or running at once; new_job raises
+    QueueFull beyond that so callers can shed load instead of queueing unbounded work.
+    """
+
+    def __init__(self, jobs_dir=DEFAULT_JOBS_DIR, workers=DEFAULT_WORKERS, max_queue=DEFAULT_MAX_QUEUE,
+                 max_finished=DEFAULT_MAX_FINISHED, use_cache=True):
+        self.jobs_dir = Path(jobs_dir)
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_finished = max_finished
+        self.use_cache = use_cache
+        self.jobs = OrderedDict()
+        self._active = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resume-job")
+
+    def new_job(self):
+        """Reserve a queue slot and create a job folder. Raises QueueFull."""
+        with self._lock:
+            if self._active >= self.max_queue:
+                raise QueueFull(f"{self._active} jobs pending")
+            self._active += 1
+        job_id = uuid.uuid4().hex
+        folder = self.jobs_dir / job_id
+        folder.mkdir(parents=True, exist_ok=True)
+        job = Job(id=job_id, folder=str(folder))
+        with self._lock:
+            self.jobs[job_id] = job
+        return job
+
+    def release(self, job, error):
+        """Give back a slot reserved by new_job for a job that was never submitted."""
+        with self._lock:
+            self._active -= 1
+            job.status, job.error, job.finished = "failed", error, time.time()
+
+    def submit(self, job, resume_path, job_desc_path, additional_details_path=None, token_budget=None,
+               stream=False):
+        self._executor.submit(self._run, job, resume_path, job_desc_path, additional_details_path,
+                              token_budget, stream)
+        return job
+
+    def _progress(self, job, stage, state):
+        with self._lock:
+            entry = job.stages[stage]
+            if state == "running":
+                entry["started"] = time.perf_counter()
+            elif "started" in entry:
+                entry["seconds"] = round(time.perf_counter() - entry.pop("started"), 4)
+            entry["state"] = state
+
+    def _run(self, job, resume_path, job_desc_path, additional_details_path, token_budget, stream):
+        with self._lock:
+            job.status, job.started = "running", time.time()
+        try:
+            ok = process_resume(Path(resume_path), Path(job.folder), job_desc_path, additional_details_path,
+                                output_name=DEFAULT_OUTPUT_NAME, use_cache=self.use_cache, stream=stream,
+                                token_budget=token_budget,
+                                progress=lambda stage, state: self._progress(job, stage, state))
+            status, error = ("succeeded", None) if ok else ("failed", "resume processing failed")
+        except Exception as e:
+            status, error = "failed", str(e)
+        with self._lock:
+            job.status, job.error, job.finished = status, error, time.time()
+            self._active -= 1
+            self._prune()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = asdict(job)
+        for entry in snapshot["stages"].values():
+            entry.pop("started", None)
+        return snapshot
+
+    def depth(self):
+        with self._lock:
+            return self._active
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def _save_text_or_file(folder, name, filename):
+    """Write a form file or text field to folder/filename. Returns the path or None."""
+    upload = request.files.get(name)
+    text = request.form.get(name)
+    path = Path(folder) / filename
+    if upload and upload.filename:
+        upload.save(path)
+    elif text:
+        path.write_text(text, encoding="utf-8")
+    else:
+        return None
+    return path
+
+
+def create_app(queue=None):
+    app = Flask(__name__)
+    app.config["MAX_CONTENT_LENGTH"] = 20 * 1024 * 1024
+    queue = queue or JobQueue()
+    app.extensions["job_queue"] = queue
+
+    @app.post("/jobs")
+    def submit_job():
+        resume = request.files.get("resume")
+        if not resume or not resume.filename.lower().endswith(".pdf"):
+            return jsonify(error="a PDF file is required in the 'resume' field"), 400
+        if not (request.files.get("job_description") or request.form.get("job_description")):
+            return jsonify(error="'job_description' is required as a file or text field"), 400
+        token_budget = request.form.get("token_budget", type=int)
+        stream = request.form.get("stream", "").lower() in ("1", "true", "yes")
+
+        try:
+            job = queue.new_job()
+        except QueueFull:
+            response = jsonify(error="job queue is full, retry later")
+            response.headers["Retry-After"] = str(RETRY_AFTER_SECONDS)
+            return response, 503
+
+        try:
+            # Fixed name so an upload can never collide with the generated artifacts
+            resume_path = Path(job.folder) / "resume.pdf"
+            resume.save(resume_path)
+            job_desc_path = _save_text_or_file(job.folder, "job_description", "job_description.txt")
+            details_path = _save_text_or_file(job.folder, "additional_details", "additional_details.txt")
+            queue.submit(job, resume_path, job_desc_path, details_path, token_budget, stream)
+        except Exception as e:
+            queue.release(job, str(e))
+            raise
+        return jsonify(id=job.id, status=job.status, status_url=f"/jobs/{job.id}"), 202
+
+    @app.get("/jobs/<job_id>")
+    def job_status(job_id):
+        snapshot = queue.get(job_id)
+        if snapshot is None:
+            abort(404)
+        snapshot.pop("folder")
+        snapshot["artifacts"] = {
+            kind: f"/jobs/{job_id}/artifacts/{kind}"
+            for kind, (suffix, _) in ARTIFACT_SUFFIXES.items()
+            if (queue.jobs_dir / job_id / f"{DEFAULT_OUTPUT_NAME}{suffix}").exists()
+        }
+        return jsonify(snapshot)
+
+    @app.get("/jobs/<job_id>/artifacts/<kind>")
+    def job_artifact(job_id, kind):
+        if kind not in ARTIFACT_SUFFIXES or queue.get(job_id) is None:
+            abort(404)
+        suffix, mimetype = ARTIFACT_SUFFIXES[kind]
+        path = (queue.jobs_dir / job_id / f"{DEFAULT_OUTPUT_NAME}{suffix}").resolve()
+        if not path.exists():
+            abort(404)
+        return send_file(path, mimetype=mimetype, as_attachment=True, download_name=path.name)
+
+    tracer = get_tracer()
+    metrics = tracer.find_sink(PrometheusSink) or tracer.add_sink(PrometheusSink())
+
+    @app.get("/metrics")
+    def prometheus_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    @app.get("/health")
+    def health():
+        return jsonify(workers=queue.workers, active_jobs=queue.depth(), max_queue=queue.max_queue)
+
+    return app
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="allow a --host other machines can reach (use a WSGI server in production)")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--jobs-dir", type=Path, default=DEFAULT_JOBS_DIR)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="resumes processed at once")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="waiting plus running jobs before new submissions get 503")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the extraction and response caches")
+    args = parser.parse_args()
+    if not is_loopback(args.host) and not args.allow_remote:
+        parser.error(f"--host {args.host} is reachable from other machines; pass --allow-remote to bind it")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    queue = JobQueue(args.jobs_dir, workers=args.workers, max_queue=args.max_queue, use_cache=not args.no_cache)
+    app = create_app(queue)
+    try:
+        app.run(host=args.host, port=args.port, threaded=True)
+    finally:
+        queue.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+FENCES = ("```latex", "```")
+SECTION_BOUNDARY = re.compile(r'\\section\{|\\end\{document\}')
+# Longest marker that can straddle two chunks
+MAX_MARKER_LEN = len("\\end{document}")
+
+
+class MalformedStreamError(Exception):
+    """Raised when streamed output clearly is not a LaTeX resume."""
+
+
+class StreamingResumeWriter:
+    """Append streamed model output to a .tex file and refresh the preview per section.
+
+    Markdown fences are stripped on the fly. Each time a \\section{...} block is
+    closed (by the next \\section or \\end{document}) the FPDF preview is re-rendered
+    with every completed section, so a readable PDF exists long before the stream
+    ends. If no LaTeX document has started after malformed_after characters the
+    stream is rejected with MalformedStreamError so the caller can cancel it.
+    """
+
+    def __init__(self, tex_path, preview_path=None, render_preview=None, on_section=None,
+                 malformed_after=2000):
+        self.tex_path = tex_path
+        self.preview_path = preview_path
+        self.render_preview = render_preview
+        self.on_section = on_section
+        self.malformed_after = malformed_after
+        self.text = ""
+        self.sections = []
+        self.started = time.perf_counter()
+        self.first_section_at = None
+        self._carry = ""
+        self._boundaries = []
+        self._scan_from = 0
+        self._file = open(tex_path, "w", encoding="utf-8")
+
+    def feed(self, chunk):
+        """Consume one streamed chunk."""
+        text = (self._carry + chunk).replace(FENCES[0], "")
+        # Hold back a trailing partial fence until the next chunk decides it
+        hold = 0
+        for n in range(min(len(text), len(FENCES[0]) - 1), 0, -1):
+            if FENCES[0].startswith(text[-n:]):
+                hold = n
+                break
+        self._carry = text[len(text) - hold:]
+        self._append(text[:len(text) - hold].replace(FENCES[1], ""))
+
+    def _append(self, text):
+        if not text:
+            return
+        self._file.write(text)
+        self._file.flush()
+        self.text += text
+
+        if len(self.text) >= self.malformed_after and "\\documentclass" not in self.text \
+                and "\\begin{document}" not in self.text:
+            raise MalformedStreamError(
+                f"No LaTeX document found in the first {len(self.text)} characters of the response")
+
+        closed = False
+        for match in SECTION_BOUNDARY.finditer(self.text, self._scan_from):
+            if self._boundaries and match.start() <= self._boundaries[-1]:
+                continue
+            if self._boundaries:
+                closed = True
+                self._close_section(self._boundaries[-1], match.start())
+            self._boundaries.append(match.start())
+        self._scan_from = max(0, len(self.text) - MAX_MARKER_LEN)
+        if closed:
+            self._refresh_preview()
+
+    def _close_section(self, start, end):
+        block = self.text[start:end]
+        title_match = re.match(r'\\section\{([^}]*)\}', block)
+        title = title_match.group(1) if title_match else "Untitled"
+        self.sections.append(title)
+        if self.first_section_at is None:
+            self.first_section_at = time.perf_counter() - self.started
+        if self.on_section:
+            self.on_section(title, time.perf_counter() - self.started)
+
+    def _refresh_preview(self):
+        if not (self.preview_path and self.render_preview):
+            return
+        # Render header plus completed sections only, then swap the file in atomically
+        partial = self.text[:self._boundaries[-1]] + "\n\\end{document}\n"
+        tmp_path = f"{self.preview_path}.partial"
+        try:
+            self.render_preview(partial, tmp_path)
+            os.replace(tmp_path, self.preview_path)
+        except Exception as e:
+            logger.warning("Could not refresh streaming preview: %s", e)
+
+    def finish(self):
+        """Flush held-back text, close the file and return the full cleaned document."""
+        if self._carry:
+            carry, self._carry = self._carry, ""
+            for fence in FENCES:
+                carry = carry.replace(fence, "")
+            self._append(carry)
+        self._file.close()
+        if "\\end{document}" not in self.text:
+            logger.warning("Streamed resume ended without \\end{document}; output may be truncated.")
+        return self.text
+
+    def abort(self):
+        self._file.close()
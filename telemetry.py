@@ -0,0 +1,293 @@
+"""Lightweight tracing for the resume pipeline.
+
+Code wraps each stage in span("name", **attributes) and sets sizes, token counts,
+retry counts and cache flags on it. Finished spans go to every configured sink:
+
+- JsonLinesSink appends one JSON object per span to a file.
+- PrometheusSink aggregates spans into histograms and counters, rendered in the
+  Prometheus text exposition format (served at /metrics by server.py, or written
+  to a file for the node_exporter textfile collector).
+
+Sinks are configured from RESUME_TRACE_JSONL and RESUME_METRICS_FILE, or with
+set_tracer. With no sinks, span() returns a shared no-op span, so disabled
+tracing costs one attribute check per call.
+"""
+import atexit
+import contextvars
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+METRIC_PREFIX = "resume"
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """A timed operation. Use as a context manager; nested spans share a trace id."""
+
+    __slots__ = ("tracer", "name", "attributes", "trace_id", "span_id", "parent_id", "timestamp",
+                 "duration", "error", "_start", "_token")
+
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = self.span_id = self.parent_id = None
+        self.timestamp = self.duration = self.error = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+        return self
+
+    def update(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = next(_span_ids)
+        self._token = _current_span.set(self)
+        self.timestamp = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._start
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # An async generator closed from another context (e.g. loop shutdown)
+            pass
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.tracer.emit(self)
+        return False
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "timestamp": round(self.timestamp, 6),
+            "duration": round(self.duration, 6),
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, key, value):
+        return self
+
+    def update(self, **attributes):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+
+    @property
+    def enabled(self):
+        return bool(self.sinks)
+
+    def span(self, name, **attributes):
+        if not self.sinks:
+            return NULL_SPAN
+        return Span(self, name, attributes)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def find_sink(self, sink_type):
+        return next((s for s in self.sinks if isinstance(s, sink_type)), None)
+
+    def emit(self, span):
+        for sink in self.sinks:
+            try:
+                sink.record(span)
+            except Exception as e:
+                # Telemetry must never break the pipeline it observes
+                logger.warning("Telemetry sink %s failed: %s", type(sink).__name__, e)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+class JsonLinesSink:
+    """Append each finished span as one JSON line to path."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items()) + "}"
+
+
+class PrometheusSink:
+    """Aggregate spans into Prometheus metrics.
+
+    Span durations become a histogram per span name. Numeric attributes (sizes,
+    token and retry counts) are summed per span and attribute; boolean attributes
+    (cache hits, ok flags) are counted per value. With path set, the text format is
+    rewritten atomically at most every write_interval seconds and on close.
+    """
+
+    def __init__(self, path=None, buckets=DEFAULT_BUCKETS, write_interval=5.0):
+        self.path = path
+        self.buckets = tuple(sorted(buckets))
+        self.write_interval = write_interval
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._errors = {}
+        self._attribute_sums = {}
+        self._flags = {}
+        self._last_write = 0.0
+
+    def record(self, span):
+        with self._lock:
+            histogram = self._histograms.setdefault(span.name, {"counts": [0] * len(self.buckets),
+                                                               "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if span.duration <= bound:
+                    histogram["counts"][i] += 1
+            histogram["sum"] += span.duration
+            histogram["count"] += 1
+            if span.error:
+                key = (span.name, span.error)
+                self._errors[key] = self._errors.get(key, 0) + 1
+            for name, value in span.attributes.items():
+                if isinstance(value, bool):
+                    key = (span.name, name, str(value).lower())
+                    self._flags[key] = self._flags.get(key, 0) + 1
+                elif isinstance(value, (int, float)):
+                    key = (span.name, name)
+                    self._attribute_sums[key] = self._attribute_sums.get(key, 0) + value
+            due = self.path and time.monotonic() - self._last_write >= self.write_interval
+        if due:
+            self.write()
+
+    def render(self):
+        """The current metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [f"# HELP {METRIC_PREFIX}_span_duration_seconds Wall time of pipeline stages.",
+                     f"# TYPE {METRIC_PREFIX}_span_duration_seconds histogram"]
+            for name, histogram in sorted(self._histograms.items()):
+                for bound, count in zip(self.buckets, histogram["counts"]):
+                    lines.append(f"{METRIC_PREFIX}_span_duration_seconds_bucket{_labels(span=name, le=bound)} {count}")
+                lines.append(f"{METRIC_PREFIX}_span_duration_seconds_bucket{_labels(span=name, le='+Inf')} "
+                             f"{histogram['count']}")
+                lines.append(f"{METRIC_PREFIX}_span_duration_seconds_sum{_labels(span=name)} {histogram['sum']:.6f}")
+                lines.append(f"{METRIC_PREFIX}_span_duration_seconds_count{_labels(span=name)} {histogram['count']}")
+            lines += [f"# HELP {METRIC_PREFIX}_span_errors_total Stages that raised, by exception type.",
+                      f"# TYPE {METRIC_PREFIX}_span_errors_total counter"]
+            for (name, error), count in sorted(self._errors.items()):
+                lines.append(f"{METRIC_PREFIX}_span_errors_total{_labels(span=name, error=error)} {count}")
+            lines += [f"# HELP {METRIC_PREFIX}_span_attribute_total Sum of numeric stage attributes.",
+                      f"# TYPE {METRIC_PREFIX}_span_attribute_total counter"]
+            for (name, attribute), value in sorted(self._attribute_sums.items()):
+                lines.append(f"{METRIC_PREFIX}_span_attribute_total{_labels(span=name, attribute=attribute)} {value}")
+            lines += [f"# HELP {METRIC_PREFIX}_span_flag_total Stage flags such as cache hits, by value.",
+                      f"# TYPE {METRIC_PREFIX}_span_flag_total counter"]
+            for (name, flag, value), count in sorted(self._flags.items()):
+                lines.append(f"{METRIC_PREFIX}_span_flag_total{_labels(span=name, flag=flag, value=value)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=None):
+        path = path or self.path
+        text = self.render()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._last_write = time.monotonic()
+
+    def close(self):
+        if self.path:
+            self.write()
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def configure_from_env():
+    """Build a Tracer with the sinks named by RESUME_TRACE_JSONL and RESUME_METRICS_FILE."""
+    tracer = Tracer()
+    trace_path = os.environ.get("RESUME_TRACE_JSONL")
+    metrics_path = os.environ.get("RESUME_METRICS_FILE")
+    if trace_path:
+        tracer.add_sink(JsonLinesSink(trace_path))
+    # Worker processes would overwrite the parent's aggregate with their own partial
+    # counts, so only the main process writes the metrics file
+    if metrics_path and multiprocessing.parent_process() is None:
+        tracer.add_sink(PrometheusSink(metrics_path))
+    return tracer
+
+
+def get_tracer():
+    """Process-wide tracer, configured from the environment on first use."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = configure_from_env()
+                # Flush the metrics file and close trace files on interpreter exit
+                atexit.register(_tracer.close)
+    return _tracer
+
+
+def set_tracer(tracer):
+    """Replace the process-wide tracer, e.g. to attach sinks programmatically."""
+    global _tracer
+    with _tracer_lock:
+        _tracer = tracer
+
+
+def span(name, **attributes):
+    """Start a span on the process-wide tracer."""
+    return get_tracer().span(name, **attributes)
@@ -0,0 +1,61 @@
+import watch
+from watch import WatchSession
+
+JOB = ("Senior Python engineer to build data pipelines and REST APIs. Experience with PostgreSQL, "
+       "Docker, Kubernetes and AWS required. You will own services end to end, mentor engineers and "
+       "work closely with product on roadmap planning.")
+
+
+def fake_process_resume(resume, output_folder, job, additional_details_path, output_name, cancel=None, **options):
+    """Stand-in for the pipeline: the generated .tex is the job description it was tailored to."""
+    (output_folder / f"{output_name}.tex").write_text(job.read_text(encoding="utf-8"), encoding="utf-8")
+    return True
+
+
+def make_session(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # keeps the near-duplicate index under tmp_path/.cache
+    monkeypatch.setattr(watch, "process_resume", fake_process_resume)
+    (tmp_path / "resume").mkdir()
+    (tmp_path / "resume" / "cv.pdf").write_bytes(b"%PDF")
+    jobs = tmp_path / "jobs"
+    jobs.mkdir()
+    (jobs / "a.txt").write_text(JOB, encoding="utf-8")
+    (jobs / "b.txt").write_text(JOB + " Remote friendly.", encoding="utf-8")
+    output = tmp_path / "out"
+    output.mkdir()
+    return WatchSession(tmp_path / "resume", jobs, output, dedup_threshold=0.5).start()
+
+
+def test_copy_follows_its_source_when_the_source_changes(tmp_path, monkeypatch):
+    session = make_session(tmp_path, monkeypatch)
+    try:
+        session.submit(session.pairs())
+        assert session.wait_idle(timeout=10)
+        assert session.stats["reused"] == 1
+        resume, source_job = session.pairs()[0]
+        source = session.output_folder / f"{session.name_for(resume, source_job)}.tex"
+        copy = session.output_folder / f"{session.name_for(*session.pairs()[1])}.tex"
+        assert copy.read_text(encoding="utf-8") == source.read_text(encoding="utf-8")
+
+        source_job.write_text(JOB + " Python 3.12 preferred.", encoding="utf-8")
+        assert session.affected([source_job]) == session.pairs()
+        session.on_change({source_job})
+        assert session.wait_idle(timeout=10)
+
+        assert source.read_text(encoding="utf-8").endswith("Python 3.12 preferred.")
+        assert copy.read_text(encoding="utf-8") == source.read_text(encoding="utf-8")
+        assert session.stats["reused"] == 2
+    finally:
+        session.stop()
+
+
+def test_unrelated_change_leaves_copies_alone(tmp_path, monkeypatch):
+    session = make_session(tmp_path, monkeypatch)
+    try:
+        session.submit(session.pairs())
+        assert session.wait_idle(timeout=10)
+        copy_pair = session.pairs()[1]
+        assert session.affected([copy_pair[1]]) == [copy_pair]
+        assert session.affected([tmp_path / "jobs" / "other.txt"]) == []
+    finally:
+        session.stop()
@@ -0,0 +1,372 @@
+"""Watch mode: one long-running process that regenerates resumes as their inputs change.
+
+Edits to the resume folder, the job description(s) or additional_details.txt are
+picked up from filesystem events (inotify on Linux, through the optional
+watchdog package) or, without watchdog, by polling file sizes and modification
+times. Bursts of events are debounced into one change set, which is mapped to
+the resume x job description pairs it affects; only those are queued.
+
+The process stays warm between runs: imports, the configured Gemini client and
+its rate limiter, and recent extractions stay in memory, and each run goes
+through process_resume's incremental pipeline, so stages whose inputs did not
+change are skipped. When a file changes again while its pair is running, the run
+is cancelled at the next stage boundary and the pair is queued again with the
+latest inputs. A model call already in flight is allowed to finish; its response
+is cached either way.
+"""
+import argparse
+import logging
+import threading
+import time
+from pathlib import Path
+
+from batch import copy_outputs, pair_output_name
+from jd_index import JobDescriptionIndex
+from main import DEFAULT_OUTPUT_NAME, process_resume
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_POLL_INTERVAL = 1.0
+# Event types that mean a file's content may have changed; opened/closed-without-write
+# events fire whenever the pipeline itself reads an input
+CHANGE_EVENTS = {"created", "modified", "moved", "deleted", "closed"}
+
+
+class ChangeWatcher:
+    """Call on_change(paths) with the set of changed files under the watched paths.
+
+    paths are files or folders (watched non-recursively). on_change runs on a
+    background thread once no further change has arrived for debounce seconds.
+    """
+
+    def __init__(self, paths, on_change, debounce=DEFAULT_DEBOUNCE, poll_interval=DEFAULT_POLL_INTERVAL,
+                 use_events=True):
+        self.paths = [Path(path).resolve() for path in paths]
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_events = use_events
+        self.mode = None
+        self._pending = set()
+        self._timer = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._observer = None
+
+    def watches(self, path):
+        path = Path(path).resolve()
+        return any(path == watched or path.parent == watched for watched in self.paths)
+
+    def changed(self, path):
+        """Record a change to path and restart the debounce timer."""
+        if not self.watches(path):
+            return
+        with self._lock:
+            self._pending.add(Path(path).resolve())
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush(self):
+        with self._lock:
+            paths, self._pending, self._timer = self._pending, set(), None
+        if paths:
+            self.on_change(paths)
+
+    def start(self):
+        self._observer = self._start_observer() if self.use_events else None
+        if self._observer is None:
+            self.mode = "polling"
+            threading.Thread(target=self._poll, daemon=True, name="watch-poll").start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+
+    def _start_observer(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            logger.info("watchdog is not installed; polling for changes every %.1fs.", self.poll_interval)
+            return None
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory or event.event_type not in CHANGE_EVENTS:
+                    return
+                for path in (event.src_path, getattr(event, "dest_path", None)):
+                    if path:
+                        watcher.changed(path)
+
+        observer = Observer()
+        for directory in {path if path.is_dir() else path.parent for path in self.paths}:
+            if directory.exists():
+                observer.schedule(Handler(), str(directory), recursive=False)
+        observer.start()
+        self.mode = "events"
+        return observer
+
+    def snapshot(self):
+        """(mtime_ns, size) of every file under the watched paths."""
+        state = {}
+        for watched in self.paths:
+            files = watched.iterdir() if watched.is_dir() else [watched]
+            for path in files:
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                state[path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def _poll(self):
+        previous = self.snapshot()
+        while not self._stop.wait(self.poll_interval):
+            current = self.snapshot()
+            for path in previous.keys() | current.keys():
+                if previous.get(path) != current.get(path):
+                    self.changed(path)
+            previous = current
+
+
+class WatchSession:
+    """Queue and run the regenerations that file changes call for, one at a time.
+
+    jobs is a job description file or a folder of .txt files. Every resume PDF in
+    resume_folder is paired with every job description; a single pair is written
+    under output_name (default DEFAULT_OUTPUT_NAME), several under
+    batch.pair_output_name. options are passed on to process_resume.
+
+    With dedup_threshold set, a job description that near-duplicates another one
+    being watched gets a copy of that one's output instead of a generation of its own.
+    """
+
+    def __init__(self, resume_folder, jobs, output_folder, additional_details_path=None, output_name=None,
+                 dedup_threshold=None, **options):
+        self.resume_folder = Path(resume_folder)
+        self.jobs_path = Path(jobs)
+        self.output_folder = Path(output_folder)
+        self.additional_details_path = additional_details_path
+        self.output_name = output_name or DEFAULT_OUTPUT_NAME
+        self.options = options
+        self.index = JobDescriptionIndex(threshold=dedup_threshold) if dedup_threshold is not None else None
+        self.stats = {"runs": 0, "cancelled": 0, "reused": 0, "failed": 0}
+        self._queue = {}  # insertion-ordered set of pairs
+        self._copies = {}  # pair -> the pair whose output it holds a copy of
+        self._running = None
+        self._cancel = None
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._worker = None
+
+    def watched_paths(self):
+        paths = [self.resume_folder, self.jobs_path]
+        if self.additional_details_path:
+            paths.append(Path(self.additional_details_path))
+        return paths
+
+    def resumes(self):
+        return sorted(self.resume_folder.glob("*.pdf")) if self.resume_folder.is_dir() else []
+
+    def jobs(self):
+        if self.jobs_path.is_dir():
+            return sorted(self.jobs_path.glob("*.txt"))
+        return [self.jobs_path] if self.jobs_path.exists() else []
+
+    def pairs(self):
+        return [(resume, job) for resume in self.resumes() for job in self.jobs()]
+
+    def name_for(self, resume, job):
+        if len(self.resumes()) == 1 and not self.jobs_path.is_dir():
+            return self.output_name
+        return pair_output_name(resume, job)
+
+    def affected(self, paths):
+        """The current pairs that depend on any of the changed paths.
+
+        A pair holding a copy of another pair's output depends on that pair's inputs
+        too; it is listed after the pairs that changed, so it copies (or, if no longer
+        a near-duplicate, regenerates) once the source is up to date.
+        """
+        paths = {Path(path).resolve() for path in paths}
+        if self.additional_details_path and Path(self.additional_details_path).resolve() in paths:
+            return self.pairs()
+
+        def depends(resume, job):
+            return resume.resolve() in paths or job.resolve() in paths
+
+        pairs = self.pairs()
+        changed = [pair for pair in pairs if depends(*pair)]
+        with self._condition:
+            copies = dict(self._copies)
+        return changed + [pair for pair in pairs if pair not in changed and pair in copies and depends(*copies[pair])]
+
+    def on_change(self, paths):
+        pairs = self.affected(paths)
+        logger.info("Changed: %s -> %d regeneration(s) queued", ", ".join(sorted(p.name for p in paths)), len(pairs))
+        self.submit(pairs)
+
+    def submit(self, pairs):
+        """Queue pairs, cancelling the running one if it is among them."""
+        with self._condition:
+            for pair in pairs:
+                self._queue[pair] = None
+                if pair == self._running and not self._cancel.is_set():
+                    logger.info("Superseded: stopping %s after its current stage", self.name_for(*pair))
+                    self._cancel.set()
+            self._condition.notify()
+
+    def start(self):
+        self._worker = threading.Thread(target=self._work, daemon=True, name="watch-worker")
+        self._worker.start()
+        return self
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            if self._cancel is not None:
+                self._cancel.set()
+            self._condition.notify()
+        if self._worker is not None:
+            self._worker.join()
+
+    def wait_idle(self, timeout=None):
+        """Block until the queue is empty and nothing is running. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._queue or self._running is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                pair = next(iter(self._queue))
+                del self._queue[pair]
+                self._running, self._cancel = pair, threading.Event()
+                cancel = self._cancel
+            try:
+                self._run(pair, cancel)
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error("Error regenerating %s: %s", self.name_for(*pair), e)
+            finally:
+                with self._condition:
+                    self._running = None
+                    self._condition.notify_all()
+
+    def _run(self, pair, cancel):
+        resume, job = pair
+        if not resume.exists() or not job.exists():
+            return  # deleted since the change was queued
+        name = self.name_for(resume, job)
+        if self.index is not None and self._reuse(resume, job, name):
+            return
+        start = time.perf_counter()
+        ok = process_resume(resume, self.output_folder, job, self.additional_details_path, output_name=name,
+                            cancel=cancel, **self.options)
+        with self._condition:
+            self._copies.pop(pair, None)
+        self.stats["runs"] += 1
+        if cancel.is_set():
+            self.stats["cancelled"] += 1
+            logger.info("%s: cancelled after %.1fs; rerunning with the latest inputs",
+                        name, time.perf_counter() - start)
+        elif ok:
+            logger.info("%s: up to date (%.1fs)", name, time.perf_counter() - start)
+        else:
+            self.stats["failed"] += 1
+            logger.warning("%s: failed (%.1fs)", name, time.perf_counter() - start)
+
+    def _reuse(self, resume, job, name):
+        """Copy a near-duplicate job description's output to name. True if it did."""
+        with open(job, "r", encoding="utf-8") as file:
+            text = file.read()
+        others = {str(other) for other in self.jobs() if other != job}
+        source_job = Path(self.index.canonical(str(job), text, among=others))
+        if source_job == job:
+            return False
+        source_pair = (resume, source_job)
+        source = self.name_for(*source_pair)
+        with self._condition:
+            pending = source_pair in self._queue
+            copied = source_pair in self._copies
+        # Only reuse a generated output that is current, never another copy
+        if pending or copied or not (self.output_folder / f"{source}.tex").exists():
+            return False
+        copy_outputs(self.output_folder, source, name)
+        with self._condition:
+            self._copies[(resume, job)] = source_pair
+        self.stats["reused"] += 1
+        logger.info("%s: near-duplicate of %s; reused its output", name, source_job.name)
+        return True
+
+
+def watch(resume_folder, jobs, output_folder, additional_details_path=None, output_name=None,
+          debounce=DEFAULT_DEBOUNCE, poll_interval=DEFAULT_POLL_INTERVAL, use_events=True,
+          dedup_threshold=None, **options):
+    """Bring every pair up to date, then keep regenerating on changes until interrupted."""
+    session = WatchSession(resume_folder, jobs, output_folder, additional_details_path, output_name,
+                           dedup_threshold=dedup_threshold, **options).start()
+    watcher = ChangeWatcher(session.watched_paths(), session.on_change, debounce, poll_interval,
+                            use_events).start()
+    logger.info("Watching %s (%s). Press Ctrl+C to stop.",
+                ", ".join(str(path) for path in session.watched_paths()), watcher.mode)
+    session.submit(session.pairs())
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("Stopping watch mode.")
+    finally:
+        watcher.stop()
+        session.stop()
+    logger.info("Watch summary: %(runs)d runs, %(cancelled)d cancelled, %(reused)d reused, %(failed)d failed",
+                session.stats)
+    return session.stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerate tailored resumes whenever their inputs change.")
+    parser.add_argument("--resume-folder", default="resume")
+    parser.add_argument("--jobs", default="job_description.txt",
+                        help="job description file, or a folder of .txt files")
+    parser.add_argument("--additional-details", default="additional_details.txt")
+    parser.add_argument("--output", default="newresume", help="output folder")
+    parser.add_argument("--name", default=DEFAULT_OUTPUT_NAME, help="output file name for a single pair")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                        help="seconds without further changes before regenerating")
+    parser.add_argument("--poll", action="store_true", help="poll for changes instead of using filesystem events")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument("--dedup-threshold", type=float, default=None,
+                        help="reuse one generation for job descriptions at least this similar (0-1)")
+    parser.add_argument("--json", action="store_true", help="have Gemini return JSON and render the LaTeX locally")
+    parser.add_argument("--token-budget", type=int, default=None)
+    parser.add_argument("--no-profile", action="store_true")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the extraction and response caches")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    watch(args.resume_folder, args.jobs, args.output, args.additional_details, args.name,
+          debounce=args.debounce, poll_interval=args.poll_interval, use_events=not args.poll,
+          dedup_threshold=args.dedup_threshold, use_cache=not args.no_cache, json_mode=args.json,
+          token_budget=args.token_budget, use_profile=not args.no_profile)